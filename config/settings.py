@@ -140,6 +140,17 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Mock test avtosaqlash buferi: javoblar cache da yig'iladi va har N soniyada
+# bazaga partiyalab yoziladi (0 — har saqlash to'g'ridan-to'g'ri bazaga).
+# Faqat umumiy cache (Redis/Memcached) sozlanganda yoqing — LocMem har
+# jarayonda alohida, bunday holatda bufer baribir o'chiq ishlaydi.
+MOCK_AUTOSAVE_BUFFER_SECONDS = int(os.environ.get('MOCK_AUTOSAVE_BUFFER_SECONDS', 0))
+MOCK_AUTOSAVE_CACHE = os.environ.get('MOCK_AUTOSAVE_CACHE', 'default')
+
+# Bir sessiyaning bitta testdagi kunlik urinishlari (testda alohida berilmasa).
+MOCK_MAX_DAILY_ATTEMPTS = int(os.environ.get('MOCK_MAX_DAILY_ATTEMPTS', 5))
+MOCK_ATTEMPT_LIMIT_CACHE = os.environ.get('MOCK_ATTEMPT_LIMIT_CACHE', 'default')
+
 # Telegram Bot Settings (can be overridden in settings_dev.py)
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
 TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', '')
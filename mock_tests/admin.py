@@ -1,12 +1,13 @@
 import json
-import tempfile
-from pathlib import Path
 
 from django.contrib import admin, messages
-from django.core.management import call_command
-from django.db import transaction
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import Case, Count, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.urls import path, reverse
+from django.utils import timezone
 from django.utils.html import format_html
 
 from .admin_forms import (
@@ -14,9 +15,27 @@ from .admin_forms import (
     MockQuestionAdminForm,
     question_type_rules_json,
 )
-from .models import MockAttempt, MockPassage, MockQuestion, MockTest
-from .question_admin_helpers import fix_misplaced_instruction, sync_points_from_slots
+from .models import MockAttempt, MockPassage, MockQuestion, MockTest, MockTestDailyStat
+from .services.answer_codec import read_answers
+from .services.attempt_export import FORMATS as EXPORT_FORMATS, ExportError, export_chunks
+from .services.jobs import REGRADE, enqueue_jobs
+from .services.purge import purge_status, purge_test, queue_purge
+from .services.question_lint import health_for_tests, test_health
+from .services.question_repair import repair_questions
 from .services.stats import get_dashboard_stats
+from .services.test_bundle import iter_bundle_chunks
+from .services.test_clone import clone_questions, clone_tests
+from .services.test_counters import ensure_test_counters
+from .services.test_import import SKIPPED, import_specs, load_upload
+
+
+class MockTestChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # Sahifadagi testlar "sog'lik" belgisi — saqlangan maydonlardan, eskirganlari bitta so'rov bilan
+        health = health_for_tests(self.result_list)
+        for test in self.result_list:
+            test._lint_health = health[test.pk]
 
 
 class MockPassageInline(admin.StackedInline):
@@ -115,6 +134,7 @@ class MockTestAdmin(admin.ModelAdmin):
         "test_type",
         "difficulty",
         "content_summary_display",
+        "health_badge",
         "attempts_count",
         "is_active",
         "updated_at",
@@ -127,7 +147,15 @@ class MockTestAdmin(admin.ModelAdmin):
     save_as = True
     save_on_top = True
     list_per_page = 25
-    actions = ["duplicate_tests", "activate_tests", "deactivate_tests", "fix_test_questions"]
+    actions = [
+        "duplicate_tests",
+        "activate_tests",
+        "deactivate_tests",
+        "fix_test_questions",
+        "regrade_attempts",
+        "purge_tests_in_background",
+        "export_bundle",
+    ]
 
     class Media:
         js = ("admin/mock_tests/question_admin.js",)
@@ -150,7 +178,7 @@ class MockTestAdmin(admin.ModelAdmin):
             (
                 "Parametrlar",
                 {
-                    "fields": ("duration_minutes", "passing_score", "audio_file"),
+                    "fields": ("duration_minutes", "passing_score", "max_daily_attempts", "audio_file"),
                     "description": "Listening uchun audio fayl yuklang.",
                 },
             ),
@@ -199,9 +227,42 @@ class MockTestAdmin(admin.ModelAdmin):
                 self.admin_site.admin_view(self.import_json_view),
                 name="mock_tests_mocktest_import_json",
             ),
+            path(
+                "purge-status/",
+                self.admin_site.admin_view(self.purge_status_view),
+                name="mock_tests_mocktest_purge_status",
+            ),
         ]
         return custom + urls
 
+    def purge_status_view(self, request):
+        """Navbat orqali o'chirilayotgan testlar holati (bazadan): ``?ids=1,2``."""
+        ids = [int(v) for v in request.GET.get("ids", "").split(",") if v.strip().isdigit()]
+        return JsonResponse({str(test_id): purge_status(test_id) for test_id in ids})
+
+    def get_deleted_objects(self, objs, request):
+        # Standart collector barcha urinishlarni yuklab ro'yxatlaydi — bu yerda faqat sonlar
+        objs = list(objs)
+        ids = [obj.pk for obj in objs]
+        to_delete = [str(obj) for obj in objs]
+        model_count = {
+            MockTest._meta.verbose_name_plural: len(objs),
+            MockQuestion._meta.verbose_name_plural: MockQuestion.objects.filter(test_id__in=ids).count(),
+            MockPassage._meta.verbose_name_plural: MockPassage.objects.filter(test_id__in=ids).count(),
+            MockAttempt._meta.verbose_name_plural: MockAttempt.objects.filter(test_id__in=ids).count(),
+        }
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(MockTest._meta.verbose_name)
+        return to_delete, {k: v for k, v in model_count.items() if v}, perms_needed, []
+
+    def delete_model(self, request, obj):
+        purge_test(obj.pk)
+
+    def delete_queryset(self, request, queryset):
+        for test_id in queryset.values_list("pk", flat=True):
+            purge_test(test_id)
+
     def stats_view(self, request):
         days = int(request.GET.get("days", 7))
         days = max(1, min(days, 90))
@@ -220,42 +281,38 @@ class MockTestAdmin(admin.ModelAdmin):
             if not upload:
                 messages.error(request, "JSON fayl tanlang.")
             else:
-                try:
-                    data = json.loads(upload.read().decode("utf-8"))
-                    title = data.get("title", "import")
-                    suffix = Path(upload.name).suffix or ".json"
-                    with tempfile.NamedTemporaryFile(
-                        mode="w",
-                        suffix=suffix,
-                        delete=False,
-                        encoding="utf-8",
-                    ) as tmp:
-                        json.dump(data, tmp, ensure_ascii=False)
-                        tmp_path = tmp.name
-                    call_command(
-                        "import_mock_test",
-                        tmp_path,
-                        update=update,
-                        verbosity=0,
-                    )
-                    test = MockTest.objects.filter(title=title).first()
-                    if test:
-                        messages.success(
-                            request,
-                            f'"{test.title}" import qilindi — {test.questions.count()} savol.',
-                        )
-                        return redirect(
-                            reverse(
-                                "admin:mock_tests_mocktest_change",
-                                args=[test.pk],
+                specs, errors = load_upload(upload)
+                if not errors and not specs:
+                    errors = ["Faylda test topilmadi."]
+                if errors:
+                    for error in errors[:20]:
+                        messages.error(request, error)
+                    if len(errors) > 20:
+                        messages.error(request, f"... yana {len(errors) - 20} ta xato.")
+                else:
+                    try:
+                        results = import_specs(specs, update=update)
+                    except Exception as exc:
+                        messages.error(request, f"Import xatolik: {exc}")
+                    else:
+                        imported = [r for r in results if r.status != SKIPPED]
+                        for r in results:
+                            if r.status == SKIPPED:
+                                messages.warning(
+                                    request,
+                                    f'"{r.title}" allaqachon mavjud — yangilash uchun belgini yoqing.',
+                                )
+                        if len(imported) == 1:
+                            messages.success(
+                                request,
+                                f'"{imported[0].title}" import qilindi — {imported[0].question_count} savol.',
                             )
-                        )
-                    messages.success(request, "Import bajarildi.")
-                    return redirect("admin:mock_tests_mocktest_changelist")
-                except json.JSONDecodeError:
-                    messages.error(request, "JSON formati noto'g'ri.")
-                except Exception as exc:
-                    messages.error(request, f"Import xatolik: {exc}")
+                            return redirect(
+                                reverse("admin:mock_tests_mocktest_change", args=[imported[0].test.pk])
+                            )
+                        if imported:
+                            messages.success(request, f"{len(imported)} ta test import qilindi.")
+                            return redirect("admin:mock_tests_mocktest_changelist")
 
         context = {
             **self.admin_site.each_context(request),
@@ -274,11 +331,11 @@ class MockTestAdmin(admin.ModelAdmin):
         )
         obj = self.get_object(request, object_id)
         if obj:
-            qs = obj.questions.all()
+            ensure_test_counters(obj)
             extra_context["test_slot_stats_json"] = json.dumps({
-                "question_rows": qs.count(),
-                "gradable_slots": obj.total_questions,
-                "total_points": sum(q.points for q in qs),
+                "question_rows": obj.question_count,
+                "gradable_slots": obj.gradable_slots,
+                "total_points": obj.total_points,
             }, ensure_ascii=False)
         return super().change_view(
             request, object_id, form_url, extra_context=extra_context
@@ -303,64 +360,114 @@ class MockTestAdmin(admin.ModelAdmin):
     def content_summary_display(self, obj):
         if not obj or not obj.pk:
             return "—"
-        p_count = obj.passages.count()
-        slot_count = obj.total_questions
+        ensure_test_counters(obj)
+        p_count = obj.passage_count
+        slot_count = obj.gradable_slots
         if obj.test_type == "reading" and p_count:
             return format_html("{} passage / {} slot", p_count, slot_count)
         return format_html("<strong>{}</strong> slot", slot_count)
 
     content_summary_display.short_description = "Tarkib"
 
+    @admin.display(description="Kalitlar")
+    def health_badge(self, obj):
+        # lint_question_bank xulosasi — kontent versiyasi bilan keshda
+        health = getattr(obj, "_lint_health", None) or test_health(obj)
+        if health["errors"]:
+            return format_html(
+                '<span style="color:#b91c1c;font-weight:600" title="{} ogohlantirish">✖ {} xato</span>',
+                health["warnings"], health["errors"],
+            )
+        if health["warnings"]:
+            return format_html('<span style="color:#b45309">⚠ {}</span>', health["warnings"])
+        return format_html('<span style="color:#15803d">{}</span>', "✔")
+
+    def get_changelist(self, request, **kwargs):
+        return MockTestChangeList
+
+    def get_queryset(self, request):
+        # Urinishlar soni kunlik yig'madan — har qator uchun COUNT emas.
+        # Yig'ma tarixni to'liq qamramagan testlar (daily_stats_complete=False:
+        # yig'madan oldingi urinishlar, backfill_daily_stats hali ishlamagan)
+        # uchun jonli COUNT; CASE uni faqat shu testlarda hisoblaydi.
+        started = (
+            MockTestDailyStat.objects.filter(test=OuterRef("pk"))
+            .values("test")
+            .annotate(n=Sum("started_count"))
+            .values("n")
+        )
+        live = (
+            MockAttempt.objects.filter(test=OuterRef("pk"))
+            .values("test")
+            .annotate(n=Count("pk"))
+            .values("n")
+        )
+        return super().get_queryset(request).annotate(
+            attempts_total=Case(
+                When(daily_stats_complete=True, then=Coalesce(Subquery(started), 0)),
+                default=Coalesce(Subquery(live), 0),
+            ),
+        )
+
     def attempts_count(self, obj):
         if not obj or not obj.pk:
             return 0
-        return obj.attempts.count()
+        return getattr(obj, "attempts_total", 0)
 
     attempts_count.short_description = "Urinishlar"
+    attempts_count.admin_order_field = "attempts_total"
 
     @admin.action(description="Testni nusxalash (passage + savollar)")
     def duplicate_tests(self, request, queryset):
-        n = 0
-        for old in queryset:
-            questions = list(old.questions.all().order_by("order", "pk"))
-            passages = list(old.passages.all().order_by("order", "pk"))
-            with transaction.atomic():
-                old.pk = None
-                old._state.adding = True
-                old.title = f"{old.title} (nusxa)"
-                old.save()
-                for p in passages:
-                    p.pk = None
-                    p.test = old
-                    p._state.adding = True
-                    p.save()
-                for q in questions:
-                    q.pk = None
-                    q.test = old
-                    q._state.adding = True
-                    q.save()
-            n += 1
+        clones = clone_tests(queryset)
         self.message_user(
-            request, f"{n} ta test nusxalandi.", messages.SUCCESS
+            request, f"{len(clones)} ta test nusxalandi.", messages.SUCCESS
         )
 
     @admin.action(description="Savollarni tuzatish (ball + ko'rsatma)")
     def fix_test_questions(self, request, queryset):
-        instr_fixed = 0
-        points_fixed = 0
-        for test in queryset:
-            for q in test.questions.all():
-                if fix_misplaced_instruction(q):
-                    instr_fixed += 1
-                if sync_points_from_slots(q):
-                    points_fixed += 1
-                q.save(update_fields=['instruction', 'question_text', 'points'])
+        report = repair_questions(test_ids=queryset.values_list("pk", flat=True))
         self.message_user(
             request,
-            f"Ko'rsatma: {instr_fixed} ta, ball: {points_fixed} ta savol yangilandi.",
+            f"Ko'rsatma: {report.fixed('instruction')} ta, ball: {report.fixed('points')} ta savol yangilandi.",
             messages.SUCCESS,
         )
 
+    @admin.action(description="Urinishlarni qayta baholash (navbat orqali)")
+    def regrade_attempts(self, request, queryset):
+        # Minglab urinishli testlar so'rov vaqtiga sig'maydi — ishni run_test_jobs bajaradi
+        ids = list(queryset.values_list("pk", flat=True))
+        jobs = enqueue_jobs(REGRADE, ids)
+        skipped = len(ids) - len(jobs)
+        note = f" ({skipped} tasi allaqachon navbatda)" if skipped else ""
+        self.message_user(
+            request,
+            f"{len(jobs)} ta test qayta baholash navbatiga qo'yildi{note}; run_test_jobs buyrug'i "
+            f"bajaradi (yoki darhol: manage.py regrade_attempts --test-id N --workers 4).",
+            messages.INFO,
+        )
+
+    @admin.action(description="Urinishlari bilan fonda o'chirish", permissions=["delete"])
+    def purge_tests_in_background(self, request, queryset):
+        ids = list(queryset.values_list("pk", flat=True))
+        queue_purge(ids)
+        status_url = reverse("admin:mock_tests_mocktest_purge_status")
+        self.message_user(
+            request,
+            f"{len(ids)} ta test o'chirish navbatiga qo'yildi (nofaol qilindi); "
+            f"run_test_jobs buyrug'i bajaradi. Holat: {status_url}?ids={','.join(map(str, ids))}",
+            messages.INFO,
+        )
+
+    @admin.action(description="Zip to'plamga eksport (media bilan)")
+    def export_bundle(self, request, queryset):
+        response = StreamingHttpResponse(
+            iter_bundle_chunks(queryset.order_by("pk")), content_type="application/zip"
+        )
+        stamp = timezone.now().strftime("%Y%m%d-%H%M")
+        response["Content-Disposition"] = f'attachment; filename="mock-tests-{stamp}.zip"'
+        return response
+
     @admin.action(description="Faollashtirish")
     def activate_tests(self, request, queryset):
         n = queryset.update(is_active=True)
@@ -456,39 +563,8 @@ class MockQuestionAdmin(admin.ModelAdmin):
 
     @admin.action(description="Savolni nusxalash (oxirgi order + 1)")
     def duplicate_questions(self, request, queryset):
-        n = 0
-        by_test = {}
-        for q in queryset.select_related("test").order_by("test_id", "order", "pk"):
-            test = q.test
-            if test.pk not in by_test:
-                last = test.questions.order_by("-order").values_list("order", flat=True).first()
-                by_test[test.pk] = last or 0
-            by_test[test.pk] += 1
-            new_order = by_test[test.pk]
-            image_data = None
-            if q.image:
-                image_data = (q.image.name, q.image.read())
-            q.pk = None
-            q._state.adding = True
-            q.order = new_order
-            if test.test_type == "reading":
-                q.part_number = 1 if new_order <= 13 else (2 if new_order <= 26 else 3)
-            elif test.test_type == "listening":
-                if new_order <= 10:
-                    q.part_number = 1
-                elif new_order <= 20:
-                    q.part_number = 2
-                elif new_order <= 30:
-                    q.part_number = 3
-                else:
-                    q.part_number = 4
-            q.image = None
-            q.save()
-            if image_data:
-                from django.core.files.base import ContentFile
-                q.image.save(image_data[0], ContentFile(image_data[1]), save=True)
-            n += 1
-        self.message_user(request, f"{n} ta savol nusxalandi.", messages.SUCCESS)
+        clones = clone_questions(queryset.select_related("test"))
+        self.message_user(request, f"{len(clones)} ta savol nusxalandi.", messages.SUCCESS)
 
 
 @admin.register(MockAttempt)
@@ -512,7 +588,6 @@ class MockAttemptAdmin(admin.ModelAdmin):
     readonly_fields = [
         "test",
         "session_key",
-        "answers_json",
         "score_percent",
         "correct_count",
         "total_questions",
@@ -520,6 +595,7 @@ class MockAttemptAdmin(admin.ModelAdmin):
         "is_finished",
         "started_at",
         "finished_at",
+        "answers_display",
     ]
     fields = (
         "test",
@@ -528,12 +604,51 @@ class MockAttemptAdmin(admin.ModelAdmin):
         ("correct_count", "total_questions"),
         "is_finished",
         ("started_at", "finished_at"),
-        "answers_json",
+        "answers_display",
     )
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom = [
+            path(
+                "export/",
+                self.admin_site.admin_view(self.export_view),
+                name="mock_tests_mockattempt_export",
+            ),
+        ]
+        return custom + urls
+
+    def export_view(self, request):
+        """Joriy filtrlardagi tugallangan urinishlar — slot qatorlari, oqim bilan."""
+        fmt = request.GET.get("format", "csv")
+        if fmt not in EXPORT_FORMATS:
+            return HttpResponseBadRequest("Noma'lum format")
+        # ``format`` changelist filtri emas — ro'yxat querysetini qurishdan oldin olib tashlanadi
+        params = request.GET.copy()
+        params.pop("format", None)
+        request.GET = params
+        attempts = self.get_changelist_instance(request).get_queryset(request)
+        try:
+            chunks = export_chunks(attempts.filter(is_finished=True), fmt)
+        except ExportError as exc:
+            return HttpResponseBadRequest(str(exc))
+        content_type, extension = EXPORT_FORMATS[fmt]
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        stamp = timezone.now().strftime("%Y%m%d-%H%M")
+        response["Content-Disposition"] = f'attachment; filename="mock-attempts-{stamp}.{extension}"'
+        return response
+
     def short_session_key(self, obj):
         if not obj.session_key:
             return "-"
         return f"{obj.session_key[:8]}..."
 
     short_session_key.short_description = "Session"
+
+    @admin.display(description="Javoblar")
+    def answers_display(self, obj):
+        answers = read_answers(obj)
+        return format_html(
+            "<pre style='white-space:pre-wrap;margin:0'>{}</pre>",
+            json.dumps(answers, ensure_ascii=False, indent=2),
+        )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from mock_tests.services.attempt_archive import DEFAULT_BATCH_SIZE, archive_attempts, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = "Eski urinishlarni oy bo'yicha gzip JSONL arxivga ko'chirish va bazadan olib tashlash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Arxiv fayllari papkasi')
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=12,
+            help='Shuncha oydan eski (started_at) urinishlar arxivlanadi (default: 12)',
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--keep-detached',
+            action='store_true',
+            help="Ajratilgan bo'lak jadvalini o'chirmaslik (faqat DETACH)",
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Faqat sanash')
+
+    def handle(self, *args, **options):
+        results = archive_attempts(
+            options['output_dir'],
+            months=options['months'],
+            batch_size=max(1, options['batch_size']),
+            dry_run=options['dry_run'],
+            drop=not options['keep_detached'],
+        )
+        for month, rows, path, partition in results:
+            line = f'{month:%Y-%m}: {rows} ta'
+            if path:
+                line += f' -> {path}'
+            if partition:
+                line += f" (bo'lak {partition} ajratildi)"
+            self.stdout.write(line)
+        total = sum(rows for _month, rows, _path, _partition in results)
+        verb = 'arxivlanadi (dry-run)' if options['dry_run'] else 'arxivlandi'
+        self.stdout.write(self.style.SUCCESS(
+            f'{archive_cutoff(options["months"]):%Y-%m} dan oldingi urinishlar: {total} ta {verb}.'
+        ))
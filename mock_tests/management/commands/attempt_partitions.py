@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mock_tests.services.attempt_partitions import (
+    DEFAULT_MONTHS_AHEAD,
+    PartitioningError,
+    convert_to_partitioned,
+    ensure_partitions,
+    list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = "MockAttempt oylik bo'laklari (PostgreSQL): oldindan yaratish yoki jadvalni aylantirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=DEFAULT_MONTHS_AHEAD,
+            help=f'Joriy oydan keyin nechta oy uchun bo\'lak ochish (default: {DEFAULT_MONTHS_AHEAD})',
+        )
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help="Oddiy jadvalni bo'lakli jadvalga aylantirish (bir marta; jadval qulflanadi)",
+        )
+        parser.add_argument('--list', action='store_true', help="Mavjud bo'laklarni ko'rsatish")
+
+    def handle(self, *args, **options):
+        months_ahead = max(0, options['months_ahead'])
+        try:
+            if options['convert']:
+                moved = convert_to_partitioned(months_ahead=months_ahead)
+                self.stdout.write(self.style.SUCCESS(
+                    f"Jadval bo'laklandi: {moved} ta urinish ko'chirildi."
+                ))
+            else:
+                created = ensure_partitions(months_ahead=months_ahead)
+                self.stdout.write(self.style.SUCCESS(f"Yangi bo'laklar: {len(created)} ta."))
+        except PartitioningError as exc:
+            raise CommandError(str(exc))
+        if options['list']:
+            for month, name in list_partitions():
+                self.stdout.write(f'{month:%Y-%m}  {name}')
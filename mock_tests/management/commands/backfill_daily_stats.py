@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from mock_tests.models import MockTest
+from mock_tests.services.rollups import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Kunlik yig'ma statistikani (MockTestDailyStat) urinishlardan qayta qurish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--test-id',
+            type=int,
+            action='append',
+            default=None,
+            help='Faqat shu test ID (bir necha marta berish mumkin)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help="Faqat oxirgi N kun (standart: butun tarix)",
+        )
+
+    def handle(self, *args, **options):
+        test_ids = options.get('test_id')
+        if test_ids:
+            found = set(MockTest.objects.filter(pk__in=test_ids).values_list('pk', flat=True))
+            missing = set(test_ids) - found
+            if missing:
+                raise CommandError(f'Test topilmadi: {sorted(missing)}')
+
+        since = None
+        if options.get('days') is not None:
+            if options['days'] < 1:
+                raise CommandError("--days kamida 1 bo'lishi kerak")
+            since = timezone.localdate() - timedelta(days=options['days'] - 1)
+
+        rows = rebuild_daily_stats(test_ids=test_ids or None, since=since)
+        scope = f' ({since} dan)' if since else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"Kunlik yig'ma qayta qurildi{scope}: {rows} ta qator."
+        ))
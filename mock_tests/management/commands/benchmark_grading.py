@@ -0,0 +1,134 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mock_tests.services.answer_normalizer import (
+    expand_answer_variants,
+    fuzzy_match_any,
+    levenshtein,
+)
+from mock_tests.services.hll import (
+    HLL_STANDARD_ERROR,
+    empty_sketch,
+    estimate_cardinality,
+    merge_sketches,
+    sketch_add,
+)
+
+SENTENCE_WORDS = (
+    'the', 'museum', 'was', 'rebuilt', 'after', 'a', 'serious', 'fire', 'destroyed',
+    'most', 'of', 'its', 'original', 'collection', 'in', 'eighteen', 'century',
+    'wooden', 'roof', 'visitors', 'local', 'council', 'funding', 'restoration',
+)
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(SENTENCE_WORDS) for _ in range(words))
+
+
+def _typo(rng, text):
+    idx = rng.randrange(len(text))
+    return text[:idx] + rng.choice(string.ascii_lowercase) + text[idx + 1:]
+
+
+def _full_dp_match(user_variants, acceptable_variants, max_distance):
+    """Eski usul: har juftlik uchun to'liq Levenshtein jadvali."""
+    for u in user_variants:
+        for a in acceptable_variants:
+            if u == a:
+                return True
+            if abs(len(u) - len(a)) > max_distance or min(len(u), len(a)) < 4:
+                continue
+            if levenshtein(u, a) <= max_distance:
+                return True
+    return False
+
+
+class Command(BaseCommand):
+    help = "Baholash dvigateli uchun mikro-benchmarklar"
+
+    CASES = ('fuzzy', 'hll')
+
+    def add_arguments(self, parser):
+        parser.add_argument('case', choices=self.CASES, help='Benchmark turi')
+        parser.add_argument('--samples', type=int, default=300, help='Javoblar soni')
+        parser.add_argument('--words', type=int, default=12, help="Sentence completion javobidagi so'zlar")
+        parser.add_argument('--days', type=int, default=30, help='hll: kunlar (eskizlar) soni')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        handler = getattr(self, f'bench_{options["case"]}', None)
+        if handler is None:
+            raise CommandError(f'Noma\'lum benchmark: {options["case"]}')
+        handler(options)
+
+    def _report(self, label, seconds, samples):
+        per_call = seconds / max(samples, 1) * 1e6
+        self.stdout.write(f'  {label:<28} {seconds * 1000:9.1f} ms  ({per_call:8.1f} µs/javob)')
+
+    def bench_fuzzy(self, options):
+        rng = random.Random(options['seed'])
+        samples = max(1, options['samples'])
+        cases = []
+        for _ in range(samples):
+            keys = [_sentence(rng, options['words']) for _ in range(3)]
+            acceptable = set()
+            for key in keys:
+                acceptable |= expand_answer_variants(key)
+            user = _typo(rng, rng.choice(keys)) if rng.random() < 0.5 else _sentence(rng, options['words'])
+            cases.append((expand_answer_variants(user), acceptable))
+
+        start = time.perf_counter()
+        old = [_full_dp_match(u, a, 1) for u, a in cases]
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = [fuzzy_match_any(u, a, 1) for u, a in cases]
+        new_time = time.perf_counter() - start
+
+        if old != new:
+            raise CommandError('Natijalar mos kelmadi — bounded matcher xato.')
+        self.stdout.write(f'Fuzzy: {samples} javob, ~{options["words"]} so\'z, max_distance=1')
+        self._report('to\'liq Levenshtein', old_time, samples)
+        self._report('banded + bitta tahrir', new_time, samples)
+        speedup = old_time / new_time if new_time else float('inf')
+        self.stdout.write(self.style.SUCCESS(f'Tezlanish: {speedup:.1f}x'))
+
+    def bench_hll(self, options):
+        """Kunlik eskizlarni birlashtirish va aniq ``set`` sanash solishtiruvi."""
+        rng = random.Random(options['seed'])
+        samples = max(1, options['samples'])
+        days = max(1, options['days'])
+        # Sessiyalarning bir qismi bir necha kun qaytadi
+        pool = [f'sess-{rng.getrandbits(64):016x}' for _ in range(max(1, samples * 2 // 3))]
+        by_day = [[] for _ in range(days)]
+        for _ in range(samples):
+            by_day[rng.randrange(days)].append(rng.choice(pool))
+
+        start = time.perf_counter()
+        exact = len({key for keys in by_day for key in keys})
+        exact_time = time.perf_counter() - start
+
+        sketches = []
+        for keys in by_day:
+            sketch = empty_sketch()
+            for key in keys:
+                sketch_add(sketch, key)
+            sketches.append(bytes(sketch))
+
+        start = time.perf_counter()
+        estimate = estimate_cardinality(merge_sketches(sketches))
+        merge_time = time.perf_counter() - start
+
+        error = abs(estimate - exact) / exact if exact else 0.0
+        self.stdout.write(f'HLL: {samples} urinish, {days} kun, aniq unikal = {exact}, taxmin = {estimate}')
+        self._report('aniq set (xom qatorlar)', exact_time, samples)
+        self._report(f'{days} eskizni birlashtirish', merge_time, samples)
+        bound = 3 * HLL_STANDARD_ERROR
+        line = f'Nisbiy xato: {error * 100:.2f}% (standart xato {HLL_STANDARD_ERROR * 100:.2f}%, 3σ = {bound * 100:.1f}%)'
+        if error > bound:
+            self.stdout.write(self.style.WARNING(line))
+        else:
+            self.stdout.write(self.style.SUCCESS(line))
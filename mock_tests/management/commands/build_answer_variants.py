@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from mock_tests.models import MockQuestion
+from mock_tests.services.variant_index import refresh_variant_index
+
+
+class Command(BaseCommand):
+    help = "Savollar uchun javob variantlari indeksini hisoblash (answer_variants_json)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--test-id',
+            type=int,
+            default=None,
+            help='Faqat shu test ID dagi savollar',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Bir bulk_update dagi savollar soni',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Yaroqli indeksni ham qayta hisoblash',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        qs = MockQuestion.objects.order_by('pk')
+        if options.get('test_id'):
+            qs = qs.filter(test_id=options['test_id'])
+
+        scanned = 0
+        updated = 0
+        pending = []
+        for q in qs.iterator(chunk_size=batch_size):
+            scanned += 1
+            if refresh_variant_index(q, force=options['force']):
+                pending.append(q)
+            if len(pending) >= batch_size:
+                MockQuestion.objects.bulk_update(pending, ['answer_variants_json'])
+                updated += len(pending)
+                pending = []
+        if pending:
+            MockQuestion.objects.bulk_update(pending, ['answer_variants_json'])
+            updated += len(pending)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Variant indeksi: {scanned} ta savol ko\'rildi, {updated} ta yangilandi.'
+        ))
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from mock_tests.services.session_cleanup import (
+    DEFAULT_BATCH_SIZE,
+    purge_expired_sessions,
+    purge_orphaned_attempts,
+)
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan sessiyalar va egasiz tugallanmagan urinishlarni partiyalab o'chirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=24,
+            help="Shundan yosh urinishlarga tegilmaydi (default: 24)",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Faqat sanash, o'chirmaslik")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        dry_run = options['dry_run']
+        # Avval urinishlar: sessiya o'chgach ham ular muddati bo'yicha topiladi
+        attempts = purge_orphaned_attempts(
+            grace=timedelta(hours=max(0, options['grace_hours'])),
+            batch_size=batch_size,
+            dry_run=dry_run,
+        )
+        sessions = purge_expired_sessions(batch_size=batch_size, dry_run=dry_run)
+        verb = "o'chiriladi (dry-run)" if dry_run else "o'chirildi"
+        self.stdout.write(self.style.SUCCESS(
+            f'Sessiyalar: {sessions} ta, tugallanmagan urinishlar: {attempts} ta {verb}.'
+        ))
@@ -0,0 +1,80 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mock_tests.models import MockAttempt, MockTest
+from mock_tests.services.answer_codec import decode_answers, encode_answers, is_compact
+
+
+def _size(value):
+    return len(json.dumps(value, ensure_ascii=False, separators=(', ', ': ')).encode('utf-8'))
+
+
+class Command(BaseCommand):
+    help = "Tugallangan urinishlar answers_json ini ixcham shaklga o'tkazish (partiyalab)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--test-id',
+            type=int,
+            action='append',
+            default=None,
+            help='Faqat shu test ID (bir necha marta berish mumkin)',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--expand',
+            action='store_true',
+            help="Teskari yo'nalish: ixcham qatorlarni oddiy shaklga qaytarish",
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Faqat hisoblash, yozmaslik')
+
+    def handle(self, *args, **options):
+        tests = MockTest.objects.order_by('pk')
+        if options.get('test_id'):
+            tests = tests.filter(pk__in=options['test_id'])
+            missing = set(options['test_id']) - set(tests.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f'Test topilmadi: {sorted(missing)}')
+
+        batch_size = max(1, options['batch_size'])
+        rows = 0
+        before = 0
+        after = 0
+        for test in tests:
+            questions = list(test.questions.all())
+            for q in questions:
+                q.test = test
+            qs = (
+                MockAttempt.objects.filter(test=test, is_finished=True)
+                .order_by('pk')
+                .values_list('pk', 'answers_json')
+            )
+            batch = []
+            for pk, answers in qs.iterator(chunk_size=batch_size):
+                if options['expand']:
+                    if not is_compact(answers):
+                        continue
+                    new = decode_answers(answers)
+                else:
+                    if is_compact(answers):
+                        continue
+                    new = encode_answers(test, questions, answers or {})
+                before += _size(answers)
+                after += _size(new)
+                batch.append(MockAttempt(pk=pk, answers_json=new))
+                if len(batch) >= batch_size:
+                    rows += self._write(batch, options['dry_run'])
+                    batch = []
+            rows += self._write(batch, options['dry_run'])
+
+        saved = (1 - after / before) * 100 if before else 0
+        verb = "o'zgaradi (dry-run)" if options['dry_run'] else "qayta yozildi"
+        self.stdout.write(self.style.SUCCESS(
+            f'answers_json: {rows} ta qator {verb}; {before} -> {after} bayt ({saved:.0f}% kam).'
+        ))
+
+    def _write(self, batch, dry_run):
+        if batch and not dry_run:
+            MockAttempt.objects.bulk_update(batch, ['answers_json'])
+        return len(batch)
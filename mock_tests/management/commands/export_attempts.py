@@ -0,0 +1,60 @@
+import sys
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from mock_tests.models import MockAttempt
+from mock_tests.services.attempt_export import DEFAULT_CHUNK_SIZE, FORMATS, ExportError, export_chunks
+
+
+def _parse_day(value):
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Sana YYYY-MM-DD bo'lishi kerak: {value}")
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    help = "Tugallangan urinishlarni slot darajasida eksport (CSV, JSONL, Parquet, Arrow) — oqim bilan"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', default='-', help="Fayl yo'li ('-' — stdout)")
+        parser.add_argument(
+            '--test-id',
+            type=int,
+            action='append',
+            default=None,
+            help='Faqat shu test ID (bir necha marta berish mumkin)',
+        )
+        parser.add_argument('--since', help='finished_at >= YYYY-MM-DD')
+        parser.add_argument('--until', help='finished_at < YYYY-MM-DD')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        attempts = MockAttempt.objects.filter(is_finished=True)
+        if options.get('test_id'):
+            attempts = attempts.filter(test_id__in=options['test_id'])
+        if options.get('since'):
+            attempts = attempts.filter(finished_at__gte=_parse_day(options['since']))
+        if options.get('until'):
+            attempts = attempts.filter(finished_at__lt=_parse_day(options['until']))
+        try:
+            chunks = export_chunks(attempts, options['format'], max(1, options['chunk_size']))
+        except ExportError as exc:
+            raise CommandError(str(exc))
+
+        if options['output'] == '-':
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+            return
+        size = 0
+        with open(options['output'], 'wb') as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                size += len(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Eksport: {options['output']} ({size} bayt)."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mock_tests.models import MockTest
+from mock_tests.services.test_bundle import write_bundle
+
+
+class Command(BaseCommand):
+    help = "Testlarni media bilan zip to'plamga eksport (import_mock_test qayta o'qiydi) — oqim bilan"
+
+    def add_arguments(self, parser):
+        parser.add_argument('test_ids', nargs='*', type=int, help='Test ID lari')
+        parser.add_argument('--all', action='store_true', help='Barcha testlar')
+        parser.add_argument('--output', '-o', required=True, help="Zip fayl yo'li")
+
+    def handle(self, *args, **options):
+        if options['all']:
+            tests = MockTest.objects.order_by('pk')
+        elif options['test_ids']:
+            tests = MockTest.objects.filter(pk__in=options['test_ids']).order_by('pk')
+            found = set(tests.values_list('pk', flat=True))
+            unknown = sorted(set(options['test_ids']) - found)
+            if unknown:
+                raise CommandError(f"Test topilmadi: {', '.join(map(str, unknown))}")
+        else:
+            raise CommandError("Test ID lari yoki --all kerak")
+
+        missing = []
+        size = write_bundle(tests, options['output'], missing)
+        for name in missing:
+            self.stdout.write(self.style.WARNING(f"Media fayl topilmadi, tashlab ketildi: {name}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Eksport: {options['output']} — {tests.count()} test ({size} bayt). "
+            f"Import: python manage.py import_mock_test {options['output']}"
+        ))
@@ -1,7 +1,10 @@
-from django.core.management.base import BaseCommand
+import json
 
-from mock_tests.models import MockQuestion
-from mock_tests.question_admin_helpers import fix_misplaced_instruction, sync_points_from_slots
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from mock_tests.models import MockTest
+from mock_tests.services.question_repair import DEFAULT_CHUNK_SIZE, repair_questions
 
 
 class Command(BaseCommand):
@@ -16,40 +19,63 @@ class Command(BaseCommand):
         parser.add_argument(
             '--test-id',
             type=int,
+            action='append',
             default=None,
-            help='Faqat shu test ID dagi savollar',
+            help='Faqat shu test ID dagi savollar (bir necha marta berish mumkin)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Bir partiyadagi savollar soni (o'qish va bulk_update)",
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Tekshirish uchun jarayonlar soni',
+        )
+        parser.add_argument(
+            '--report',
+            default=None,
+            help="JSON farq hisoboti yo'li ('-' — stdout, boshqa chiqishsiz)",
         )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        test_id = options.get('test_id')
-        qs = MockQuestion.objects.all().select_related('test')
-        if test_id:
-            qs = qs.filter(test_id=test_id)
-
-        instr_fixed = 0
-        points_fixed = 0
-        for q in qs:
-            before_points = q.points
-            instr_changed = fix_misplaced_instruction(q)
-            points_changed = sync_points_from_slots(q)
-            if not instr_changed and not points_changed:
-                continue
-            if instr_changed:
-                instr_fixed += 1
-                self.stdout.write(
-                    f'  #{q.pk} ({q.test.title} — order {q.order}): ko\'rsatma tuzatildi'
-                )
-            if points_changed:
-                points_fixed += 1
-                self.stdout.write(
-                    f'  #{q.pk} ({q.test.title} — order {q.order}): '
-                    f'ball {before_points} → {q.points}'
-                )
-            if not dry_run:
-                q.save(update_fields=['instruction', 'question_text', 'points'])
+        test_ids = options.get('test_id')
+        if test_ids:
+            missing = set(test_ids) - set(MockTest.objects.filter(pk__in=test_ids).values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f'Test topilmadi: {sorted(missing)}')
+
+        report = repair_questions(
+            test_ids=test_ids,
+            chunk_size=options['chunk_size'],
+            workers=max(1, options['workers']),
+            dry_run=dry_run,
+        )
+        if options['report'] == '-':
+            self.stdout.write(json.dumps(report.as_dict(), cls=DjangoJSONEncoder, ensure_ascii=False, indent=2))
+            return
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as fh:
+                json.dump(report.as_dict(), fh, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2)
+
+        titles = dict(MockTest.objects.filter(
+            pk__in={item['test_id'] for item in report.changes},
+        ).values_list('pk', 'title'))
+        for item in report.changes:
+            where = f"  #{item['question_id']} ({titles.get(item['test_id'], '?')} — order {item['order']})"
+            if 'instruction' in item['fixes']:
+                self.stdout.write(f'{where}: ko\'rsatma tuzatildi')
+            if 'points' in item['fixes']:
+                points = item['changes']['points']
+                self.stdout.write(f"{where}: ball {points['before']} → {points['after']}")
 
         verb = 'topildi (dry-run)' if dry_run else 'tuzatildi'
         self.stdout.write(self.style.SUCCESS(
-            f'Ko\'rsatma: {instr_fixed} ta {verb}. Ball: {points_fixed} ta {verb}.'
+            f"Ko'rsatma: {report.fixed('instruction')} ta {verb}. "
+            f"Ball: {report.fixed('points')} ta {verb}. "
+            f"({report.scanned} savol, {report.seconds:.1f} s)"
         ))
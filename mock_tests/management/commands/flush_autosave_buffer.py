@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mock_tests.services.autosave_buffer import buffer_seconds, flush_autosave_buffer
+
+
+class Command(BaseCommand):
+    help = "Avtosaqlash buferidagi javoblarni bazaga partiyalab yozish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="To'xtatilguncha har --interval soniyada takrorlash",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Takrorlash oralig\'i (standart: MOCK_AUTOSAVE_BUFFER_SECONDS)',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or buffer_seconds() or 15
+        batch_size = max(1, options['batch_size'])
+        while True:
+            started = time.perf_counter()
+            flushed = flush_autosave_buffer(batch_size=batch_size)
+            seconds = time.perf_counter() - started
+            if flushed or not options['loop']:
+                self.stdout.write(f'Avtosaqlash buferi: {flushed} ta urinish yozildi ({seconds * 1000:.0f} ms).')
+            if not options['loop']:
+                return
+            time.sleep(max(0.0, interval - seconds))
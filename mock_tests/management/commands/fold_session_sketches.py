@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mock_tests.services.rollups import FOLD_BATCH_SIZE, fold_session_sketches
+
+
+class Command(BaseCommand):
+    help = "Buferdagi unikal sessiya (HLL) yangilanishlarini kunlik yig'maga qo'shish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="To'xtatilguncha har --interval soniyada takrorlash",
+        )
+        parser.add_argument('--interval', type=float, default=60.0, help="Takrorlash oralig'i (soniya)")
+        parser.add_argument('--batch-size', type=int, default=FOLD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        while True:
+            started = time.perf_counter()
+            folded = fold_session_sketches(batch_size=batch_size)
+            seconds = time.perf_counter() - started
+            if folded or not options['loop']:
+                self.stdout.write(f"Eskiz buferi: {folded} ta yangilanish qo'shildi ({seconds * 1000:.0f} ms).")
+            if not options['loop']:
+                return
+            time.sleep(max(0.0, options['interval'] - seconds))
@@ -0,0 +1,98 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mock_tests.models import MockTest
+from mock_tests.services.batch_grading import NUMPY_AVAILABLE, compile_batch_key, grade_sheets
+
+OUTPUT_FIELDS = (
+    'student',
+    'correct_count',
+    'total_questions',
+    'earned_points',
+    'total_points',
+    'score_percent',
+    'ielts_band',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Qog'oz javob varaqlarini (CSV) paket baholash. Sarlavha: talaba ustuni + "
+        "dock raqamlari (1, 2, … 40)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('test_id', type=int, help='MockTest ID')
+        parser.add_argument('csv_path', type=str, help="Javoblar CSV fayli ('-' — stdin)")
+        parser.add_argument(
+            '--id-column',
+            default='student',
+            help="Talaba identifikatori ustuni (default: student)",
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help="Natija CSV fayli (berilmasa — stdout)",
+        )
+        parser.add_argument(
+            '--no-numpy',
+            action='store_true',
+            help="NumPy bo'lsa ham oddiy Python yo'lidan foydalanish",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            test = MockTest.objects.get(pk=options['test_id'])
+        except MockTest.DoesNotExist as exc:
+            raise CommandError(f'Test topilmadi: {options["test_id"]}') from exc
+
+        key = compile_batch_key(test, test.questions.all())
+        id_column = options['id_column']
+
+        path = options['csv_path']
+        try:
+            handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(f"Faylni o'qib bo'lmadi: {exc}") from exc
+        with handle:
+            reader = csv.DictReader(handle)
+            if not reader.fieldnames or id_column not in reader.fieldnames:
+                raise CommandError(f"CSV da '{id_column}' ustuni yo'q.")
+            known = set(key.numbers)
+            unknown = [c for c in reader.fieldnames if c != id_column and c.strip() not in known]
+            if unknown:
+                self.stderr.write(f"Testda yo'q ustunlar e'tiborsiz qoldirildi: {', '.join(unknown)}")
+            sheets = [
+                (row.get(id_column) or f'#{n}', {k: v for k, v in row.items() if k != id_column})
+                for n, row in enumerate(reader, start=1)
+            ]
+
+        started = time.perf_counter()
+        results = grade_sheets(key, sheets, use_numpy=not options['no_numpy'])
+        seconds = time.perf_counter() - started
+
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else None
+        try:
+            writer = csv.writer(out or self.stdout)
+            writer.writerow(OUTPUT_FIELDS)
+            for r in results:
+                writer.writerow([
+                    r.student,
+                    r.correct_count,
+                    r.total_questions,
+                    r.earned_points,
+                    r.total_points,
+                    r.score_percent,
+                    '' if r.ielts_band is None else r.ielts_band,
+                ])
+        finally:
+            if out:
+                out.close()
+
+        engine = 'NumPy' if NUMPY_AVAILABLE and not options['no_numpy'] else 'Python'
+        self.stderr.write(self.style.SUCCESS(
+            f'{len(results)} ta varaq baholandi ({engine}, {seconds * 1000:.1f} ms).'
+        ))
@@ -0,0 +1,72 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from mock_tests.models import MockTest
+from mock_tests.services.question_lint import DEFAULT_CHUNK_SIZE, lint_question_bank, render_html_report
+
+
+class Command(BaseCommand):
+    help = "Savol bankidagi javob kalitlarini tekshirish (JSON/HTML hisobot, admin sog'lik belgisi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--test-id',
+            type=int,
+            action='append',
+            default=None,
+            help='Faqat shu test ID (bir necha marta berish mumkin)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Bir bo'lakdagi testlar soni",
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Tekshirish uchun jarayonlar soni',
+        )
+        parser.add_argument('--format', choices=['json', 'html'], default='json')
+        parser.add_argument('--output', '-o', default=None, help="Hisobot fayli ('-' — stdout)")
+        parser.add_argument(
+            '--fail-on-error',
+            action='store_true',
+            help="Xato topilsa nol bo'lmagan kod bilan chiqish (CI uchun)",
+        )
+
+    def handle(self, *args, **options):
+        test_ids = options.get('test_id')
+        if test_ids:
+            missing = set(test_ids) - set(MockTest.objects.filter(pk__in=test_ids).values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f'Test topilmadi: {sorted(missing)}')
+
+        report = lint_question_bank(
+            test_ids=test_ids,
+            chunk_size=options['chunk_size'],
+            workers=max(1, options['workers']),
+        )
+        data = report.as_dict()
+        if options['format'] == 'html':
+            content = render_html_report(report)
+        else:
+            content = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(content)
+        elif options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(content)
+
+        summary = (
+            f"{data['scanned_tests']} test, {data['scanned_questions']} savol: "
+            f"{data['errors']} xato, {data['warnings']} ogohlantirish ({data['seconds']:.1f} s)."
+        )
+        if options['fail_on_error'] and data['errors']:
+            raise CommandError(summary)
+        style = self.style.WARNING if data['errors'] else self.style.SUCCESS
+        (self.stderr if options['output'] == '-' else self.stdout).write(style(summary))
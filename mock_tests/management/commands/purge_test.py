@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mock_tests.models import MockTest
+from mock_tests.services.purge import DEFAULT_BATCH_SIZE, purge_test
+
+
+class Command(BaseCommand):
+    help = "Testni urinishlari bilan tez o'chirish (urinishlar partiyalab, xotiraga yuklanmaydi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('test_ids', nargs='+', type=int)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--keep-test',
+            action='store_true',
+            help="Faqat urinishlar va statistikani o'chirish, test qoladi",
+        )
+
+    def handle(self, *args, **options):
+        test_ids = options['test_ids']
+        missing = set(test_ids) - set(MockTest.objects.filter(pk__in=test_ids).values_list('pk', flat=True))
+        if missing:
+            raise CommandError(f'Test topilmadi: {sorted(missing)}')
+
+        for test_id in test_ids:
+            def progress(deleted, total, test_id=test_id):
+                if options['verbosity'] > 1 or deleted == total:
+                    self.stdout.write(f'  #{test_id}: {deleted}/{total} ta urinish')
+
+            deleted = purge_test(
+                test_id,
+                batch_size=max(1, options['batch_size']),
+                keep_test=options['keep_test'],
+                progress=progress,
+            )
+            what = "urinishlari o'chirildi" if options['keep_test'] else "o'chirildi"
+            self.stdout.write(self.style.SUCCESS(f'Test #{test_id} {what}: {deleted} ta urinish.'))
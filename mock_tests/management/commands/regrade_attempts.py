@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mock_tests.models import MockTest
+from mock_tests.services.regrade import DEFAULT_CHUNK_SIZE, regrade_test_attempts
+
+
+class Command(BaseCommand):
+    help = "Javob kaliti o'zgargandan keyin tugallangan urinishlarni qayta baholash"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--test-id',
+            type=int,
+            action='append',
+            default=None,
+            help='Faqat shu test ID (bir necha marta berish mumkin)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Bir partiyadagi urinishlar soni (o'qish va bulk_update)",
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Baholash uchun jarayonlar soni',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Faqat hisoblash, bazaga yozmaslik",
+        )
+
+    def handle(self, *args, **options):
+        tests = MockTest.objects.order_by('pk')
+        if options.get('test_id'):
+            tests = tests.filter(pk__in=options['test_id'])
+            missing = set(options['test_id']) - set(tests.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f'Test topilmadi: {sorted(missing)}')
+
+        def progress(stats, total):
+            self.stdout.write(
+                f'  {stats.scanned}/{total} ko\'rildi, {stats.changed} ta o\'zgardi '
+                f'({stats.per_second:.0f} urinish/s)'
+            )
+
+        scanned = 0
+        changed = 0
+        for test in tests:
+            self.stdout.write(f'Test #{test.pk}: {test.title}')
+            stats = regrade_test_attempts(
+                test,
+                chunk_size=options['chunk_size'],
+                workers=max(1, options['workers']),
+                dry_run=options['dry_run'],
+                progress=progress,
+            )
+            scanned += stats.scanned
+            changed += stats.changed
+
+        verb = "o'zgaradi (dry-run)" if options['dry_run'] else 'yangilandi'
+        self.stdout.write(self.style.SUCCESS(
+            f'Qayta baholash: {scanned} ta urinish ko\'rildi, {changed} ta {verb}.'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from mock_tests.services.test_counters import repair_test_counters
+
+
+class Command(BaseCommand):
+    help = "MockTest hisoblagichlarini (slot, ball, passage, savol soni) qayta hisoblash"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--test-id',
+            type=int,
+            action='append',
+            default=None,
+            help='Faqat shu test ID (bir necha marta berish mumkin)',
+        )
+
+    def handle(self, *args, **options):
+        scanned, fixed = repair_test_counters(options.get('test_id'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Hisoblagichlar: {scanned} ta test tekshirildi, {fixed} ta tuzatildi.'
+        ))
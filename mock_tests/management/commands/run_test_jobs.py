@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mock_tests.services.jobs import HANDLERS, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Admin navbatidagi fon ishlarini (o'chirish va h.k.) bajarish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            choices=sorted(HANDLERS),
+            default=None,
+            help='Faqat shu turdagi ishlar (bir necha marta berish mumkin)',
+        )
+        parser.add_argument('--limit', type=int, default=None, help='Ko\'pi bilan N ta ish')
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="To'xtatilguncha har --interval soniyada navbatni tekshirish",
+        )
+        parser.add_argument('--interval', type=float, default=30.0, help="Takrorlash oralig'i (soniya)")
+
+    def handle(self, *args, **options):
+        while True:
+            for job in run_pending_jobs(kinds=options['kind'], limit=options['limit']):
+                line = f'{job.kind} #{job.test_pk}: {job.state} ({job.done} ta)'
+                if job.error:
+                    self.stderr.write(self.style.ERROR(f'{line} — {job.error}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(line))
+            if not options['loop']:
+                return
+            time.sleep(max(0.0, options['interval']))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from mock_tests.models import MockTest, MockPassage, MockQuestion
+from mock_tests.services.test_counters import refresh_test_counters
 
 
 class Command(BaseCommand):
@@ -104,4 +105,8 @@ Despite challenges, many cities now include urban agriculture in their sustainab
                 f'Listening demo: /courses/tests/{listening.pk}/ — admin orqali audio fayl yuklang!'
             ))
 
+        # bulk_create signal yubormaydi
+        for test in (writing, reading, listening):
+            if test:
+                refresh_test_counters(test)
         self.stdout.write(self.style.SUCCESS('Phase 2 demo testlar tayyor'))
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0009_mcq_extended'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mockquestion',
+            name='answer_variants_json',
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text='Normallashtirilgan javob variantlari indeksi (saqlashda avtomatik)',
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0010_mockquestion_answer_variants_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mockattempt',
+            name='result_snapshot',
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text='Natija sahifasi uchun saqlangan baholash natijasi (kalit versiyasi bilan)',
+            ),
+        ),
+    ]
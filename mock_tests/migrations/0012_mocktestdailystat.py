@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0011_mockattempt_result_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MockTestDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('started_count', models.IntegerField(default=0)),
+                ('finished_count', models.IntegerField(default=0)),
+                ('score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('score_count', models.IntegerField(default=0)),
+                ('band_sum', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('band_count', models.IntegerField(default=0)),
+                ('dur_lt_10', models.IntegerField(default=0)),
+                ('dur_10_20', models.IntegerField(default=0)),
+                ('dur_20_30', models.IntegerField(default=0)),
+                ('dur_30_45', models.IntegerField(default=0)),
+                ('dur_45_60', models.IntegerField(default=0)),
+                ('dur_60_plus', models.IntegerField(default=0)),
+                ('test', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='daily_stats',
+                    to='mock_tests.mocktest',
+                    verbose_name='Test',
+                )),
+            ],
+            options={
+                'verbose_name': 'Kunlik statistika',
+                'verbose_name_plural': 'Kunlik statistika',
+                'ordering': ['-day'],
+                'constraints': [
+                    models.UniqueConstraint(fields=('test', 'day'), name='mock_daily_stat_test_day'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0012_mocktestdailystat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktestdailystat',
+            name='session_hll',
+            field=models.BinaryField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='mocktestdailystat',
+            name='finished_session_hll',
+            field=models.BinaryField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0013_mocktestdailystat_session_hll'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mockattempt',
+            name='answers_version',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, help_text='Avtosaqlashda mijoz yuborgan oxirgi versiya'
+            ),
+        ),
+    ]
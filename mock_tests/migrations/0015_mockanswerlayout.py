@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0014_mockattempt_answers_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MockAnswerLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=16, unique=True)),
+                ('positions', models.JSONField(help_text='[[savol_id, blank_kaliti], ...]')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('test', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='answer_layouts',
+                    to='mock_tests.mocktest',
+                    verbose_name='Test',
+                )),
+            ],
+            options={
+                'verbose_name': 'Javoblar tartibi',
+                'verbose_name_plural': 'Javoblar tartiblari',
+            },
+        ),
+    ]
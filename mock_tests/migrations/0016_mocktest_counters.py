@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+COUNTER_FIELDS = ('gradable_slots', 'total_points', 'passage_count', 'question_count')
+
+
+class Migration(migrations.Migration):
+    """Mavjud testlarda hisoblagichlar NULL qoladi va birinchi o'qishda (yoki
+    ``repair_test_counters`` bilan) hisoblanadi; yangi testlar 0 dan boshlanadi."""
+
+    dependencies = [
+        ('mock_tests', '0015_mockanswerlayout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktest',
+            name=name,
+            field=models.PositiveIntegerField(editable=False, null=True),
+        )
+        for name in COUNTER_FIELDS
+    ] + [
+        migrations.AlterField(
+            model_name='mocktest',
+            name=name,
+            field=models.PositiveIntegerField(default=0, editable=False, null=True),
+        )
+        for name in COUNTER_FIELDS
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0016_mocktest_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktest',
+            name='max_daily_attempts',
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                help_text="Bir sessiya uchun kunlik chegara; bo'sh — umumiy sozlama, 0 — cheklanmagan",
+                null=True,
+                verbose_name='Kunlik urinishlar',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='mockattempt',
+            index=models.Index(
+                fields=['session_key', 'test', 'finished_at'], name='mock_attempt_daily_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0017_daily_attempt_limit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MockAttemptArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(db_index=True, help_text="Oyning birinchi kuni (started_at bo'yicha)")),
+                ('file_path', models.CharField(max_length=500)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('detached_partition', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Urinishlar arxivi',
+                'verbose_name_plural': 'Urinishlar arxivi',
+                'ordering': ['-month'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0018_mockattemptarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MockSessionSketchDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('finished', models.BooleanField(default=False)),
+                ('register', models.PositiveSmallIntegerField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('test', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='+', to='mock_tests.mocktest',
+                )),
+            ],
+            options={
+                'verbose_name': 'Eskiz yangilanishi',
+                'verbose_name_plural': 'Eskiz yangilanishlari',
+            },
+        ),
+    ]
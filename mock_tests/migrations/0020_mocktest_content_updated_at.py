@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0019_mocksessionsketchdelta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktest',
+            name='content_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0020_mocktest_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MockTestJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(help_text='services/jobs.py dagi ish turi', max_length=20)),
+                ('test_pk', models.PositiveIntegerField(db_index=True)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('state', models.CharField(
+                    choices=[
+                        ('pending', 'Navbatda'),
+                        ('running', 'Bajarilmoqda'),
+                        ('done', 'Tugadi'),
+                        ('failed', 'Xato'),
+                    ],
+                    db_index=True, default='pending', max_length=10,
+                )),
+                ('done', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Fon ishi',
+                'verbose_name_plural': 'Fon ishlari',
+                'ordering': ['-pk'],
+            },
+        ),
+    ]
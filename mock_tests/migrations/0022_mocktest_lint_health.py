@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0021_mocktestjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktest',
+            name='lint_errors',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='mocktest',
+            name='lint_warnings',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='mocktest',
+            name='lint_stamp',
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+    ]
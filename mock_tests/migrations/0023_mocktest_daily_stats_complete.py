@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_tests', '0022_mocktest_lint_health'),
+    ]
+
+    operations = [
+        # Mavjud testlar — yig'madan oldingi tarix bo'lishi mumkin (False);
+        # bundan keyin yaratilganlar boshidan to'liq (True).
+        migrations.AddField(
+            model_name='mocktest',
+            name='daily_stats_complete',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='mocktest',
+            name='daily_stats_complete',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+    ]
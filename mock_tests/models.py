@@ -40,6 +40,26 @@ class MockTest(models.Model):
         upload_to='mock_tests/audio/', blank=True, null=True, verbose_name='Audio (Listening)'
     )
     is_active = models.BooleanField(default=True, verbose_name='Faol')
+    max_daily_attempts = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Kunlik urinishlar',
+        help_text="Bir sessiya uchun kunlik chegara; bo'sh — umumiy sozlama, 0 — cheklanmagan",
+    )
+    # Denormallashtirilgan hisoblagichlar (services/test_counters.py); None — hali hisoblanmagan
+    gradable_slots = models.PositiveIntegerField(null=True, default=0, editable=False)
+    total_points = models.PositiveIntegerField(null=True, default=0, editable=False)
+    passage_count = models.PositiveIntegerField(null=True, default=0, editable=False)
+    question_count = models.PositiveIntegerField(null=True, default=0, editable=False)
+    # Kontent versiyasi (services/render_cache.py): test/passage/savol o'zgarganda yangilanadi
+    content_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Javob kalitlari linteri xulosasi (services/question_lint.py); lint_stamp — qaysi versiya uchun
+    lint_errors = models.PositiveIntegerField(null=True, editable=False)
+    lint_warnings = models.PositiveIntegerField(null=True, editable=False)
+    lint_stamp = models.CharField(max_length=40, blank=True, editable=False)
+    # Kunlik yig'ma (MockTestDailyStat) butun tarixni qamraydimi; eski testlar
+    # uchun backfill_daily_stats (rebuild_daily_stats) ishlagach True bo'ladi
+    daily_stats_complete = models.BooleanField(default=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -53,7 +73,10 @@ class MockTest(models.Model):
 
     @property
     def total_questions(self):
-        return sum(q.gradable_slot_count() for q in self.questions.all())
+        from mock_tests.services.test_counters import ensure_test_counters
+
+        ensure_test_counters(self)
+        return self.gradable_slots
 
     def get_absolute_url(self):
         return reverse('mock_tests:test_detail', kwargs={'pk': self.pk})
@@ -141,6 +164,10 @@ class MockQuestion(models.Model):
         verbose_name='Rasm',
         help_text='Listening: xarita/jadval — birinchi savolga yuklang, butun blokda ko\'rinadi (JPG/PNG, max 5 MB)',
     )
+    answer_variants_json = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text='Normallashtirilgan javob variantlari indeksi (saqlashda avtomatik)',
+    )
 
     class Meta:
         ordering = ['order', 'pk']
@@ -150,6 +177,15 @@ class MockQuestion(models.Model):
     def __str__(self):
         return f'{self.test.title} — #{self.order}'
 
+    def save(self, *args, **kwargs):
+        from mock_tests.services.variant_index import refresh_variant_index
+
+        if refresh_variant_index(self):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'answer_variants_json'}
+        super().save(*args, **kwargs)
+
     def get_result_type_label(self):
         """Natija sahifasida ko'rsatiladigan qisqa tur nomi."""
         labels = {
@@ -336,9 +372,9 @@ class MockQuestion(models.Model):
         return segments
 
     def gradable_slot_count(self):
-        from mock_tests.services.slots import gradable_slot_count as _slot_count
+        from mock_tests.services.grading_plan import get_question_plan
 
-        return _slot_count(self)
+        return get_question_plan(self).slot_count
 
     def uses_bracket_blanks(self):
         """Matnda [7], [8] kabi inline bo'sh joylar bormi (summary_box dan tashqari)."""
@@ -468,6 +504,9 @@ class MockAttempt(models.Model):
         MockTest, on_delete=models.CASCADE, related_name='attempts', verbose_name='Test'
     )
     answers_json = models.JSONField(default=dict, blank=True)
+    answers_version = models.PositiveIntegerField(
+        default=0, editable=False, help_text="Avtosaqlashda mijoz yuborgan oxirgi versiya"
+    )
     score_percent = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     correct_count = models.PositiveIntegerField(default=0)
     total_questions = models.PositiveIntegerField(default=0)
@@ -477,11 +516,172 @@ class MockAttempt(models.Model):
     ielts_band = models.DecimalField(
         max_digits=3, decimal_places=1, null=True, blank=True, verbose_name='IELTS band'
     )
+    result_snapshot = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Natija sahifasi uchun saqlangan baholash natijasi (kalit versiyasi bilan)',
+    )
 
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            models.Index(
+                fields=['session_key', 'test', 'finished_at'], name='mock_attempt_daily_idx',
+            ),
+        ]
         verbose_name = 'Test urinishi'
         verbose_name_plural = 'Test urinishlari'
 
     def __str__(self):
         return f'{self.test.title} — {self.session_key[:8]}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        from mock_tests.services.rollups import attempt_rollup_state
+
+        instance._rollup_state = attempt_rollup_state(instance)
+        return instance
+
+    def save(self, *args, **kwargs):
+        from mock_tests.services.attempt_limiter import record_attempt_change as record_daily_attempt
+        from mock_tests.services.rollups import attempt_rollup_state, record_attempt_change
+
+        created = self._state.adding
+        old_state = getattr(self, '_rollup_state', None)
+        super().save(*args, **kwargs)
+        record_attempt_change(old_state, self, created=created)
+        record_daily_attempt(old_state, self)
+        self._rollup_state = attempt_rollup_state(self)
+
+
+class MockTestDailyStat(models.Model):
+    """Test × kun bo'yicha yig'ma statistika (dashboard uchun)."""
+
+    test = models.ForeignKey(
+        MockTest, on_delete=models.CASCADE, related_name='daily_stats', verbose_name='Test'
+    )
+    day = models.DateField(db_index=True)
+    started_count = models.IntegerField(default=0)
+    finished_count = models.IntegerField(default=0)
+    score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    score_count = models.IntegerField(default=0)
+    band_sum = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    band_count = models.IntegerField(default=0)
+    dur_lt_10 = models.IntegerField(default=0)
+    dur_10_20 = models.IntegerField(default=0)
+    dur_20_30 = models.IntegerField(default=0)
+    dur_30_45 = models.IntegerField(default=0)
+    dur_45_60 = models.IntegerField(default=0)
+    dur_60_plus = models.IntegerField(default=0)
+    # HyperLogLog eskizlari (services/hll.py): boshlagan va tugatgan sessiyalar
+    session_hll = models.BinaryField(null=True, blank=True, editable=False)
+    finished_session_hll = models.BinaryField(null=True, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name = 'Kunlik statistika'
+        verbose_name_plural = 'Kunlik statistika'
+        constraints = [
+            models.UniqueConstraint(fields=['test', 'day'], name='mock_daily_stat_test_day'),
+        ]
+
+    def __str__(self):
+        return f'{self.test_id} — {self.day}'
+
+
+class MockSessionSketchDelta(models.Model):
+    """HLL eskizi uchun buferlangan registr yangilanishi (faqat INSERT).
+
+    Urinish boshlanganda/tugaganda kun qatori qulflanmaydi — yangilanish shu
+    jadvalga yoziladi, ``fold_session_sketches`` esa uni eskizga qo'shadi.
+    """
+
+    test = models.ForeignKey(MockTest, on_delete=models.CASCADE, related_name='+')
+    day = models.DateField()
+    finished = models.BooleanField(default=False)
+    register = models.PositiveSmallIntegerField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = 'Eskiz yangilanishi'
+        verbose_name_plural = 'Eskiz yangilanishlari'
+
+    def __str__(self):
+        return f'{self.test_id} — {self.day} [{self.register}]={self.rank}'
+
+
+class MockAnswerLayout(models.Model):
+    """Ixcham ``answers_json`` uchun slot tartibi (digest bo'yicha, o'zgarmas)."""
+
+    test = models.ForeignKey(
+        MockTest, on_delete=models.CASCADE, related_name='answer_layouts', verbose_name='Test'
+    )
+    digest = models.CharField(max_length=16, unique=True)
+    positions = models.JSONField(help_text='[[savol_id, blank_kaliti], ...]')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Javoblar tartibi'
+        verbose_name_plural = 'Javoblar tartiblari'
+
+    def __str__(self):
+        return f'{self.test_id} — {self.digest}'
+
+
+class MockAttemptArchive(models.Model):
+    """Sovuq arxivga (gzip JSONL) ko'chirilgan oy — ``archive_attempts`` buyrug'i yozadi."""
+
+    month = models.DateField(db_index=True, help_text="Oyning birinchi kuni (started_at bo'yicha)")
+    file_path = models.CharField(max_length=500)
+    row_count = models.PositiveIntegerField(default=0)
+    detached_partition = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-month']
+        verbose_name = 'Urinishlar arxivi'
+        verbose_name_plural = 'Urinishlar arxivi'
+
+    def __str__(self):
+        return f'{self.month:%Y-%m} — {self.row_count}'
+
+
+class MockTestJob(models.Model):
+    """Admin amallari navbati (masalan, testni o'chirish) — ``run_test_jobs`` bajaradi.
+
+    Og'ir ish web worker oqimida emas, alohida jarayonda bajariladi; holat va
+    jarayon shu qatorda — istalgan worker o'qiy oladi.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATES = [
+        (PENDING, 'Navbatda'),
+        (RUNNING, 'Bajarilmoqda'),
+        (DONE, 'Tugadi'),
+        (FAILED, 'Xato'),
+    ]
+
+    kind = models.CharField(max_length=20, help_text='services/jobs.py dagi ish turi')
+    # Test o'chirilgandan keyin ham holat qolishi uchun FK emas
+    test_pk = models.PositiveIntegerField(db_index=True)
+    options = models.JSONField(default=dict, blank=True)
+    state = models.CharField(max_length=10, choices=STATES, default=PENDING, db_index=True)
+    done = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-pk']
+        verbose_name = 'Fon ishi'
+        verbose_name_plural = 'Fon ishlari'
+
+    def __str__(self):
+        return f'{self.kind} #{self.test_pk} — {self.state}'
@@ -0,0 +1,166 @@
+"""``MockAttempt.answers_json`` uchun ixcham, versiyali kodlash.
+
+Oddiy shakl: ``{"<savol_id>": "javob" | {"<blank>": "javob", ...}}``. Ixcham
+shakl (``ENCODING_VERSION = 1``)::
+
+    {"_enc": 1, "l": "<layout digest>", "s": [...], "x": {...}}
+
+* ``s`` — testning slot tartibiga (``MockAnswerLayout.positions``) mos qiymatlar
+  ro'yxati; ``None`` — javob yo'q, oxiridagi ``None`` lar kesiladi;
+* uzun matn (esse) ``{"z": base64(zlib)}`` ko'rinishida, faqat qisqarsa;
+* ``x`` — tartibga tushmagan qiymatlar (noma'lum savol/blank, boshqa turdagi
+  qiymat) o'zgarishsiz — kodlash yo'qotishsiz.
+
+Tartib digest bo'yicha bir marta yoziladi va o'zgarmaydi, shuning uchun test
+keyin tahrirlansa ham eski qatorlar o'qiladi. Faqat tugallangan urinishlar
+kodlanadi — davom etayotganlari delta avtosaqlash uchun oddiy shaklda qoladi.
+"""
+import base64
+import hashlib
+import json
+import zlib
+
+from django.db import transaction
+
+from .grading_plan import _LRU, get_question_plan
+
+ENCODING_VERSION = 1
+COMPRESS_MIN_CHARS = 400
+LAYOUT_CACHE_SIZE = 512
+
+_layout_cache = _LRU(LAYOUT_CACHE_SIZE)
+
+
+def is_compact(data):
+    return isinstance(data, dict) and '_enc' in data
+
+
+def answer_positions(questions):
+    """Savollar -> ``((savol_id, blank_kaliti), ...)``; butun qiymatli savolda kalit ''."""
+    positions = []
+    for q in sorted(questions, key=lambda x: (x.order, x.pk)):
+        slots = get_question_plan(q).slots
+        if slots and all(slot.kind in ('blank', 'matching') for slot in slots):
+            positions.extend((str(q.pk), str(slot.key)) for slot in slots)
+        else:
+            positions.append((str(q.pk), ''))
+    return tuple(positions)
+
+
+def _layout_digest(positions):
+    payload = json.dumps(positions, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def register_layout(test, questions):
+    """Test uchun joriy tartib (kerak bo'lsa bazaga yoziladi) -> (digest, positions)."""
+    from mock_tests.models import MockAnswerLayout
+
+    positions = answer_positions(questions)
+    digest = _layout_digest(positions)
+    if _layout_cache.get(digest) is None:
+        MockAnswerLayout.objects.get_or_create(
+            digest=digest, defaults={'test': test, 'positions': [list(p) for p in positions]},
+        )
+        # Tranzaksiya bekor bo'lsa, keshda bazada yo'q tartib qolmasin.
+        transaction.on_commit(lambda: _layout_cache.put(digest, positions))
+    return digest, positions
+
+
+def _layout_positions(digest):
+    from mock_tests.models import MockAnswerLayout
+
+    positions = _layout_cache.get(digest)
+    if positions is None:
+        raw = MockAnswerLayout.objects.filter(digest=digest).values_list('positions', flat=True).first()
+        if raw is None:
+            raise ValueError(f'Javoblar tartibi topilmadi: {digest}')
+        positions = tuple((str(qid), str(key)) for qid, key in raw)
+        _layout_cache.put(digest, positions)
+    return positions
+
+
+def _pack_text(value):
+    if len(value) < COMPRESS_MIN_CHARS:
+        return value
+    packed = base64.b64encode(zlib.compress(value.encode('utf-8'), 9)).decode('ascii')
+    return {'z': packed} if len(packed) + 8 < len(json.dumps(value)) else value
+
+
+def _unpack_text(value):
+    if isinstance(value, dict):
+        return zlib.decompress(base64.b64decode(value['z'])).decode('utf-8')
+    return value
+
+
+def encode_answers(test, questions, answers):
+    """Oddiy javoblar lug'ati -> ixcham shakl (allaqachon ixcham bo'lsa — o'zi)."""
+    if is_compact(answers):
+        return answers
+    answers = answers or {}
+    digest, positions = register_layout(test, questions)
+    keyed = {}
+    whole = set()
+    for qid, key in positions:
+        if key:
+            keyed.setdefault(qid, set()).add(key)
+        else:
+            whole.add(qid)
+
+    index = {pos: i for i, pos in enumerate(positions)}
+    values = [None] * len(positions)
+    extra = {}
+    for qid, value in answers.items():
+        qid = str(qid)
+        if qid in whole and isinstance(value, str):
+            values[index[(qid, '')]] = _pack_text(value)
+        elif qid in keyed and isinstance(value, dict):
+            leftover = {}
+            for key, item in value.items():
+                if key in keyed[qid] and isinstance(item, str):
+                    values[index[(qid, key)]] = _pack_text(item)
+                else:
+                    leftover[key] = item
+            if leftover or not value:
+                extra[qid] = leftover
+        else:
+            extra[qid] = value
+
+    while values and values[-1] is None:
+        values.pop()
+    data = {'_enc': ENCODING_VERSION, 'l': digest, 's': values}
+    if extra:
+        data['x'] = extra
+    return data
+
+
+def decode_answers(data):
+    """Ixcham yoki oddiy shakl -> oddiy javoblar lug'ati."""
+    if not is_compact(data):
+        return data or {}
+    if data['_enc'] != ENCODING_VERSION:
+        raise ValueError(f"Noma'lum answers_json kodlash versiyasi: {data['_enc']}")
+    positions = _layout_positions(data['l'])
+    answers = {}
+    for (qid, key), value in zip(positions, data.get('s') or ()):
+        if value is None:
+            continue
+        value = _unpack_text(value)
+        if key:
+            answers.setdefault(qid, {})[key] = value
+        else:
+            answers[qid] = value
+    for qid, value in (data.get('x') or {}).items():
+        if isinstance(value, dict) and isinstance(answers.get(qid), dict):
+            answers[qid].update(value)
+        else:
+            answers[qid] = value
+    return answers
+
+
+def read_answers(attempt):
+    return decode_answers(attempt.answers_json)
+
+
+def clear_layout_cache():
+    _layout_cache.clear()
@@ -1,68 +1,203 @@
 """IELTS-style javob normalizatsiyasi va solishtirish."""
 import re
+import unicodedata
 
-NUMBER_WORDS = {
-    'zero': '0', 'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5',
-    'six': '6', 'seven': '7', 'eight': '8', 'nine': '9', 'ten': '10',
-    'eleven': '11', 'twelve': '12', 'thirteen': '13', 'fourteen': '14',
-    'fifteen': '15', 'sixteen': '16', 'seventeen': '17', 'eighteen': '18',
-    'nineteen': '19', 'twenty': '20', 'thirty': '30', 'forty': '40', 'fifty': '50',
-}
+DEFAULT_FUZZY_DISTANCE = 1
+MAX_FUZZY_DISTANCE = 3
+FUZZY_MIN_LENGTH = 4
+
+UNIT_WORDS = (
+    'zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine',
+    'ten', 'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen',
+    'seventeen', 'eighteen', 'nineteen',
+)
+TENS_WORDS = ('twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety')
+
+NUMBER_WORDS = {word: str(i) for i, word in enumerate(UNIT_WORDS)}
+NUMBER_WORDS.update({word: str(20 + i * 10) for i, word in enumerate(TENS_WORDS)})
 
 WORD_NUMBERS = {v: k for k, v in NUMBER_WORDS.items()}
 
+# "second" ataylab yo'q — vaqt birligi bilan chalkashadi.
+ORDINAL_WORDS = {
+    'first': 1, 'third': 3, 'fourth': 4, 'fifth': 5, 'sixth': 6, 'seventh': 7,
+    'eighth': 8, 'ninth': 9, 'tenth': 10, 'eleventh': 11, 'twelfth': 12,
+    'thirteenth': 13, 'fourteenth': 14, 'fifteenth': 15, 'sixteenth': 16,
+    'seventeenth': 17, 'eighteenth': 18, 'nineteenth': 19,
+    'twentieth': 20, 'thirtieth': 30, 'fortieth': 40, 'fiftieth': 50,
+    'sixtieth': 60, 'seventieth': 70, 'eightieth': 80, 'ninetieth': 90,
+}
+
+_SMALL_VALUES = {word: i for i, word in enumerate(UNIT_WORDS)}
+_SMALL_VALUES.update({w: v for w, v in ORDINAL_WORDS.items() if v < 20})
+_TENS_VALUES = {word: 20 + i * 10 for i, word in enumerate(TENS_WORDS)}
+_TENS_VALUES.update({w: v for w, v in ORDINAL_WORDS.items() if v >= 20})
+_NUMBER_LEXICON = frozenset(_SMALL_VALUES) | frozenset(_TENS_VALUES) | {'hundred', 'thousand', 'and'}
+
+ARTICLES = frozenset({'a', 'an', 'the'})
+
+_FOLD_TABLE = str.maketrans({
+    '\u2018': "'", '\u2019': "'", '\u201a': "'", '\u201b': "'", '\u2032': "'",
+    '`': "'", '\u00b4': "'",
+    '\u201c': '"', '\u201d': '"', '\u201e': '"', '\u2033': '"',
+    '\u2010': '-', '\u2011': '-', '\u2012': '-', '\u2013': '-', '\u2014': '-',
+    '\u2015': '-', '\u2212': '-',
+})
+
+# Bitta o'tish: o'nli nuqta saqlanadi, minglik vergul va boshqa tinish belgilari olib tashlanadi.
+_PUNCT_RE = re.compile(r"(\d)\.(?=\d)|[^\w\s'-]")
+_ORDINAL_DIGITS_RE = re.compile(r'^(\d+)(?:st|nd|rd|th)$')
+
+
+def _fold(value):
+    """NFKC, egri qo'shtirnoq/tire variantlari, kichik harf, bo'shliqlar."""
+    text = unicodedata.normalize('NFKC', str(value)).translate(_FOLD_TABLE).casefold()
+    return ' '.join(text.split())
+
 
 def normalize_text(value):
     if value is None:
         return ''
-    text = str(value).strip().lower()
-    text = re.sub(r'\s+', ' ', text)
-    return text
+    return _fold(value)
 
 
-def _strip_punctuation(text):
-    return re.sub(r"[^\w\s'-]", '', text)
-
-
-def _strip_articles(text):
-    return re.sub(r'^(?:a|an|the)\s+', '', text)
+def _punct_sub(match):
+    digit = match.group(1)
+    return f'{digit}.' if digit else ''
 
 
-def _words_to_digits(text):
-    out = text
-    for word, digit in sorted(NUMBER_WORDS.items(), key=lambda x: -len(x[0])):
-        out = re.sub(rf'\b{word}\b', digit, out)
+def _strip_punctuation(text):
+    return ' '.join(_PUNCT_RE.sub(_punct_sub, text).split())
+
+
+def _strip_leading_article(tokens):
+    if len(tokens) > 1 and tokens[0] in ARTICLES:
+        return tokens[1:]
+    return tokens
+
+
+def _below_hundred(tokens, i):
+    if i >= len(tokens):
+        return None
+    tok = tokens[i]
+    if tok in _TENS_VALUES:
+        value = _TENS_VALUES[tok]
+        if value % 10 == 0 and tok in TENS_WORDS and i + 1 < len(tokens):
+            nxt = _SMALL_VALUES.get(tokens[i + 1])
+            if nxt is not None and 1 <= nxt <= 9:
+                return value + nxt, i + 2
+        return value, i + 1
+    if tok in _SMALL_VALUES:
+        return _SMALL_VALUES[tok], i + 1
+    return None
+
+
+def _below_thousand(tokens, i):
+    parsed = _below_hundred(tokens, i)
+    if parsed is None:
+        return None
+    value, j = parsed
+    if 1 <= value <= 9 and j < len(tokens) and tokens[j] == 'hundred':
+        value *= 100
+        j += 1
+        k = j + 1 if j < len(tokens) and tokens[j] == 'and' else j
+        rest = _below_hundred(tokens, k)
+        if rest is not None:
+            value += rest[0]
+            j = rest[1]
+    return value, j
+
+
+def _parse_number(tokens, i):
+    """tokens[i:] dan so'z bilan yozilgan son: (qiymat, keyingi_indeks) yoki None."""
+    parsed = _below_thousand(tokens, i)
+    if parsed is None:
+        return None
+    value, j = parsed
+    if 1 <= value <= 999 and j < len(tokens) and tokens[j] == 'thousand':
+        value *= 1000
+        j += 1
+        k = j + 1 if j < len(tokens) and tokens[j] == 'and' else j
+        rest = _below_thousand(tokens, k)
+        if rest is not None:
+            value += rest[0]
+            j = rest[1]
+    return value, j
+
+
+def _number_to_words(value):
+    word = WORD_NUMBERS.get(str(value))
+    if word:
+        return word
+    if 20 < value < 100:
+        return f'{WORD_NUMBERS[str(value - value % 10)]}-{UNIT_WORDS[value % 10]}'
+    return None
+
+
+def _split_compound(tokens):
+    """twenty-five -> twenty five (faqat barcha qismlar son so'zi bo'lsa)."""
+    out = []
+    for tok in tokens:
+        if '-' in tok:
+            parts = [p for p in tok.split('-') if p]
+            if parts and all(p in _NUMBER_LEXICON for p in parts):
+                out.extend(parts)
+                continue
+        out.append(tok)
     return out
 
 
-def _digits_to_words(text):
-    out = text
-    for digit, word in WORD_NUMBERS.items():
-        out = re.sub(rf'\b{digit}\b', word, out)
-    return out
+def _digit_and_word_forms(tokens):
+    """Bitta o'tishda raqamli va so'zli tokenlar ro'yxati."""
+    tokens = _split_compound(tokens)
+    as_digits = []
+    as_words = []
+    i = 0
+    n = len(tokens)
+    while i < n:
+        tok = tokens[i]
+        if tok in _NUMBER_LEXICON and tok != 'and':
+            parsed = _parse_number(tokens, i)
+            if parsed is not None:
+                value, j = parsed
+                as_digits.append(str(value))
+                as_words.extend(tokens[i:j])
+                i = j
+                continue
+        ordinal = _ORDINAL_DIGITS_RE.match(tok)
+        if ordinal:
+            as_digits.append(str(int(ordinal.group(1))))
+            as_words.append(tok)
+        elif tok.isdigit():
+            as_digits.append(tok)
+            as_words.append(_number_to_words(int(tok)) or tok)
+        else:
+            as_digits.append(tok)
+            as_words.append(tok)
+        i += 1
+    return as_digits, as_words
 
 
 def expand_answer_variants(value):
-    """Bitta javobning mumkin variantlari (IELTS tolerantligi)."""
-    base = normalize_text(value)
+    """Bitta javobning mumkin variantlari (IELTS tolerantligi) — bitta chaqiruvda.
+
+    Asl, tinish belgisiz, artiklsiz, raqamli ("twenty-five" -> "25", "15th" -> "15",
+    "1,000" -> "1000") va so'zli ("9" -> "nine") shakllar qaytariladi.
+    """
+    if value is None:
+        return set()
+    base = _fold(value)
     if not base:
         return set()
 
     variants = {base}
-    clean = _strip_punctuation(base)
-    variants.add(clean)
-
-    no_article = _strip_articles(clean)
-    variants.add(no_article)
-
-    as_digits = _words_to_digits(clean)
-    variants.add(as_digits)
-    variants.add(_strip_articles(as_digits))
-
-    as_words = _digits_to_words(clean)
-    variants.add(as_words)
-    variants.add(_strip_articles(as_words))
-
+    tokens = [tok for tok in _strip_punctuation(base).split() if tok.strip("'-")]
+    if not tokens:
+        return variants
+    as_digits, as_words = _digit_and_word_forms(tokens)
+    for form in (tokens, as_digits, as_words):
+        variants.add(' '.join(form))
+        variants.add(' '.join(_strip_leading_article(form)))
     return {v for v in variants if v}
 
 
@@ -83,24 +218,116 @@ def levenshtein(a, b):
     return prev[-1]
 
 
-def fuzzy_equal(a, b, max_distance=1):
+def _within_one_edit(a, b):
+    """Bitta almashtirish/qo'shish/o'chirish — O(n), jadvalsiz."""
+    la, lb = len(a), len(b)
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+def within_edit_distance(a, b, max_distance=DEFAULT_FUZZY_DISTANCE):
+    """levenshtein(a, b) <= max_distance — faqat diagonal polosa, erta chiqish bilan."""
+    if a == b:
+        return True
+    if max_distance <= 0 or abs(len(a) - len(b)) > max_distance:
+        return False
+    if max_distance == 1:
+        return _within_one_edit(a, b)
+    if len(a) > len(b):
+        a, b = b, a
+    la, lb = len(a), len(b)
+    over = max_distance + 1
+    prev = [j if j <= max_distance else over for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        curr = [over] * (lb + 1)
+        curr[0] = i if i <= max_distance else over
+        row_min = curr[0]
+        ca = a[i - 1]
+        for j in range(max(1, i - max_distance), min(lb, i + max_distance) + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            value = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + cost)
+            curr[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return False
+        prev = curr
+    return prev[lb] <= max_distance
+
+
+def fuzzy_equal(a, b, max_distance=DEFAULT_FUZZY_DISTANCE):
     if not a or not b:
         return False
     if a == b:
         return True
     if abs(len(a) - len(b)) > max_distance:
         return False
-    if min(len(a), len(b)) < 4:
+    if min(len(a), len(b)) < FUZZY_MIN_LENGTH:
         return False
-    return levenshtein(a, b) <= max_distance
+    return within_edit_distance(a, b, max_distance)
 
 
-def match_text_answer(user_value, acceptable_values, allow_fuzzy=True):
-    """Foydalanuvchi matni qabul qilinadigan javoblar ro'yxatiga mos keladimi."""
+def fuzzy_match_any(user_variants, acceptable_variants, max_distance=DEFAULT_FUZZY_DISTANCE):
+    """Bitta javob variantlarini slotning barcha variantlari bilan bir o'tishda solishtirish.
+
+    Variantlar uzunlik bo'yicha guruhlanadi — faqat ±max_distance uzunlikdagilar tekshiriladi.
+    """
+    if max_distance <= 0:
+        return False
+    by_len = {}
+    for acc in acceptable_variants:
+        if len(acc) >= FUZZY_MIN_LENGTH:
+            by_len.setdefault(len(acc), []).append(acc)
+    if not by_len:
+        return False
+    for user in user_variants:
+        n = len(user)
+        if n < FUZZY_MIN_LENGTH:
+            continue
+        for length in range(n - max_distance, n + max_distance + 1):
+            for acc in by_len.get(length, ()):
+                if within_edit_distance(user, acc, max_distance):
+                    return True
+    return False
+
+
+def question_fuzzy_tolerance(question):
+    """options_json["fuzzy_tolerance"] — savol uchun ruxsat etilgan xato (0..3)."""
+    opts = question.options_json if isinstance(question.options_json, dict) else {}
+    try:
+        value = int(opts.get('fuzzy_tolerance', DEFAULT_FUZZY_DISTANCE))
+    except (TypeError, ValueError):
+        return DEFAULT_FUZZY_DISTANCE
+    return max(0, min(value, MAX_FUZZY_DISTANCE))
+
+
+def match_text_answer(
+    user_value,
+    acceptable_values,
+    allow_fuzzy=True,
+    acceptable_variants=None,
+    max_distance=DEFAULT_FUZZY_DISTANCE,
+):
+    """Foydalanuvchi matni qabul qilinadigan javoblar ro'yxatiga mos keladimi.
+
+    ``acceptable_variants`` — oldindan hisoblangan variantlar to'plami
+    (variant indeksi); berilsa aniq moslik bitta set tekshiruvi bo'ladi.
+    """
     user_variants = expand_answer_variants(user_value)
     if not user_variants:
         return False
 
+    if acceptable_variants is not None:
+        if not user_variants.isdisjoint(acceptable_variants):
+            return True
+        return allow_fuzzy and fuzzy_match_any(user_variants, acceptable_variants, max_distance)
+
     acceptable = []
     for item in acceptable_values or []:
         if item is None:
@@ -112,16 +339,13 @@ def match_text_answer(user_value, acceptable_values, allow_fuzzy=True):
     if not acceptable:
         return False
 
+    all_variants = set()
     for acc in acceptable:
         acc_variants = expand_answer_variants(acc)
         if user_variants & acc_variants:
             return True
-        if allow_fuzzy:
-            for u in user_variants:
-                for a in acc_variants:
-                    if fuzzy_equal(u, a):
-                        return True
-    return False
+        all_variants |= acc_variants
+    return allow_fuzzy and fuzzy_match_any(user_variants, all_variants, max_distance)
 
 
 def split_slot_acceptable(raw):
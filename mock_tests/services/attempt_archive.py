@@ -0,0 +1,129 @@
+"""Eski urinishlarni sovuq arxivga (oy bo'yicha gzip JSONL) ko'chirish.
+
+``started_at`` bo'yicha ``months`` oydan eski har bir to'liq oy alohida
+faylga oqim bilan yoziladi (``mock_attempts-YYYY-MM.jsonl.gz``, bir qator —
+bir urinish, javoblar oddiy shaklda). Fayl to'liq yozilib joyiga
+qo'yilgandan keyingina qatorlar o'chiriladi: jadval bo'laklangan bo'lsa oy
+bo'lagi ajratiladi (``DETACH PARTITION``), aks holda partiyalab ``DELETE``.
+
+Har oy ``MockAttemptArchive`` ga yoziladi. Kunlik yig'ma (``MockTestDailyStat``)
+arxivlangan davr uchun saqlanadi — ``rebuild_daily_stats`` uni
+``archived_until()`` dan oldin o'chirmaydi.
+"""
+import gzip
+import json
+import os
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .answer_codec import decode_answers
+from .attempt_partitions import add_months, detach_partition, list_partitions, month_start
+
+DEFAULT_BATCH_SIZE = 1000
+FILE_PREFIX = 'mock_attempts'
+_FIELDS = (
+    'id', 'test_id', 'session_key', 'answers_json', 'score_percent', 'correct_count',
+    'total_questions', 'is_finished', 'started_at', 'finished_at', 'ielts_band', 'result_snapshot',
+)
+
+
+def archive_cutoff(months):
+    """Shu vaqtdan oldin boshlangan urinishlar arxivlanadi (oy boshi, UTC)."""
+    return add_months(month_start(timezone.now()), -max(1, months))
+
+
+def archived_until():
+    """Arxivlangan oxirgi oydan keyingi kun (sana) yoki None."""
+    from mock_tests.models import MockAttemptArchive
+
+    last = MockAttemptArchive.objects.aggregate(month=Max('month'))['month']
+    if last is None:
+        return None
+    return add_months(last, 1).date()
+
+
+def _archive_path(output_dir, month):
+    base = os.path.join(output_dir, f'{FILE_PREFIX}-{month:%Y-%m}')
+    path = f'{base}.jsonl.gz'
+    n = 1
+    while os.path.exists(path):
+        path = f'{base}.{n}.jsonl.gz'
+        n += 1
+    return path
+
+
+def _write_month(qs, path, batch_size):
+    """Qatorlarni faylga oqim bilan yozish. Qaytaradi: yozilgan ID lar."""
+    ids = []
+    tmp = f'{path}.tmp'
+    with gzip.open(tmp, 'wt', encoding='utf-8') as fh:
+        for row in qs.order_by('pk').values(*_FIELDS).iterator(chunk_size=batch_size):
+            row['answers'] = decode_answers(row.pop('answers_json'))
+            fh.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            fh.write('\n')
+            ids.append(row['id'])
+    os.replace(tmp, path)
+    return ids
+
+
+def _delete_ids(ids, batch_size):
+    from mock_tests.models import MockAttempt
+
+    for start in range(0, len(ids), batch_size):
+        MockAttempt.objects.filter(pk__in=ids[start:start + batch_size]).delete()
+
+
+def archive_attempts(output_dir, months=12, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, drop=True):
+    """``months`` oydan eski urinishlarni arxivlash.
+
+    Qaytaradi: ``[(oy, qatorlar, fayl yo'li | None, ajratilgan bo'lak | '')]``.
+    """
+    from mock_tests.models import MockAttempt, MockAttemptArchive
+
+    cutoff = archive_cutoff(months)
+    first = MockAttempt.objects.filter(started_at__lt=cutoff).aggregate(first=Min('started_at'))['first']
+    partitions = dict(list_partitions())
+    months_to_scan = sorted(m for m in partitions if m < cutoff)
+    if first is not None:
+        month = month_start(first)
+        while month < cutoff:
+            months_to_scan.append(month)
+            month = add_months(month, 1)
+
+    if not dry_run:
+        os.makedirs(output_dir, exist_ok=True)
+    results = []
+    for month in sorted(set(months_to_scan)):
+        qs = MockAttempt.objects.filter(started_at__gte=month, started_at__lt=add_months(month, 1))
+        partition = partitions.get(month, '')
+        if dry_run:
+            results.append((month, qs.count(), None, partition))
+            continue
+        path = None
+        ids = []
+        if qs.exists():
+            path = _archive_path(output_dir, month)
+            ids = _write_month(qs, path, batch_size)
+        # Bo'lakni ajratish faqat unda arxivlanmagan qator qolmagan bo'lsa
+        if partition and qs.count() == len(ids):
+            detach_partition(partition, drop=drop)
+        else:
+            partition = ''
+            _delete_ids(ids, batch_size)
+        if ids:
+            MockAttemptArchive.objects.create(
+                month=month.date(), file_path=path, row_count=len(ids), detached_partition=partition,
+            )
+        results.append((month, len(ids), path, partition))
+    return results
+
+
+def read_archive(path):
+    """Arxiv faylini o'qish (generator) — tiklash yoki tahlil uchun."""
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
@@ -0,0 +1,249 @@
+"""Urinishlarni slot darajasida oqim bilan eksport qilish (CSV, JSONL, Parquet, Arrow).
+
+Har bir qator — bitta urinishning bitta baholanadigan sloti
+(``expand_question_details`` natijasi) va urinish ustunlari. Urinishlar
+``iterator(chunk_size=…)`` bilan o'qiladi, natija saqlangan snapshotdan
+olinadi (kalit o'zgargan bo'lsa — ``score_attempt``, bazaga yozmasdan), va
+yozuvchilar baytlar bo'lagini ``yield`` qiladi — shuning uchun xotira
+eksport hajmiga bog'liq emas. Buyruq ham, admin ``StreamingHttpResponse`` ham
+shu generatorlardan foydalanadi.
+
+Parquet/Arrow uchun ``pyarrow`` kerak (ixtiyoriy); Parquet har
+``chunk_size`` qatorda bitta row group yozadi.
+"""
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .grading_plan import answer_key_version
+from .result_snapshot import result_from_snapshot
+from .scoring import score_attempt
+from .worker_pool import chunked
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:  # pragma: no cover - pyarrow ixtiyoriy
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+DEFAULT_CHUNK_SIZE = 2000
+
+COLUMNS = (
+    'attempt_id',
+    'test_id',
+    'test_type',
+    'session',
+    'started_at',
+    'finished_at',
+    'score_percent',
+    'ielts_band',
+    'question_id',
+    'slot_order',
+    'label',
+    'question_type',
+    'is_correct',
+    'earned_points',
+    'max_points',
+    'user_answer',
+    'correct_answer',
+)
+
+# format -> (content type, fayl kengaytmasi)
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+ARROW_FORMATS = ('parquet', 'arrow')
+
+
+class ExportError(ValueError):
+    """Noma'lum format yoki yo'q ixtiyoriy kutubxona."""
+
+
+def _test_questions(test, cache):
+    entry = cache.get(test.pk)
+    if entry is None:
+        questions = list(test.questions.all())
+        for q in questions:
+            q.test = test
+        entry = cache[test.pk] = (questions, answer_key_version(test, questions))
+    return entry
+
+
+def _attempt_result(attempt, cache):
+    questions, key_version = _test_questions(attempt.test, cache)
+    result = result_from_snapshot(attempt, questions, key_version=key_version)
+    if result is None:
+        result = score_attempt(attempt, questions)
+    return result
+
+
+def iter_export_rows(attempts, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Urinishlar querysetidan slot qatorlari (dict, ``COLUMNS`` tartibida)."""
+    cache = {}
+    qs = attempts.select_related('test').order_by('test_id', 'pk')
+    for attempt in qs.iterator(chunk_size=chunk_size):
+        result = _attempt_result(attempt, cache)
+        base = {
+            'attempt_id': attempt.pk,
+            'test_id': attempt.test_id,
+            'test_type': attempt.test.test_type,
+            'session': attempt.session_key[:8],
+            'started_at': attempt.started_at,
+            'finished_at': attempt.finished_at,
+            'score_percent': float(result['score_percent']),
+            'ielts_band': float(result['ielts_band']) if result['ielts_band'] is not None else None,
+        }
+        for item in result['details']:
+            yield {
+                **base,
+                'question_id': item['question_id'],
+                'slot_order': item['order'],
+                'label': item['label'],
+                'question_type': item['question_type'],
+                'is_correct': bool(item['is_correct']),
+                'earned_points': item['earned_points'],
+                'max_points': item['max_points'],
+                'user_answer': item['user_answer_display'],
+                'correct_answer': item['correct_answer'],
+            }
+
+
+def _csv_chunks(rows, chunk_size):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for chunk in chunked(rows, chunk_size):
+        for row in chunk:
+            writer.writerow([
+                '' if row[name] is None else (
+                    row[name].isoformat() if hasattr(row[name], 'isoformat') else row[name]
+                )
+                for name in COLUMNS
+            ])
+        yield buf.getvalue().encode('utf-8')
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode('utf-8')
+
+
+def _jsonl_chunks(rows, chunk_size):
+    for chunk in chunked(rows, chunk_size):
+        yield ''.join(
+            json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in chunk
+        ).encode('utf-8')
+
+
+def _arrow_schema():
+    return pa.schema([
+        ('attempt_id', pa.int64()),
+        ('test_id', pa.int64()),
+        ('test_type', pa.string()),
+        ('session', pa.string()),
+        ('started_at', pa.timestamp('us', tz='UTC')),
+        ('finished_at', pa.timestamp('us', tz='UTC')),
+        ('score_percent', pa.float64()),
+        ('ielts_band', pa.float64()),
+        ('question_id', pa.int64()),
+        ('slot_order', pa.float64()),
+        ('label', pa.string()),
+        ('question_type', pa.string()),
+        ('is_correct', pa.bool_()),
+        ('earned_points', pa.float64()),
+        ('max_points', pa.float64()),
+        ('user_answer', pa.string()),
+        ('correct_answer', pa.string()),
+    ])
+
+
+class _DrainSink(io.RawIOBase):
+    """Yozilgan baytlarni yig'ib, ``drain()`` da qaytaradigan oqim (pyarrow yozuvchisi uchun)."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _float_or_none(value):
+    """Raqamli qiymat -> float; bo'sh yoki raqam bo'lmagan (masalan ``'14-15'``) -> None."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _arrow_row(row):
+    """Qatorni Arrow sxemasi turlariga moslash (joyida).
+
+    Slot tartibi raqam bo'lmasa ``slot_order`` bo'sh qoladi — asl yorliq
+    ``label`` ustunida saqlanadi.
+    """
+    row['slot_order'] = _float_or_none(row['slot_order'])
+    for name in ('label', 'user_answer', 'correct_answer'):
+        row[name] = None if row[name] is None else str(row[name])
+    return row
+
+
+def _arrow_chunks(rows, chunk_size, fmt):
+    schema = _arrow_schema()
+    sink = _DrainSink()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for chunk in chunked(rows, chunk_size):
+        for row in chunk:
+            _arrow_row(row)
+        batch = pa.RecordBatch.from_pylist(chunk, schema=schema)
+        if fmt == 'parquet':
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def export_chunks(attempts, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Eksport baytlari generatori (fayl yoki ``StreamingHttpResponse`` uchun)."""
+    if fmt not in FORMATS:
+        raise ExportError(f"Noma'lum format: {fmt}")
+    if fmt in ARROW_FORMATS and not PYARROW_AVAILABLE:
+        raise ExportError(f"{fmt} uchun pyarrow o'rnatilmagan")
+    rows = iter_export_rows(attempts, chunk_size=chunk_size)
+    if fmt == 'csv':
+        return _csv_chunks(rows, chunk_size)
+    if fmt == 'jsonl':
+        return _jsonl_chunks(rows, chunk_size)
+    return _arrow_chunks(rows, chunk_size, fmt)
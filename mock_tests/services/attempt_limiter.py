@@ -0,0 +1,114 @@
+"""Kunlik urinishlar chegarasi — (sessiya, test, kun) hisoblagichi cache da.
+
+Tekshirish bitta ``cache.get``: hisoblagich kalitida kun bor va muddati
+mahalliy yarim tungacha, shuning uchun kun almashganda o'zi yangilanadi.
+Kalit yo'q bo'lsa bir marta indeksli so'rov (``finished_at`` oralig'i,
+``__date`` emas) bilan sanab ``cache.add`` qilinadi. Urinish tugallanganda
+``MockAttempt.save`` hisoblagichni ``incr`` qiladi; tugallanish bekor qilinsa
+kalit o'chiriladi va keyingi tekshiruv bazadan qayta sanaydi.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+COUNTER_KEY = 'mock_tests:daily-attempts:{}:{}:{}'
+DEFAULT_MAX_DAILY_ATTEMPTS = 5
+
+
+def _cache():
+    return caches[getattr(settings, 'MOCK_ATTEMPT_LIMIT_CACHE', 'default')]
+
+
+def daily_limit(test):
+    """Test uchun kunlik chegara; 0 — cheklanmagan."""
+    if test.max_daily_attempts is not None:
+        return test.max_daily_attempts
+    return getattr(settings, 'MOCK_MAX_DAILY_ATTEMPTS', DEFAULT_MAX_DAILY_ATTEMPTS)
+
+
+def _day_bounds(day):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def _ttl(day):
+    # Kun tugagach kalit keraksiz; kichik zaxira soat o'zgarishlari uchun
+    return max(1, int((_day_bounds(day)[1] - timezone.now()).total_seconds()) + 60)
+
+
+def _key(session_key, test_id, day):
+    return COUNTER_KEY.format(test_id, day.isoformat(), session_key)
+
+
+def count_finished_today(session_key, test_id, day=None):
+    """Bazadan sanash (cache da yo'q bo'lganda)."""
+    from mock_tests.models import MockAttempt
+
+    start, end = _day_bounds(day or timezone.localdate())
+    return MockAttempt.objects.filter(
+        session_key=session_key, test_id=test_id,
+        finished_at__gte=start, finished_at__lt=end, is_finished=True,
+    ).count()
+
+
+def attempts_today(session_key, test_id):
+    if not session_key:
+        # Sessiyasiz tashrif — urinish ham bo'lmagan
+        return 0
+    day = timezone.localdate()
+    c = _cache()
+    key = _key(session_key, test_id, day)
+    count = c.get(key)
+    if count is None:
+        count = count_finished_today(session_key, test_id, day)
+        if not c.add(key, count, _ttl(day)):
+            # Parallel so'rov ulgurdi (yoki shu orada incr bo'ldi)
+            count = c.get(key, count)
+    return count
+
+
+def remaining_attempts(session_key, test):
+    """Qolgan urinishlar soni; cheklanmagan test uchun None."""
+    limit = daily_limit(test)
+    if not limit:
+        return None
+    return max(0, limit - attempts_today(session_key, test.pk))
+
+
+def limit_reached(session_key, test):
+    return remaining_attempts(session_key, test) == 0
+
+
+def _state_key(session_key, state):
+    if not state or not state[1]:
+        return None
+    return _key(session_key, state[0], state[1][0])
+
+
+def record_attempt_change(old_state, attempt):
+    """``MockAttempt.save`` dan keyin: tugallangan urinishni kun hisoblagichiga yozish.
+
+    Holatlar ``rollups.attempt_rollup_state`` shaklida: (test_id, finished | None).
+    """
+    from .rollups import attempt_rollup_state
+
+    new_state = attempt_rollup_state(attempt)
+    if new_state is None:
+        return
+    old_key = _state_key(attempt.session_key, old_state)
+    new_key = _state_key(attempt.session_key, new_state)
+    if old_key == new_key:
+        return
+    c = _cache()
+    if old_key is None:
+        try:
+            c.incr(new_key)
+        except ValueError:
+            # Kalit yo'q — keyingi tekshiruv bazadan sanaydi
+            pass
+        return
+    c.delete_many([key for key in (old_key, new_key) if key])
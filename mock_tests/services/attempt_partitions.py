@@ -0,0 +1,187 @@
+"""``MockAttempt`` jadvalini PostgreSQL da oylik bo'laklarga (RANGE ``started_at``) ajratish.
+
+Ixtiyoriy: ``attempt_partitions --convert`` bir marta jadvalni bo'lakli
+jadvalga aylantiradi (ma'lumotlar ko'chiriladi, indekslar va FK qayta
+yaratiladi), keyin ``attempt_partitions`` (cron) oldindan keyingi oylar
+uchun bo'laklar ochadi. ``started_at`` bo'yicha filtrlar (admin
+``date_hierarchy``, statistika, arxiv) faqat kerakli oylarni o'qiydi.
+
+Bo'lakli jadvalda birlamchi kalit ``(id, started_at)`` bo'lishi shart; ORM
+uchun ``id`` o'zgarmaydi (identity ketma-ketligi davom ettiriladi).
+Mos oy bo'lagi bo'lmagan qatorlar ``<jadval>_default`` ga tushadi.
+Bo'laklar UTC oylari bo'yicha.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+DEFAULT_MONTHS_AHEAD = 3
+
+
+class PartitioningError(RuntimeError):
+    """Bo'laklash imkonsiz (baza turi yoki holati mos emas)."""
+
+
+def _table():
+    from mock_tests.models import MockAttempt
+
+    return MockAttempt._meta.db_table
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f'{_table()}_p{month:%Y%m}'
+
+
+def _require_postgres():
+    if connection.vendor != 'postgresql':
+        raise PartitioningError("Bo'laklash faqat PostgreSQL da ishlaydi")
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+            'WHERE c.relname = %s AND pg_table_is_visible(c.oid)',
+            [_table()],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Oylik bo'laklar: ``[(oy boshi, nom), ...]`` (default bo'lak kirmaydi)."""
+    if not is_partitioned():
+        return []
+    pattern = re.compile(rf'^{re.escape(_table())}_p(\d{{4}})(\d{{2}})$')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent '
+            'WHERE p.relname = %s AND pg_table_is_visible(p.oid)',
+            [_table()],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    found = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            found.append((datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc), name))
+    return sorted(found)
+
+
+def _create_partition(cursor, month):
+    # DDL da parametr bog'lab bo'lmaydi; chegaralar o'zimiz yasagan sanalar
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {_qn(partition_name(month))} PARTITION OF {_qn(_table())} '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def ensure_partitions(months_ahead=DEFAULT_MONTHS_AHEAD, since=None):
+    """Joriy oydan ``months_ahead`` oy oldinga bo'laklar. Qaytaradi: yangi bo'lak nomlari."""
+    _require_postgres()
+    if not is_partitioned():
+        raise PartitioningError("Jadval bo'laklanmagan — avval --convert")
+    existing = {name for _month, name in list_partitions()}
+    month = month_start(since or timezone.now())
+    last = add_months(month_start(timezone.now()), months_ahead)
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        while month <= last:
+            if partition_name(month) not in existing:
+                _create_partition(cursor, month)
+                created.append(partition_name(month))
+            month = add_months(month, 1)
+    return created
+
+
+def convert_to_partitioned(months_ahead=DEFAULT_MONTHS_AHEAD):
+    """Oddiy jadvalni bo'lakli jadvalga aylantirish (bir marta, jadval qulflanadi).
+
+    Qaytaradi: ko'chirilgan qatorlar soni.
+    """
+    _require_postgres()
+    if is_partitioned():
+        raise PartitioningError("Jadval allaqachon bo'laklangan")
+    table = _table()
+    old = f'{table}_unpartitioned'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {_qn(table)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN ("
+            "  SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u'))",
+            [table, table],
+        )
+        index_defs = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT min(started_at) FROM {_qn(table)}')
+        first = cursor.fetchone()[0] or timezone.now()
+
+        cursor.execute(f'ALTER TABLE {_qn(table)} RENAME TO {_qn(old)}')
+        cursor.execute(
+            f'CREATE TABLE {_qn(table)} (LIKE {_qn(old)} INCLUDING DEFAULTS INCLUDING IDENTITY '
+            f'INCLUDING CONSTRAINTS) PARTITION BY RANGE (started_at)'
+        )
+        cursor.execute(f'ALTER TABLE {_qn(table)} ADD PRIMARY KEY (id, started_at)')
+        cursor.execute(f'CREATE TABLE {_qn(table + "_default")} PARTITION OF {_qn(table)} DEFAULT')
+        month = month_start(first)
+        last = add_months(month_start(timezone.now()), months_ahead)
+        while month <= last:
+            _create_partition(cursor, month)
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO {_qn(table)} OVERRIDING SYSTEM VALUE SELECT * FROM {_qn(old)}')
+        moved = cursor.rowcount
+        # Eski ``serial`` ustun: ketma-ketlik eski jadval bilan birga o'chmasin
+        cursor.execute(
+            "SELECT is_identity FROM information_schema.columns "
+            "WHERE table_name = %s AND column_name = 'id' AND table_schema = current_schema()",
+            [old],
+        )
+        if cursor.fetchone()[0] != 'YES':
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [old])
+            sequence = cursor.fetchone()[0]
+            if sequence:
+                cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {_qn(table)}.id')
+        cursor.execute(f'DROP TABLE {_qn(old)}')
+        # Indekslar nomi va ta'rifi o'zgarmaydi — eski jadval bilan o'chgach qayta yaratiladi
+        for definition in index_defs:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {_qn(table)} ADD CONSTRAINT {_qn(name)} {definition}')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(max(id), 0) + 1, false) "
+            f'FROM {_qn(table)}',
+            [table],
+        )
+    return moved
+
+
+def detach_partition(name, drop=True):
+    """Bo'lakni ajratish (arxivdan keyin); ``drop`` — jadvalni ham o'chirish."""
+    _require_postgres()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {_qn(_table())} DETACH PARTITION {_qn(name)}')
+        if drop:
+            cursor.execute(f'DROP TABLE {_qn(name)}')
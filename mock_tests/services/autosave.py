@@ -0,0 +1,91 @@
+"""Delta avtosaqlash — faqat o'zgargan savollar, test/savollar yuklanmaydi.
+
+Mijoz har saqlashda o'sib boruvchi ``version`` yuboradi. Yozuv faqat
+``answers_version < version`` bo'lsa qo'llanadi, shuning uchun kechikkan yoki
+qayta yuborilgan so'rov yangi javoblarni bosib ketmaydi. PostgreSQL da
+birlashtirish bitta ``UPDATE`` ichida JSONB ``||`` / ``-`` bilan bajariladi;
+boshqa bazalarda qator qulflanib Python da birlashtiriladi.
+
+Birlashtirish savol darajasida: bo'sh joyli savolning qiymati (dict) to'liq
+almashtiriladi.
+"""
+import json
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from mock_tests.models import MockAttempt
+
+MAX_DELTA_ITEMS = 500
+
+SAVED = 'saved'
+STALE = 'stale'
+NOT_FOUND = 'not_found'
+
+
+class AutosaveError(ValueError):
+    """Yaroqsiz delta (format yoki hajm)."""
+
+
+def parse_delta(payload):
+    """So'rov tanasi -> (attempt_id, version, changes, removed)."""
+    if not isinstance(payload, dict):
+        raise AutosaveError('invalid_payload')
+    try:
+        attempt_id = int(payload.get('attempt'))
+        version = int(payload.get('version'))
+    except (TypeError, ValueError):
+        raise AutosaveError('invalid_version')
+    if version < 1:
+        raise AutosaveError('invalid_version')
+    changes = payload.get('answers') or {}
+    removed = payload.get('removed') or []
+    if not isinstance(changes, dict) or not isinstance(removed, list):
+        raise AutosaveError('invalid_payload')
+    if len(changes) + len(removed) > MAX_DELTA_ITEMS:
+        raise AutosaveError('too_large')
+    changes = {str(k): v for k, v in changes.items()}
+    removed = [str(k) for k in removed if str(k) not in changes]
+    return attempt_id, version, changes, removed
+
+
+def _attempt_qs(attempt_id, test_id, session_key):
+    return MockAttempt.objects.filter(
+        pk=attempt_id, test_id=test_id, session_key=session_key, is_finished=False,
+    )
+
+
+def _apply_postgres(qs, version, changes, removed):
+    merged = RawSQL(
+        '(answers_json || %s::jsonb) - %s::text[]',
+        (json.dumps(changes), removed),
+    )
+    return qs.filter(answers_version__lt=version).update(answers_json=merged, answers_version=version)
+
+
+def _apply_locked(qs, version, changes, removed):
+    with transaction.atomic():
+        row = qs.select_for_update().values_list('answers_json', 'answers_version').first()
+        if row is None or row[1] >= version:
+            return 0
+        answers = dict(row[0] or {})
+        answers.update(changes)
+        for key in removed:
+            answers.pop(key, None)
+        return qs.update(answers_json=answers, answers_version=version)
+
+
+def apply_answer_delta(attempt_id, test_id, session_key, version, changes, removed=()):
+    """Deltani urinishga qo'llash. Qaytaradi: (holat, serverdagi versiya)."""
+    qs = _attempt_qs(attempt_id, test_id, session_key)
+    removed = list(removed)
+    if connection.vendor == 'postgresql':
+        updated = _apply_postgres(qs, version, changes, removed)
+    else:
+        updated = _apply_locked(qs, version, changes, removed)
+    if updated:
+        return SAVED, version
+    current = qs.values_list('answers_version', flat=True).first()
+    if current is None:
+        return NOT_FOUND, None
+    return STALE, current
@@ -0,0 +1,263 @@
+"""Avtosaqlash buferi — javoblar cache da yig'iladi, bazaga partiyalab yoziladi.
+
+Guruh imtihonida yuzlab talaba har bir necha soniyada saqlaydi. Har urinish
+uchun cache da bitta yozuv saqlanadi (oxirgi versiya va bazaga hali
+yozilmagan delta yoki to'liq javoblar). ``flush_autosave_buffer`` har
+``MOCK_AUTOSAVE_BUFFER_SECONDS`` soniyada ularni bitta tranzaksiyada yozadi:
+``flush_autosave_buffer`` buyrug'i (``--loop``) yoki oyna tugagach birinchi
+avtosaqlash so'rovi chaqiradi. Tugatish, take sahifasi va natija sahifasi
+avval shu urinish yozuvini bazaga tushiradi.
+
+Qayta yoziladigan urinishlar ro'yxati ``incr`` hisoblagichi va
+``dirty:{n}`` kalitlari orqali yuritiladi.
+
+Bufer faqat jarayonlararo umumiy cache (Redis, Memcached) bilan ishlaydi:
+LocMem har jarayonda alohida — flush buyrug'i va boshqa worker yozuvlarni
+ko'rmaydi, shuning uchun bunday backendda ``buffer_seconds()`` 0 qaytaradi
+(to'g'ridan-to'g'ri yozish). Har yozuv ``cache.add`` lock kaliti ostida
+o'zgartiriladi va har o'zgarishda ``rev`` oshadi; flush yozuvni faqat
+yozilgan ``rev`` o'zgarmagan bo'lsa o'chiradi — oradagi delta yo'qolmaydi.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .autosave import NOT_FOUND, SAVED, STALE, _attempt_qs, apply_answer_delta
+
+ENTRY_KEY = 'mock_tests:autosave:entry:{}'
+LOCK_KEY = 'mock_tests:autosave:lock:{}'
+DIRTY_KEY = 'mock_tests:autosave:dirty:{}'
+SEQ_KEY = 'mock_tests:autosave:seq'
+CURSOR_KEY = 'mock_tests:autosave:cursor'
+FLUSH_LOCK_KEY = 'mock_tests:autosave:flush-lock'
+ENTRY_TIMEOUT = 60 * 60 * 24
+# Lock faqat cache o'qish/yozish vaqtida ushlanadi; egasi yiqilsa muddat tugaydi
+LOCK_TIMEOUT = 5
+LOCK_WAIT = 2.0
+LOCK_POLL = 0.01
+BUSY = 'busy'
+# Jarayonning o'zida qoladigan backendlar — buferlash uchun yaroqsiz
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+FLUSH_BATCH_SIZE = 500
+# Oxirgi shuncha raqam hali yozilayotgan bo'lishi mumkin — kursor ulardan o'tmaydi
+IN_FLIGHT_SLACK = 100
+
+
+class AutosaveBusy(Exception):
+    """Yozuv lock i ``LOCK_WAIT`` ichida bo'shamadi."""
+
+
+def _cache_alias():
+    return getattr(settings, 'MOCK_AUTOSAVE_CACHE', 'default')
+
+
+def _cache():
+    return caches[_cache_alias()]
+
+
+def shared_cache_configured():
+    backend = settings.CACHES.get(_cache_alias(), {}).get('BACKEND', '')
+    return bool(backend) and backend not in LOCAL_CACHE_BACKENDS
+
+
+def buffer_seconds():
+    seconds = max(0, int(getattr(settings, 'MOCK_AUTOSAVE_BUFFER_SECONDS', 0) or 0))
+    if seconds and not shared_cache_configured():
+        return 0
+    return seconds
+
+
+@contextmanager
+def _entry_lock(c, attempt_id, wait=LOCK_WAIT):
+    key = LOCK_KEY.format(attempt_id)
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    while not c.add(key, token, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            raise AutosaveBusy(attempt_id)
+        time.sleep(LOCK_POLL)
+    try:
+        yield
+    finally:
+        if c.get(key) == token:
+            c.delete(key)
+
+
+def _mark_dirty(c, attempt_id):
+    c.add(SEQ_KEY, 0, None)
+    seq = c.incr(SEQ_KEY)
+    c.set(DIRTY_KEY.format(seq), attempt_id, ENTRY_TIMEOUT)
+
+
+def _new_entry(attempt_id, test_id, session_key):
+    version = _attempt_qs(attempt_id, test_id, session_key).values_list(
+        'answers_version', flat=True
+    ).first()
+    if version is None:
+        return None
+    return {
+        'test_id': test_id,
+        'session_key': session_key,
+        'version': version,
+        'rev': 0,
+        'replace': False,
+        'answers': {},
+        'removed': [],
+    }
+
+
+def _load_entry(c, attempt_id, test_id, session_key):
+    """(yozuv, yangimi) yoki (None, False) — urinish topilmasa/boshqa sessiyaniki."""
+    entry = c.get(ENTRY_KEY.format(attempt_id))
+    if entry is not None:
+        if entry['test_id'] != test_id or entry['session_key'] != session_key:
+            return None, False
+        return entry, False
+    return _new_entry(attempt_id, test_id, session_key), True
+
+
+def _store_entry(c, attempt_id, entry, is_new):
+    entry['rev'] = entry.get('rev', 0) + 1
+    c.set(ENTRY_KEY.format(attempt_id), entry, ENTRY_TIMEOUT)
+    if is_new:
+        _mark_dirty(c, attempt_id)
+
+
+def buffer_answer_delta(attempt_id, test_id, session_key, version, changes, removed=()):
+    """``apply_answer_delta`` bilan bir xil natija, lekin yozuv buferga tushadi."""
+    if not buffer_seconds():
+        return apply_answer_delta(attempt_id, test_id, session_key, version, changes, removed)
+    c = _cache()
+    try:
+        with _entry_lock(c, attempt_id):
+            entry, is_new = _load_entry(c, attempt_id, test_id, session_key)
+            if entry is None:
+                return NOT_FOUND, None
+            if version <= entry['version']:
+                return STALE, entry['version']
+
+            answers = entry['answers']
+            answers.update(changes)
+            for key in removed:
+                answers.pop(key, None)
+            if not entry['replace']:
+                pending = (set(entry['removed']) - set(changes)) | set(removed)
+                entry['removed'] = sorted(pending)
+            entry['version'] = version
+            _store_entry(c, attempt_id, entry, is_new)
+    except AutosaveBusy:
+        # Tasdiqlanmagan delta — mijoz keyingi saqlashda qayta yuboradi
+        return BUSY, None
+    maybe_flush()
+    return SAVED, version
+
+
+def buffer_full_answers(attempt, answers):
+    """Eski ``action=save`` — to'liq javoblar lug'ati (versiyasiz). False — lock band."""
+    if not buffer_seconds():
+        attempt.answers_json = answers
+        attempt.save(update_fields=['answers_json'])
+        return True
+    c = _cache()
+    try:
+        with _entry_lock(c, attempt.pk):
+            entry, is_new = _load_entry(c, attempt.pk, attempt.test_id, attempt.session_key)
+            if entry is None:
+                return True
+            entry.update(replace=True, answers=dict(answers), removed=[])
+            _store_entry(c, attempt.pk, entry, is_new)
+    except AutosaveBusy:
+        return False
+    maybe_flush()
+    return True
+
+
+def _write_entry(attempt_id, entry):
+    if entry['replace']:
+        _attempt_qs(attempt_id, entry['test_id'], entry['session_key']).filter(
+            answers_version__lte=entry['version'],
+        ).update(answers_json=entry['answers'], answers_version=entry['version'])
+    else:
+        apply_answer_delta(
+            attempt_id, entry['test_id'], entry['session_key'],
+            entry['version'], entry['answers'], entry['removed'],
+        )
+
+
+def flush_attempts(attempt_ids):
+    """Berilgan urinishlarning bufer yozuvlarini bazaga yozish. Qaytaradi: yozuvlar soni."""
+    c = _cache()
+    keys = {ENTRY_KEY.format(aid): aid for aid in dict.fromkeys(attempt_ids)}
+    if not keys:
+        return 0
+    entries = c.get_many(list(keys))
+    if not entries:
+        return 0
+    with transaction.atomic():
+        for key, entry in entries.items():
+            _write_entry(keys[key], entry)
+    # Yozish paytida yangi delta kelgan bo'lsa (``rev`` oshgan), yozuv qoladi va qayta belgilanadi.
+    for key, entry in entries.items():
+        attempt_id = keys[key]
+        try:
+            with _entry_lock(c, attempt_id):
+                current = c.get(key)
+                if current is not None and current.get('rev') == entry.get('rev'):
+                    c.delete(key)
+                    continue
+        except AutosaveBusy:
+            current = entry
+        if current is not None:
+            _mark_dirty(c, attempt_id)
+    return len(entries)
+
+
+def flush_attempt(attempt_id):
+    return flush_attempts([attempt_id])
+
+
+def _take_dirty_ids(c, batch_size):
+    seq = c.get(SEQ_KEY) or 0
+    cursor = c.get(CURSOR_KEY) or 0
+    ids = []
+    n = cursor
+    while n < seq:
+        numbers = range(n + 1, min(n + batch_size, seq) + 1)
+        found = c.get_many([DIRTY_KEY.format(i) for i in numbers])
+        taken = []
+        for i in numbers:
+            key = DIRTY_KEY.format(i)
+            if key not in found and seq - i < IN_FLIGHT_SLACK:
+                seq = n
+                break
+            if key in found:
+                ids.append(found[key])
+                taken.append(key)
+            n = i
+        c.delete_many(taken)
+    c.set(CURSOR_KEY, n, None)
+    return ids
+
+
+def flush_autosave_buffer(batch_size=FLUSH_BATCH_SIZE):
+    """Belgilangan barcha urinishlarni partiyalab yozish. Qaytaradi: yozuvlar soni."""
+    c = _cache()
+    ids = list(dict.fromkeys(_take_dirty_ids(c, batch_size)))
+    flushed = 0
+    for start in range(0, len(ids), batch_size):
+        flushed += flush_attempts(ids[start:start + batch_size])
+    return flushed
+
+
+def maybe_flush():
+    """Oyna tugagan bo'lsa (lock kaliti yo'q) — shu so'rovda buferni yozish."""
+    seconds = buffer_seconds()
+    if seconds and _cache().add(FLUSH_LOCK_KEY, time.time(), seconds):
+        flush_autosave_buffer()
@@ -0,0 +1,357 @@
+"""Qog'oz varaqlar uchun paket baholash — N ta talaba × slotlar matritsasi.
+
+Test kaliti bir marta ``compile_batch_key`` bilan kompilyatsiya qilinadi:
+
+* tanlov slotlari (MCQ, TFNG/YNNG, matching) — butun son kodlariga aylanadi va
+  butun javoblar matritsasi bir o'tishda solishtiriladi (NumPy bo'lsa vektorli,
+  bo'lmasa oddiy Python sikli — natija bir xil);
+* matnli bo'sh joylar — normalizator orqali, har ustunda bir xil javoblar
+  uchun natija eslab qolinadi;
+* qolgan kam uchraydigan turlar — ``score_question_points`` ga qaytadi.
+
+Ball, slot soni va band ``score_attempt`` bilan bir xil hisoblanadi.
+Varaq ustunlari — talaba ko'radigan dock raqamlari (1, 2, … 40).
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from mock_tests.matching_utils import MATCHING_TYPES
+from mock_tests.mcq_utils import get_mcq_correct_letters, parse_mcq_letters
+
+from .answer_normalizer import collect_acceptable_answers, match_text_answer, normalize_choice
+from .band_score import earned_ratio_to_band
+from .grading_plan import get_test_plan
+from .scoring import (
+    _match_blank_slot,
+    _scores_as_blanks,
+    expand_question_details,
+    score_question_points,
+)
+from .slots import FILL_SINGLE_BLANK_TYPES
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - numpy ixtiyoriy
+    np = None
+    NUMPY_AVAILABLE = False
+
+EMPTY_CODE = -1
+UNKNOWN_CODE = -2
+CHOICE_TYPES = ('true_false_not_given', 'yes_no_not_given', 'matching')
+
+
+@dataclass(frozen=True)
+class ChoiceSlot:
+    """Tanlov sloti: ``cols`` dagi istalgan katak ``code`` ga teng bo'lsa to'g'ri."""
+
+    cols: Tuple[int, ...]
+    code: int
+    weight: float
+
+
+@dataclass(frozen=True)
+class TextSlot:
+    col: int
+    question: object
+    plan: object
+    slot: object
+    raw_correct: str
+    weight: float
+    single: bool
+
+
+@dataclass(frozen=True)
+class FallbackQuestion:
+    question: object
+    plan: object
+    cols: Tuple[int, ...]
+
+
+@dataclass
+class BatchKey:
+    test_type: str
+    numbers: Tuple[str, ...]
+    column_kinds: Tuple[str, ...]
+    choice_slots: List[ChoiceSlot] = field(default_factory=list)
+    text_slots: List[TextSlot] = field(default_factory=list)
+    fallback: List[FallbackQuestion] = field(default_factory=list)
+    codebook: Dict[str, int] = field(default_factory=dict)
+    aliases: Dict[int, Dict[str, str]] = field(default_factory=dict)
+    total_points: float = 0.0
+    total_slots: int = 0
+
+    def column_index(self):
+        return {num: idx for idx, num in enumerate(self.numbers)}
+
+    def code_for(self, value):
+        code = self.codebook.get(value)
+        if code is None:
+            code = len(self.codebook)
+            self.codebook[value] = code
+        return code
+
+
+@dataclass(frozen=True)
+class SheetResult:
+    student: str
+    correct_count: int
+    total_questions: int
+    earned_points: float
+    total_points: float
+    score_percent: Decimal
+    ielts_band: Optional[float]
+
+
+def _option_aliases(question):
+    """TFNG/YNNG: 'True' / 'T' / 'not given' / 'NG' -> variant harfi."""
+    aliases = {}
+    for letter in 'abcd':
+        text = getattr(question, f'option_{letter}', '') or ''
+        norm = normalize_choice(text)
+        if not norm:
+            continue
+        aliases[norm] = letter
+        initials = ''.join(word[0] for word in norm.split())
+        if initials and initials not in 'abcd':
+            aliases.setdefault(initials, letter)
+    return aliases
+
+
+def _question_kind(question, plan):
+    qtype = question.question_type
+    slots = plan.slots
+    if qtype in CHOICE_TYPES and len(slots) == 1:
+        return 'choice' if normalize_choice(question.correct_answer) else 'fallback'
+    if qtype == 'mcq':
+        correct = get_mcq_correct_letters(question)
+        if question.get_mcq_select_count() <= 1:
+            return 'mcq' if len(correct) == 1 and len(slots) == 1 else 'fallback'
+        letters = [slot.correct for slot in slots if slot.kind == 'mcq_letter']
+        if letters and len(letters) == len(slots) and sorted(letters) == correct:
+            return 'mcq_multi'
+        return 'fallback'
+    if qtype in MATCHING_TYPES and slots and all(s.kind == 'matching' for s in slots):
+        return 'matching'
+    if _scores_as_blanks(question) and slots and all(s.kind == 'blank' for s in slots):
+        return 'blanks'
+    if qtype in FILL_SINGLE_BLANK_TYPES and len(slots) == 1 and slots[0].kind == 'single':
+        return 'fill'
+    return 'fallback'
+
+
+def compile_batch_key(test, questions):
+    """Test kalitini paket baholash uchun kompilyatsiya qilish."""
+    questions = list(questions)
+    for q in questions:
+        q.test = test
+    test_plan = get_test_plan(questions)
+    key = BatchKey(
+        test_type=test.test_type,
+        numbers=(),
+        column_kinds=(),
+        total_points=test_plan.total_points,
+        total_slots=test_plan.total_slots,
+    )
+    numbers = []
+    kinds = []
+
+    def _add_column(num, kind):
+        numbers.append(str(num))
+        kinds.append(kind)
+        return len(numbers) - 1
+
+    for q in questions:
+        plan = test_plan.question_plans[q.id]
+        dock_nums = test_plan.dock_nums[q.id]
+        kind = _question_kind(q, plan)
+        points = float(q.points or 1)
+
+        if kind in ('choice', 'mcq'):
+            col = _add_column(dock_nums[0], kind)
+            if kind == 'choice':
+                correct = normalize_choice(q.correct_answer)
+                if correct in ('a', 'b', 'c', 'd'):
+                    key.aliases[col] = _option_aliases(q)
+            else:
+                correct = get_mcq_correct_letters(q)[0]
+            key.choice_slots.append(ChoiceSlot((col,), key.code_for(correct), points))
+        elif kind == 'mcq_multi':
+            cols = tuple(_add_column(num, 'mcq') for num in dock_nums)
+            weight = points / len(plan.slots)
+            for slot in plan.slots:
+                key.choice_slots.append(ChoiceSlot(cols, key.code_for(slot.correct), weight))
+        elif kind == 'matching':
+            weight = plan.total_points / len(plan.slots)
+            for slot, num in zip(plan.slots, dock_nums):
+                col = _add_column(num, 'choice')
+                correct = normalize_choice(slot.correct)
+                code = key.code_for(correct) if correct else UNKNOWN_CODE
+                key.choice_slots.append(ChoiceSlot((col,), code, weight))
+        elif kind in ('blanks', 'fill'):
+            single = kind == 'fill'
+            weight = points if single else plan.total_points / len(plan.slots)
+            for slot, raw, num in zip(plan.slots, plan.raw_correct, dock_nums):
+                col = _add_column(num, 'text')
+                key.text_slots.append(TextSlot(col, q, plan, slot, raw, weight, single))
+        else:
+            cols = tuple(_add_column(num, 'text') for num in dock_nums)
+            key.fallback.append(FallbackQuestion(q, plan, cols))
+
+    key.numbers = tuple(numbers)
+    key.column_kinds = tuple(kinds)
+    return key
+
+
+def _encode_cell(key, col, value):
+    kind = key.column_kinds[col]
+    if kind == 'text':
+        return EMPTY_CODE
+    if kind == 'mcq':
+        letters = parse_mcq_letters(value)
+        norm = letters[0] if len(letters) == 1 else ''
+    else:
+        norm = normalize_choice(value)
+        norm = key.aliases.get(col, {}).get(norm, norm)
+    if not norm:
+        return EMPTY_CODE
+    return key.codebook.get(norm, UNKNOWN_CODE)
+
+
+def _choice_hits_numpy(key, codes):
+    matrix = np.asarray(codes, dtype=np.int32).reshape(len(codes), len(key.numbers))
+    n = matrix.shape[0]
+    earned = np.zeros(n, dtype=np.float64)
+    correct = np.zeros(n, dtype=np.int64)
+
+    single = [s for s in key.choice_slots if len(s.cols) == 1]
+    if single:
+        cols = np.fromiter((s.cols[0] for s in single), dtype=np.int64, count=len(single))
+        want = np.fromiter((s.code for s in single), dtype=np.int32, count=len(single))
+        weights = np.fromiter((s.weight for s in single), dtype=np.float64, count=len(single))
+        hits = (matrix[:, cols] == want) & (want >= 0)
+        earned += hits @ weights
+        correct += hits.sum(axis=1)
+    for slot in key.choice_slots:
+        if len(slot.cols) == 1:
+            continue
+        hits = (matrix[:, list(slot.cols)] == slot.code).any(axis=1)
+        earned += hits * slot.weight
+        correct += hits
+    return earned.tolist(), correct.tolist()
+
+
+def _choice_hits_python(key, codes):
+    earned = []
+    correct = []
+    for row in codes:
+        e = 0.0
+        c = 0
+        for slot in key.choice_slots:
+            if slot.code < 0:
+                continue
+            if any(row[col] == slot.code for col in slot.cols):
+                e += slot.weight
+                c += 1
+        earned.append(e)
+        correct.append(c)
+    return earned, correct
+
+
+def _fallback_answer(fb, cells):
+    kinds = {slot.kind for slot in fb.plan.slots}
+    if kinds <= {'single'} and len(cells) == 1:
+        return cells[0]
+    if kinds == {'mcq_letter'}:
+        return ','.join(c for c in cells if c)
+    return {slot.key: value for slot, value in zip(fb.plan.slots, cells)}
+
+
+def _text_hit(ts, value, memo):
+    if not value or not str(value).strip():
+        return False
+    cache = memo.setdefault(ts.col, {})
+    hit = cache.get(value)
+    if hit is None:
+        question, plan = ts.question, ts.plan
+        if ts.single:
+            hit = match_text_answer(
+                value, collect_acceptable_answers(question),
+                acceptable_variants=plan.variants_for(''),
+                max_distance=plan.fuzzy_tolerance,
+            )
+        else:
+            hit = _match_blank_slot(question, plan, ts.slot, value, ts.raw_correct)
+        cache[value] = hit
+    return hit
+
+
+def grade_sheets(key, sheets, use_numpy=None):
+    """[(talaba, {dock_raqami: javob})] -> [SheetResult]."""
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    index = key.column_index()
+    students = []
+    cells = []
+    codes = []
+    width = len(key.numbers)
+    for student, answers in sheets:
+        row = [''] * width
+        for num, value in (answers or {}).items():
+            col = index.get(str(num).strip())
+            if col is not None:
+                row[col] = '' if value is None else str(value).strip()
+        students.append(str(student))
+        cells.append(row)
+        codes.append([_encode_cell(key, col, value) for col, value in enumerate(row)])
+
+    if not students:
+        return []
+    if use_numpy and NUMPY_AVAILABLE and width:
+        earned, correct = _choice_hits_numpy(key, codes)
+    else:
+        earned, correct = _choice_hits_python(key, codes)
+
+    memo = {}
+    results = []
+    for i, student in enumerate(students):
+        row = cells[i]
+        e = earned[i]
+        c = correct[i]
+        for ts in key.text_slots:
+            if _text_hit(ts, row[ts.col], memo):
+                e += ts.weight
+                c += 1
+        for fb in key.fallback:
+            answer = _fallback_answer(fb, [row[col] for col in fb.cols])
+            e += score_question_points(fb.question, answer, plan=fb.plan)
+            c += sum(
+                1 for r in expand_question_details(fb.question, answer, plan=fb.plan)
+                if r['is_correct']
+            )
+        results.append(_sheet_result(key, student, e, c))
+    return results
+
+
+def _sheet_result(key, student, earned, correct):
+    total_points = key.total_points
+    if total_points:
+        score_percent = Decimal(earned * 100) / Decimal(total_points)
+    elif key.total_slots:
+        score_percent = Decimal(correct * 100) / Decimal(key.total_slots)
+    else:
+        score_percent = Decimal('0')
+    band = None
+    if key.test_type in ('reading', 'listening') and total_points:
+        band = earned_ratio_to_band(earned, total_points)
+    return SheetResult(
+        student=student,
+        correct_count=int(correct),
+        total_questions=key.total_slots,
+        earned_points=round(earned, 2),
+        total_points=round(total_points, 2),
+        score_percent=score_percent.quantize(Decimal('0.01')),
+        ielts_band=band,
+    )
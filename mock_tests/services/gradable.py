@@ -1,5 +1,6 @@
 """Testdagi baholanadigan birliklar (blank, matching qatori) — savol emas."""
-from .slots import list_gradable_slots
+from .answer_codec import decode_answers
+from .grading_plan import get_question_plan
 
 
 def total_gradable_slots(questions):
@@ -7,14 +8,11 @@ def total_gradable_slots(questions):
 
 
 def question_total_points(question):
-    slots = question.gradable_slot_count()
-    if slots <= 1:
-        return float(question.points or 1)
-    return float(slots)
+    return get_question_plan(question).total_points
 
 
 def count_filled_slots(question, user_answer):
-    slots = list_gradable_slots(question)
+    slots = get_question_plan(question).slots
     if len(slots) == 1 and slots[0].kind == 'single':
         if user_answer is None or user_answer == '':
             return 0
@@ -35,6 +33,7 @@ def count_filled_slots(question, user_answer):
 
 
 def count_filled_slots_for_test(questions, answers):
+    answers = decode_answers(answers)
     total = 0
     for q in questions:
         total += count_filled_slots(q, answers.get(str(q.pk), ''))
@@ -0,0 +1,241 @@
+"""Kompilyatsiya qilingan baholash rejasi — slotlar savol versiyasiga bir marta hisoblanadi.
+
+``list_gradable_slots`` har chaqiruvda [N] regexlarini qayta ishlatadi. Reja
+(slotlar, xom to'g'ri javoblar, bracket raqamlari, ball) savol mazmunidan olingan
+barmoq izi (fingerprint) bo'yicha LRU keshda saqlanadi: savol o'zgarsa — yangi
+reja, o'zgarmasa — tayyor obyekt.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from .slots import (
+    GradableSlot,
+    _answers_list,
+    _bracket_nums,
+    list_gradable_slots,
+    slot_correct_for_scoring,
+)
+
+PLAN_CACHE_SIZE = 4096
+TEST_PLAN_CACHE_SIZE = 256
+
+
+def _freeze_json(value):
+    try:
+        return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def question_fingerprint(question):
+    """Baholashga ta'sir qiluvchi maydonlar — savol "versiyasi"."""
+    return (
+        question.question_type,
+        question.question_text or '',
+        question.correct_answer or '',
+        _freeze_json(question.correct_answers_json),
+        _freeze_json(question.options_json),
+        question.mcq_select_count,
+        question.order,
+        question.points,
+    )
+
+
+def answer_key_version(test, questions):
+    """Test javob kaliti versiyasi — savollar fingerprintlari digesti."""
+    payload = repr((
+        test.test_type,
+        tuple((q.pk, q.part_number, question_fingerprint(q)) for q in questions),
+    ))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _display_int(value):
+    s = str(value)
+    return int(s) if s.isdigit() else value
+
+
+@dataclass(frozen=True)
+class QuestionPlan:
+    """Bitta savolning o'zgarmas baholash rejasi."""
+
+    slots: Tuple[GradableSlot, ...]
+    raw_correct: Tuple[str, ...]
+    bracket_nums: Tuple[str, ...]
+    total_points: float
+    slot_variants: Dict[str, FrozenSet[str]] = field(default_factory=dict)
+    fuzzy_tolerance: int = 1
+
+    def variants_for(self, key) -> Optional[FrozenSet[str]]:
+        """Slot uchun oldindan normallashtirilgan variantlar (bo'lmasa None)."""
+        return self.slot_variants.get(str(key))
+
+    @property
+    def slot_count(self):
+        return max(1, len(self.slots))
+
+    @property
+    def slot_points(self):
+        return self.total_points / self.slot_count
+
+    def indexed(self, kind):
+        """(slot, xom_to'g'ri_javob) juftlari — faqat shu turdagi slotlar."""
+        return [
+            (slot, raw)
+            for slot, raw in zip(self.slots, self.raw_correct)
+            if slot.kind == kind
+        ]
+
+    def dock_nums(self, buttons):
+        """Har slot uchun dock raqami; dock bo'lmasa — slot.display_num."""
+        blank_nums = {}
+        non_blank = []
+        for btn in buttons or ():
+            if btn['is_blank']:
+                blank_nums.setdefault(str(btn['blank_key']), btn['num'])
+            else:
+                non_blank.append(btn['num'])
+        nums = []
+        letter_idx = 0
+        for slot in self.slots:
+            num = None
+            if slot.kind in ('blank', 'matching'):
+                num = blank_nums.get(str(slot.key))
+            elif slot.kind == 'mcq_letter':
+                if letter_idx < len(non_blank):
+                    num = non_blank[letter_idx]
+                letter_idx += 1
+            elif slot.kind == 'single' and non_blank:
+                num = non_blank[0]
+            nums.append(_display_int(slot.display_num) if num is None else num)
+        return tuple(nums)
+
+
+@dataclass(frozen=True)
+class TestGradingPlan:
+    """Test versiyasi uchun: savol rejalari va slotlarning dock raqamlari."""
+
+    question_plans: Dict[int, QuestionPlan]
+    dock_nums: Dict[int, Tuple]
+    total_points: float
+    total_slots: int
+
+
+def compile_question_plan(question, with_variants=True):
+    answers = _answers_list(question)
+    nums = _bracket_nums(question)
+    slots = tuple(list_gradable_slots(question))
+    raw = tuple(
+        slot_correct_for_scoring(question, slot, answers=answers, nums=nums)
+        for slot in slots
+    )
+    if len(slots) <= 1:
+        total = float(question.points or 1)
+    else:
+        total = float(len(slots))
+    from .answer_normalizer import question_fuzzy_tolerance
+
+    variants = {}
+    if with_variants:
+        from .variant_index import compute_slot_variants, stored_slot_variants
+
+        variants = stored_slot_variants(question)
+        if variants is None:
+            variants = compute_slot_variants(question, slots, raw)
+    return QuestionPlan(
+        slots=slots,
+        raw_correct=raw,
+        bracket_nums=tuple(nums),
+        total_points=total,
+        slot_variants=variants,
+        fuzzy_tolerance=question_fuzzy_tolerance(question),
+    )
+
+
+class _LRU:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_plan_cache = _LRU(PLAN_CACHE_SIZE)
+_test_plan_cache = _LRU(TEST_PLAN_CACHE_SIZE)
+
+
+def get_question_plan(question):
+    """Keshdan reja; savol o'zgargan bo'lsa qayta kompilyatsiya."""
+    key = question_fingerprint(question)
+    cached = getattr(question, '_grading_plan', None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    plan = _plan_cache.get(key)
+    if plan is None:
+        plan = compile_question_plan(question)
+        _plan_cache.put(key, plan)
+    question._grading_plan = (key, plan)
+    return plan
+
+
+def get_test_plan(questions):
+    """Test savollari uchun reja — dock tugmalari bir marta quriladi."""
+    from .layout import get_test_layout
+
+    questions = list(questions)
+    if not questions:
+        return TestGradingPlan(question_plans={}, dock_nums={}, total_points=0.0, total_slots=0)
+    test = questions[0].test
+    key = (
+        test.pk,
+        test.test_type,
+        tuple((q.pk, q.part_number, question_fingerprint(q)) for q in questions),
+    )
+    plan = _test_plan_cache.get(key)
+    if plan is not None:
+        return plan
+
+    question_plans = {q.id: get_question_plan(q) for q in questions}
+    by_q = get_test_layout(test, questions).buttons_by_question()
+    plan = TestGradingPlan(
+        question_plans=question_plans,
+        dock_nums={
+            qid: qplan.dock_nums(by_q.get(qid, []))
+            for qid, qplan in question_plans.items()
+        },
+        total_points=sum(p.total_points for p in question_plans.values()),
+        total_slots=sum(p.slot_count for p in question_plans.values()),
+    )
+    _test_plan_cache.put(key, plan)
+    return plan
+
+
+def clear_plan_cache():
+    _plan_cache.clear()
+    _test_plan_cache.clear()
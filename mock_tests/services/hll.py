@@ -0,0 +1,81 @@
+"""HyperLogLog — unikal sessiyalarni taxminiy sanash uchun birlashtiriladigan eskiz.
+
+Eskiz ``2**HLL_PRECISION`` baytdan iborat (har registr — bitta bayt). Ikki
+eskizni birlashtirish registrlar bo'yicha maksimum, shuning uchun test × kun
+eskizlaridan istalgan oraliq (kunlar, testlar, test turi) hisoblanadi.
+
+Xato chegarasi: nisbiy standart xato ``1.04 / sqrt(m)``; ``HLL_PRECISION = 12``
+(m = 4096) da ≈ 1.6 %, ya'ni taxminan 95 % hollarda ±3.3 % ichida. Kichik
+sonlarda (≲ 2.5·m) chiziqli sanash ishlatiladi va natija deyarli aniq.
+"""
+import hashlib
+import math
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - numpy ixtiyoriy
+    np = None
+    NUMPY_AVAILABLE = False
+
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_STANDARD_ERROR = 1.04 / math.sqrt(HLL_REGISTERS)
+
+_HASH_BITS = 64
+_REST_BITS = _HASH_BITS - HLL_PRECISION
+_ALPHA = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+_INVERSE_POWERS = tuple(2.0 ** -rank for rank in range(_REST_BITS + 2))
+
+
+def empty_sketch():
+    return bytearray(HLL_REGISTERS)
+
+
+def sketch_position(value):
+    """Qiymat -> (registr indeksi, rang)."""
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+    h = int.from_bytes(digest, 'big')
+    index = h >> _REST_BITS
+    rest = h & ((1 << _REST_BITS) - 1)
+    rank = _REST_BITS - rest.bit_length() + 1
+    return index, rank
+
+
+def sketch_add(sketch, value):
+    """Eskizga qiymat qo'shish (joyida). Registr o'zgarsa — True."""
+    index, rank = sketch_position(value)
+    if sketch[index] >= rank:
+        return False
+    sketch[index] = rank
+    return True
+
+
+def merge_sketches(sketches):
+    """Registrlar bo'yicha maksimum; bo'sh/None eskizlar o'tkazib yuboriladi."""
+    sketches = [bytes(s) for s in sketches if s]
+    if not sketches:
+        return empty_sketch()
+    if len(sketches) == 1:
+        return bytearray(sketches[0])
+    if NUMPY_AVAILABLE:
+        matrix = np.frombuffer(b''.join(sketches), dtype=np.uint8).reshape(len(sketches), HLL_REGISTERS)
+        return bytearray(matrix.max(axis=0).tobytes())
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged = bytes(map(max, merged, sketch))
+    return bytearray(merged)
+
+
+def estimate_cardinality(sketch):
+    if not sketch:
+        return 0
+    m = HLL_REGISTERS
+    sketch = bytes(sketch)
+    zeros = sketch.count(0)
+    harmonic = sum(map(_INVERSE_POWERS.__getitem__, sketch))
+    estimate = _ALPHA * m * m / harmonic
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
@@ -0,0 +1,141 @@
+"""Admin amallari (o'chirish, qayta baholash) uchun bazadagi ish navbati (``MockTestJob``).
+
+Admin amali faqat ish qatorini yaratadi; ``run_test_jobs`` buyrug'i (cron
+yoki ``--loop``) navbatdan ishni ``select_for_update(skip_locked=True)`` bilan
+oladi va bajaradi. Jarayon qatorga yoziladi (``heartbeat_at`` bilan) —
+holatni istalgan web worker o'qiydi. Bajaruvchi jarayon o'lsa, ``heartbeat_at``
+``STALE_AFTER`` dan eski ``running`` ish qayta olinadi: ishlar qayta
+boshlashga chidamli (o'chirish qolganini o'chiradi, qayta baholash faqat
+o'zgargan natijalarni yozadi).
+
+Ish turi — ``HANDLERS`` dagi funksiya: ``handler(test_id, progress=…, **options)``,
+qaytaradi: bajarilgan birliklar soni; ``progress(done, total)``.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STALE_AFTER = timedelta(minutes=15)
+
+PURGE = 'purge'
+REGRADE = 'regrade'
+
+
+def _purge_handler(test_id, progress=None, **options):
+    from .purge import purge_test
+
+    return purge_test(test_id, progress=progress, **options)
+
+
+def _regrade_handler(test_id, progress=None, **options):
+    from mock_tests.models import MockTest
+
+    from .regrade import regrade_test_attempts
+
+    test = MockTest.objects.filter(pk=test_id).first()
+    if test is None:
+        return 0
+    stats = regrade_test_attempts(
+        test,
+        progress=(lambda stats, total: progress(stats.scanned, total)) if progress else None,
+        **options,
+    )
+    return stats.scanned
+
+
+HANDLERS = {
+    PURGE: _purge_handler,
+    REGRADE: _regrade_handler,
+}
+
+
+def enqueue_jobs(kind, test_ids, **options):
+    """Testlar uchun ish qo'shish; shu turdagi tugallanmagan ishi borlar o'tkazib yuboriladi."""
+    from mock_tests.models import MockTestJob
+
+    if kind not in HANDLERS:
+        raise ValueError(f"Noma'lum ish turi: {kind}")
+    test_ids = list(test_ids)
+    open_ids = set(
+        MockTestJob.objects.filter(
+            kind=kind, test_pk__in=test_ids, state__in=[MockTestJob.PENDING, MockTestJob.RUNNING],
+        ).values_list('test_pk', flat=True)
+    )
+    return MockTestJob.objects.bulk_create([
+        MockTestJob(kind=kind, test_pk=test_id, options=options)
+        for test_id in dict.fromkeys(test_ids)
+        if test_id not in open_ids
+    ])
+
+
+def job_status(kind, test_id):
+    """Test uchun oxirgi ish holati (lug'at) yoki None."""
+    from mock_tests.models import MockTestJob
+
+    job = MockTestJob.objects.filter(kind=kind, test_pk=test_id).order_by('-pk').first()
+    if job is None:
+        return None
+    status = {'state': job.state, 'done': job.done, 'total': job.total}
+    if job.error:
+        status['error'] = job.error
+    return status
+
+
+def claim_job(kinds=None):
+    """Navbatdagi (yoki to'xtab qolgan) ishni olish va ``running`` qilish."""
+    from mock_tests.models import MockTestJob
+
+    now = timezone.now()
+    with transaction.atomic():
+        qs = MockTestJob.objects.select_for_update(skip_locked=True).filter(
+            Q(state=MockTestJob.PENDING) | Q(state=MockTestJob.RUNNING, heartbeat_at__lt=now - STALE_AFTER),
+        )
+        if kinds is not None:
+            qs = qs.filter(kind__in=list(kinds))
+        job = qs.order_by('pk').first()
+        if job is None:
+            return None
+        job.state = MockTestJob.RUNNING
+        job.heartbeat_at = now
+        job.save(update_fields=['state', 'heartbeat_at'])
+    return job
+
+
+def run_job(job):
+    """Ishni bajarish; natija (``done``/``failed``) qatorga yoziladi."""
+    from mock_tests.models import MockTestJob
+
+    def progress(done, total):
+        job.done, job.total = done, total
+        MockTestJob.objects.filter(pk=job.pk).update(done=done, total=total, heartbeat_at=timezone.now())
+
+    try:
+        done = HANDLERS[job.kind](job.test_pk, progress=progress, **job.options)
+    except Exception as exc:
+        logger.exception('Fon ishi muvaffaqiyatsiz: %s', job)
+        job.state = MockTestJob.FAILED
+        job.error = str(exc)
+    else:
+        job.state = MockTestJob.DONE
+        job.done = done
+        if job.total is None or job.total < done:
+            job.total = done
+    job.finished_at = timezone.now()
+    job.save(update_fields=['state', 'done', 'total', 'error', 'finished_at'])
+    return job
+
+
+def run_pending_jobs(kinds=None, limit=None):
+    """Navbat bo'shaguncha (yoki ``limit`` ta) ish bajarish. Qaytaradi: bajarilgan ishlar."""
+    finished = []
+    while limit is None or len(finished) < limit:
+        job = claim_job(kinds)
+        if job is None:
+            break
+        finished.append(run_job(job))
+    return finished
@@ -0,0 +1,308 @@
+"""Test sahifasi tuzilmasi (layout) — dock raqamlari, partlar va yorliqlar bir marta.
+
+Oldin dock tugmalari bir so'rovda uch marta qurilar edi (part guruhlari,
+oraliq yorlig'i, baholash). ``TestLayout`` test versiyasi uchun bir marta
+hisoblanadi va faqat oddiy ma'lumotdan (ID, raqam, matn) iborat — model
+obyektlari render paytida ``part_groups()`` orqali ulanadi. Kesh ikki
+darajali: jarayon ichidagi LRU va Django cache (bir nechta worker uchun).
+
+Qaytarilgan tugma/yorliq dict lari keshdagi umumiy obyektlar — o'zgartirmang.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from django.core.cache import cache
+
+from .grading_plan import _LRU, get_question_plan, question_fingerprint
+from .ui_dock import display_label_for_question
+
+LAYOUT_VERSION = 1
+LAYOUT_CACHE_SIZE = 256
+LAYOUT_CACHE_TIMEOUT = 60 * 60 * 24
+
+_layout_cache = _LRU(LAYOUT_CACHE_SIZE)
+
+
+def build_blank_buttons(questions, start_num=0, sequential_only=False):
+    """Footer dock — ketma-ket raqamlar; listeningda qavs/IELTS raqami afzal.
+
+    Band qilingan eng katta butun raqam alohida saqlanadi, shuning uchun
+    raqamlash tugmalar soniga nisbatan chiziqli.
+    """
+    buttons = []
+    seq_fallback = start_num
+    used_nums = set()
+    max_numeric = None
+
+    def _mark(num):
+        nonlocal max_numeric
+        used_nums.add(num)
+        if isinstance(num, int) and (max_numeric is None or num > max_numeric):
+            max_numeric = num
+
+    def _pick_num(preferred):
+        nonlocal seq_fallback
+        if not sequential_only and preferred is not None and preferred not in used_nums:
+            _mark(preferred)
+            if isinstance(preferred, int):
+                seq_fallback = max(seq_fallback, preferred)
+            return preferred
+        if max_numeric is not None:
+            seq_fallback = max(seq_fallback, max_numeric)
+        seq_fallback += 1
+        while seq_fallback in used_nums:
+            seq_fallback += 1
+        _mark(seq_fallback)
+        return seq_fallback
+
+    def _preferred_num(value):
+        if sequential_only or value is None:
+            return None
+        if max_numeric is not None and isinstance(value, int) and value <= max_numeric:
+            return None
+        return value
+
+    def _append(question_id, is_blank, blank_key='', question_order=None):
+        if sequential_only:
+            num = None
+        elif is_blank and blank_key:
+            num = int(blank_key) if str(blank_key).isdigit() else blank_key
+        elif question_order is not None:
+            num = _preferred_num(question_order)
+        else:
+            num = None
+        buttons.append({
+            'num': _pick_num(num),
+            'question_id': question_id,
+            'is_blank': is_blank,
+            'blank_key': blank_key,
+        })
+
+    for q in sorted(questions, key=lambda x: (x.order, x.pk)):
+        slots = get_question_plan(q).slots
+        if len(slots) == 1 and slots[0].kind == 'single':
+            disp = slots[0].display_num
+            order_num = int(disp) if str(disp).isdigit() else disp
+            _append(q.pk, False, question_order=order_num)
+            continue
+        for slot in slots:
+            if slot.kind in ('blank', 'matching'):
+                _append(q.pk, True, slot.key)
+            else:
+                num = slot.display_num
+                order_num = int(num) if str(num).isdigit() else num
+                _append(q.pk, False, question_order=order_num)
+    return buttons, seq_fallback
+
+
+def _group_by_part(questions):
+    parts = {}
+    for q in questions:
+        parts.setdefault(q.part_number or 1, []).append(q)
+    return parts
+
+
+def build_test_dock_buttons(test, questions, start_num=0):
+    """Barcha dock tugmalari — avval part bo'yicha, keyin savol tartibida."""
+    parts = _group_by_part(questions)
+    sequential = test.test_type == 'reading'
+    all_buttons = []
+    offset = start_num
+    for part_num in sorted(parts.keys()):
+        buttons, offset = build_blank_buttons(parts[part_num], offset, sequential_only=sequential)
+        all_buttons.extend(buttons)
+    return all_buttons, offset
+
+
+def _range_label(buttons, orders):
+    if buttons:
+        start, end = buttons[0]['num'], buttons[-1]['num']
+        return str(start) if start == end else f'{start}-{end}'
+    start, end = min(orders), max(orders)
+    return f'{start}-{end}' if start != end else str(start)
+
+
+def instruction_group_ids(questions):
+    """Instruction bo'yicha guruhlar (faqat ID lar)."""
+    from mock_tests.question_admin_helpers import sanitize_block_instruction
+
+    groups = []
+    current_instr = None
+    bucket = []
+
+    def flush():
+        if not bucket:
+            return
+        instr = current_instr or ''
+        groups.append({
+            'instruction': instr,
+            'display_instruction': sanitize_block_instruction(instr, bucket),
+            'question_ids': tuple(q.pk for q in bucket),
+        })
+
+    for q in sorted(questions, key=lambda q: (q.order, q.pk)):
+        instr = q.instruction or ''
+        if bucket and instr != current_instr:
+            flush()
+            bucket = []
+        current_instr = instr
+        bucket.append(q)
+    flush()
+    return tuple(groups)
+
+
+def materialize_instruction_groups(groups, by_id):
+    """ID li guruhlar -> shablon guruhlari (savollar + birinchi rasm)."""
+    out = []
+    for group in groups:
+        bucket = [by_id[qid] for qid in group['question_ids']]
+        out.append({
+            'instruction': group['instruction'],
+            'display_instruction': group['display_instruction'],
+            'questions': bucket,
+            'image': next((q.image for q in bucket if q.image), None),
+        })
+    return out
+
+
+@dataclass(frozen=True)
+class PartLayout:
+    part_number: int
+    question_ids: Tuple[int, ...]
+    instruction_groups: Tuple[dict, ...]
+    blank_buttons: Tuple[dict, ...]
+    question_count: int
+    start_order: int
+    end_order: int
+    range_label: str
+    title: str
+    slug: str
+    audio_start_time: float
+
+
+@dataclass(frozen=True)
+class TestLayout:
+    parts: Tuple[PartLayout, ...]
+    dock_buttons: Tuple[dict, ...]
+    dock_map: Dict[int, Dict[str, object]]
+    dock_labels: Dict[int, str]
+    range_display: str
+    total_slots: int
+
+    def buttons_by_question(self):
+        by_q = {}
+        for btn in self.dock_buttons:
+            by_q.setdefault(btn['question_id'], []).append(btn)
+        return by_q
+
+    def part_groups(self, questions, passages):
+        """Shablon uchun part guruhlari — ID lar model obyektlariga ulanadi."""
+        by_id = {q.pk: q for q in questions}
+        passage_map = {p.order: p for p in passages}
+        groups = []
+        for part in self.parts:
+            groups.append({
+                'part_number': part.part_number,
+                'passage': passage_map.get(part.part_number),
+                'questions': [by_id[qid] for qid in part.question_ids],
+                'instruction_groups': materialize_instruction_groups(part.instruction_groups, by_id),
+                'blank_buttons': list(part.blank_buttons),
+                'question_count': part.question_count,
+                'start_order': part.start_order,
+                'end_order': part.end_order,
+                'range_label': part.range_label,
+                'title': part.title,
+                'slug': part.slug,
+                'audio_start_time': part.audio_start_time,
+            })
+        return groups
+
+
+def build_test_layout(test, questions):
+    questions = list(questions)
+    parts = _group_by_part(questions)
+    sequential = test.test_type == 'reading'
+    offset = 0
+    part_layouts = []
+    all_buttons = []
+    for part_num in sorted(parts.keys()):
+        qs = parts[part_num]
+        buttons, offset = build_blank_buttons(qs, offset, sequential_only=sequential)
+        all_buttons.extend(buttons)
+        orders = [q.order for q in qs]
+        audio_start_time = 0
+        if test.test_type == 'listening':
+            for q in qs:
+                if q.audio_timestamp is not None:
+                    audio_start_time = float(q.audio_timestamp)
+                    break
+        part_layouts.append(PartLayout(
+            part_number=part_num,
+            question_ids=tuple(q.pk for q in qs),
+            instruction_groups=instruction_group_ids(qs),
+            blank_buttons=tuple(buttons),
+            question_count=sum(get_question_plan(q).slot_count for q in qs),
+            start_order=min(orders),
+            end_order=max(orders),
+            range_label=_range_label(buttons, orders),
+            title=f'Task {part_num}' if test.test_type == 'writing' else f'Part {part_num}',
+            slug=f'part-{part_num}',
+            audio_start_time=audio_start_time,
+        ))
+
+    dock_map = {}
+    for btn in all_buttons:
+        dock_map.setdefault(btn['question_id'], {})[str(btn.get('blank_key') or '')] = btn['num']
+    dock_labels = {
+        q.pk: display_label_for_question(q, dock_map.get(q.pk, {}))
+        for q in questions
+    }
+    return TestLayout(
+        parts=tuple(part_layouts),
+        dock_buttons=tuple(all_buttons),
+        dock_map=dock_map,
+        dock_labels=dock_labels,
+        range_display=_range_label(all_buttons, [q.order for q in questions]) if questions else '0',
+        total_slots=sum(get_question_plan(q).slot_count for q in questions),
+    )
+
+
+def layout_version(test, questions):
+    """Tuzilmaga ta'sir qiluvchi maydonlar digesti."""
+    payload = repr((
+        LAYOUT_VERSION,
+        test.test_type,
+        tuple(
+            (
+                q.pk,
+                q.part_number,
+                q.instruction or '',
+                q.audio_timestamp,
+                question_fingerprint(q),
+            )
+            for q in questions
+        ),
+    ))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def get_test_layout(test, questions):
+    """Test versiyasi uchun keshdagi ``TestLayout``."""
+    questions = list(questions)
+    key = f'mock_tests:layout:{test.pk}:{layout_version(test, questions)}'
+    layout = _layout_cache.get(key)
+    if layout is not None:
+        return layout
+    layout = cache.get(key)
+    if layout is None:
+        layout = build_test_layout(test, questions)
+        cache.set(key, layout, LAYOUT_CACHE_TIMEOUT)
+    _layout_cache.put(key, layout)
+    return layout
+
+
+def clear_layout_cache():
+    _layout_cache.clear()
@@ -0,0 +1,82 @@
+"""Ko'p urinishli testlarni tez o'chirish — urinishlar cheklangan partiyalarda.
+
+Oddiy ``MockTest.delete()`` da Django collector barcha bog'liq
+``MockAttempt`` larni xotiraga yuklaydi. Bu yerda avval urinishlar (va kunlik
+yig'ma) ``batch_size`` lik ID partiyalari bilan o'chiriladi — ularda
+signal yo'q, shuning uchun har partiya bitta ``DELETE ... WHERE id IN``
+("fast delete") — va har partiya o'z tranzaksiyasida, jadval uzoq
+qulflanmaydi. Qolgan kichik qism (savollar, passage'lar, test) oddiy
+``delete()`` bilan.
+
+Admin amali testlarni nofaol qiladi va ``MockTestJob`` navbatiga qo'yadi
+(``queue_purge``) — o'chirishni ``run_test_jobs`` buyrug'i bajaradi, holat
+bazada (``purge_status``). ``purge_test`` buyrug'i esa darhol bajaradi va
+jarayonni ekranga chiqaradi.
+"""
+from django.db import transaction
+
+from .jobs import PURGE, enqueue_jobs, job_status
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+def _delete_batches(qs, batch_size, on_batch=None):
+    deleted = 0
+    while True:
+        ids = list(qs.order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            count, _ = qs.model.objects.filter(pk__in=ids).delete()
+        if not count:
+            # Hech narsa o'chmadi — cheksiz sikl bo'lmasin
+            return deleted
+        deleted += count
+        if on_batch is not None:
+            on_batch(deleted)
+
+
+def purge_attempts(test_id, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Test urinishlarini partiyalab o'chirish. ``progress(o'chirildi, jami)``."""
+    from mock_tests.models import MockAttempt
+
+    qs = MockAttempt.objects.filter(test_id=test_id)
+    total = qs.count()
+    if progress is not None:
+        progress(0, total)
+    return _delete_batches(
+        qs, batch_size, on_batch=(lambda n: progress(n, total)) if progress else None,
+    )
+
+
+def purge_test(test_id, batch_size=DEFAULT_BATCH_SIZE, keep_test=False, progress=None):
+    """Urinishlar, kunlik yig'ma va (``keep_test`` bo'lmasa) testning o'zini o'chirish.
+
+    Qaytaradi: o'chirilgan urinishlar soni.
+    """
+    from mock_tests.models import MockTest, MockTestDailyStat
+
+    deleted = purge_attempts(test_id, batch_size=batch_size, progress=progress)
+    _delete_batches(MockTestDailyStat.objects.filter(test_id=test_id), batch_size)
+    if not keep_test:
+        with transaction.atomic():
+            for test in MockTest.objects.filter(pk=test_id):
+                test.delete()
+    return deleted
+
+
+def queue_purge(test_ids, batch_size=DEFAULT_BATCH_SIZE, keep_test=False):
+    """O'chirishni navbatga qo'yish; testlar avval nofaol qilinadi (yangi urinish yo'q)."""
+    from mock_tests.models import MockTest
+
+    test_ids = list(test_ids)
+    MockTest.objects.filter(pk__in=test_ids).update(is_active=False)
+    return enqueue_jobs(PURGE, test_ids, batch_size=batch_size, keep_test=keep_test)
+
+
+def purge_status(test_id):
+    """Oxirgi o'chirish ishi holati: ``{'state', 'deleted', 'total'[, 'error']}`` yoki None."""
+    status = job_status(PURGE, test_id)
+    if status is not None:
+        status['deleted'] = status.pop('done')
+    return status
@@ -0,0 +1,331 @@
+"""Javob kalitlari linteri — butun savol bankini talaba xato ball olmasidan oldin tekshirish.
+
+Qoidalar admin/baholash bilan bir xil yordamchilarga tayanadi
+(``question_admin_helpers``, ``matching_utils``, ``mcq_utils``, ``services/slots``):
+
+* ``bracket_count`` — matndagi [N] soni ``correct_answers_json`` uzunligiga teng emas;
+* ``bracket_missing`` / ``bracket_duplicate`` — majburiy [N] yo'q yoki takrorlangan;
+* ``matching_unknown_letter`` — matching kalitida ``options_json`` da yo'q harf;
+* ``matching_unknown_item`` / ``matching_missing_key`` — kalit va qatorlar mos emas;
+* ``mcq_unknown_letter`` — MCQ kalitida variantlarda yo'q harf;
+* ``mcq_select_count`` — ``mcq_select_count`` kalitdagi harflar soniga teng emas;
+* ``empty_key`` — kalit umuman yo'q;
+* ``points_mismatch``, ``misplaced_instruction`` — ogohlantirish
+  (``fix_mock_questions`` tuzatadi).
+
+``lint_question_bank`` testlarni ``chunk_size`` lik bo'laklarda o'qiydi va
+ixtiyoriy fork process pool da tekshiradi (savollar asosiy jarayonda
+o'qiladi; ishchilar meros DB ulanishlarini uzadi va bazaga tegmaydi).
+Har test uchun xulosa (``{'errors': n, 'warnings': n}``) ``MockTest`` ning
+``lint_errors``/``lint_warnings`` maydonlariga kontent versiyasi belgisi
+(``lint_stamp``) bilan yoziladi — admin ro'yxatidagi "sog'lik" belgisi
+barcha worker'larda undan o'qiydi va test o'zgarganda o'z-o'zidan eskiradi.
+"""
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from django.template.loader import render_to_string
+
+from mock_tests.matching_utils import is_multi_matching_type, normalize_match_value
+from mock_tests.mcq_utils import get_mcq_correct_letters
+from mock_tests.models import MockQuestion, MockTest
+from mock_tests.question_admin_helpers import (
+    BRACKET_NUM_CAPTURE,
+    BRACKET_REQUIRED_TYPES,
+    find_bracket_numbers,
+    instruction_looks_like_question_body,
+)
+
+from .render_cache import content_version
+from .slots import BLANK_TYPES, FILL_SINGLE_BLANK_TYPES
+from .worker_pool import can_fork, chunked, fork_pool, map_bounded
+
+# Qoidalar o'zgarsa oshiring — eski sog'lik xulosalari ishlatilmaydi.
+LINT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 20
+REPORT_TEMPLATE = 'mock_tests/lint_report.html'
+
+ERROR = 'error'
+WARNING = 'warning'
+
+UNKEYED_TYPES = ('essay',)
+SUMMARY_TYPES = ('summary_box', 'sentence_completion', 'summary_completion')
+
+
+def _answers(question):
+    raw = question.correct_answers_json
+    if not isinstance(raw, list):
+        return []
+    return [str(a) for a in raw if a is not None and str(a).strip()]
+
+
+def _option_letters(options):
+    letters = set()
+    for option in options if isinstance(options, list) else []:
+        letter = option.get('letter') if isinstance(option, dict) else option
+        if letter not in (None, ''):
+            letters.add(normalize_match_value(letter))
+    return letters
+
+
+def _lint_blanks(question):
+    issues = []
+    text = question.question_text or ''
+    nums = find_bracket_numbers(text)
+    answers = _answers(question)
+    if question.question_type in BRACKET_REQUIRED_TYPES and text.strip() and not nums:
+        issues.append((ERROR, 'bracket_missing', "Matnda [N] bo'sh joy yo'q"))
+    duplicates = sorted(
+        (n for n, count in Counter(BRACKET_NUM_CAPTURE.findall(text)).items() if count > 1),
+        key=lambda n: int(n),
+    )
+    if duplicates:
+        issues.append((
+            ERROR, 'bracket_duplicate',
+            f"Takrorlangan bo'sh joy: {', '.join(f'[{n}]' for n in duplicates)}",
+        ))
+    if nums and answers and len(nums) != len(answers):
+        issues.append((
+            ERROR, 'bracket_count',
+            f'Bracket soni ({len(nums)}) javoblar soniga ({len(answers)}) teng emas',
+        ))
+    if not answers and not (question.question_type in FILL_SINGLE_BLANK_TYPES and question.correct_answer):
+        issues.append((ERROR, 'empty_key', "To'g'ri javob kiritilmagan"))
+    return issues
+
+
+def _lint_matching(question):
+    issues = []
+    correct = question.correct_answers_json
+    if not isinstance(correct, dict) or not correct:
+        return [(ERROR, 'empty_key', "Matching kaliti (correct_answers_json) bo'sh yoki dict emas")]
+    opts = question.options_json if isinstance(question.options_json, dict) else {}
+    if question.question_type == 'matching_headings':
+        options = opts.get('headings', []) or opts.get('options', [])
+    else:
+        options = opts.get('options', []) or opts.get('headings', [])
+    letters = _option_letters(options)
+    if letters:
+        unknown = sorted({normalize_match_value(v) for v in correct.values()} - letters)
+        if unknown:
+            issues.append((
+                ERROR, 'matching_unknown_letter',
+                f"Kalitda variantlarda yo'q harf(lar): {', '.join(unknown)}",
+            ))
+    items = opts.get('items', opts.get('paragraphs', []))
+    if isinstance(items, list) and items:
+        nums = {
+            str(item.get('num', i + 1)) if isinstance(item, dict) else str(i + 1)
+            for i, item in enumerate(items)
+        }
+        keys = {str(k) for k in correct}
+        if keys - nums:
+            issues.append((
+                ERROR, 'matching_unknown_item',
+                f"Kalitda qatorlarda yo'q raqam(lar): {', '.join(sorted(keys - nums))}",
+            ))
+        if nums - keys:
+            issues.append((
+                ERROR, 'matching_missing_key',
+                f"Javobsiz qator(lar): {', '.join(sorted(nums - keys))}",
+            ))
+    return issues
+
+
+def _lint_mcq(question):
+    issues = []
+    letters = get_mcq_correct_letters(question)
+    if not letters:
+        return [(ERROR, 'empty_key', "MCQ to'g'ri javobi kiritilmagan")]
+    available = _option_letters(question.get_choice_options())
+    unknown = [letter for letter in letters if letter not in available]
+    if unknown:
+        issues.append((
+            ERROR, 'mcq_unknown_letter',
+            f"Kalitda variantlarda yo'q harf(lar): {', '.join(unknown)}",
+        ))
+    select_count = question.get_mcq_select_count()
+    if len(letters) != select_count:
+        issues.append((
+            ERROR, 'mcq_select_count',
+            f'Tanlash soni {select_count}, kalitda {len(letters)} ta harf',
+        ))
+    return issues
+
+
+def lint_question(question):
+    """Savol -> [(daraja, kod, xabar)]."""
+    qtype = question.question_type
+    if qtype in UNKEYED_TYPES:
+        return []
+    if qtype in BLANK_TYPES:
+        issues = _lint_blanks(question)
+    elif is_multi_matching_type(qtype):
+        issues = _lint_matching(question)
+    elif qtype == 'mcq':
+        issues = _lint_mcq(question)
+    elif not (question.correct_answer or '').strip() and not _answers(question):
+        issues = [(ERROR, 'empty_key', "To'g'ri javob kiritilmagan")]
+    else:
+        issues = []
+    slots = max(1, question.gradable_slot_count())
+    if question.points != slots:
+        issues.append((WARNING, 'points_mismatch', f'Ball {question.points}, slotlar {slots}'))
+    if qtype in SUMMARY_TYPES and instruction_looks_like_question_body(question.instruction):
+        issues.append((WARNING, 'misplaced_instruction', "Ko'rsatma maydonida savol matni"))
+    return issues
+
+
+def _lint_tests(tests):
+    """[(test_id, [savollar])] -> {test_id: [muammo lug'atlari]} (ishchida ham chaqiriladi)."""
+    results = {}
+    for test_id, questions in tests:
+        results[test_id] = [
+            {
+                'test_id': test_id,
+                'question_id': q.pk,
+                'order': q.order,
+                'question_type': q.question_type,
+                'severity': severity,
+                'code': code,
+                'message': message,
+            }
+            for q in questions
+            for severity, code, message in lint_question(q)
+        ]
+    return results
+
+
+def summarize(issues):
+    return {
+        'errors': sum(1 for item in issues if item['severity'] == ERROR),
+        'warnings': sum(1 for item in issues if item['severity'] == WARNING),
+    }
+
+
+def health_stamp(test):
+    """Xulosa qaysi linter va kontent versiyasi uchun ekanini belgilash."""
+    return f'{LINT_VERSION}:{content_version(test)}'
+
+
+def stored_health(test):
+    """Testda saqlangan xulosa, agar joriy kontent uchun bo'lsa; aks holda None."""
+    if test.lint_errors is None or test.lint_stamp != health_stamp(test):
+        return None
+    return {'errors': test.lint_errors, 'warnings': test.lint_warnings or 0}
+
+
+def _store_health(results, stamps, tests=None):
+    """Xulosalarni ``MockTest`` ga yozish (``bulk_update``, signal/versiya o'zgarmaydi)."""
+    tests = tests or {}
+    objs = []
+    for test_id, issues in results.items():
+        obj = tests.get(test_id) or MockTest(pk=test_id)
+        summary = summarize(issues)
+        obj.lint_errors, obj.lint_warnings = summary['errors'], summary['warnings']
+        obj.lint_stamp = stamps[test_id]
+        objs.append(obj)
+    MockTest.objects.bulk_update(objs, ['lint_errors', 'lint_warnings', 'lint_stamp'])
+
+
+def _load_chunk(tests):
+    questions = defaultdict(list)
+    for q in MockQuestion.objects.filter(test__in=tests).order_by('order', 'pk'):
+        questions[q.test_id].append(q)
+    for test in tests:
+        for q in questions[test.pk]:
+            q.test = test
+    return [(test.pk, questions[test.pk]) for test in tests]
+
+
+def health_for_tests(tests):
+    """{test_id: xulosa} — saqlangan maydonlardan; eskirganlari bitta so'rov bilan hisoblanadi."""
+    tests = list(tests)
+    health = {}
+    missing = []
+    for test in tests:
+        summary = stored_health(test)
+        if summary is None:
+            missing.append(test)
+        else:
+            health[test.pk] = summary
+    if missing:
+        stamps = {test.pk: health_stamp(test) for test in missing}
+        results = _lint_tests(_load_chunk(missing))
+        _store_health(results, stamps, {test.pk: test for test in missing})
+        health.update({pk: summarize(issues) for pk, issues in results.items()})
+    return health
+
+
+def test_health(test):
+    """Bitta test sog'lik xulosasi (saqlangan; eskirgan bo'lsa hisoblab yoziladi)."""
+    return health_for_tests([test])[test.pk]
+
+
+@dataclass
+class LintReport:
+    tests: dict = field(default_factory=dict)  # test_id -> sarlavha
+    scanned_questions: int = 0
+    issues: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    def as_dict(self):
+        by_test = defaultdict(list)
+        for item in self.issues:
+            by_test[item['test_id']].append(item)
+        return {
+            'lint_version': LINT_VERSION,
+            'scanned_tests': len(self.tests),
+            'scanned_questions': self.scanned_questions,
+            **summarize(self.issues),
+            'seconds': round(self.seconds, 3),
+            'tests': [
+                {'test_id': test_id, 'title': title, **summarize(by_test[test_id]), 'issues': by_test[test_id]}
+                for test_id, title in self.tests.items()
+                if by_test[test_id]
+            ],
+        }
+
+
+def lint_question_bank(test_ids=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, progress=None):
+    """Barcha (yoki ``test_ids``) testlarni tekshirish -> ``LintReport``; testlardagi xulosa yangilanadi.
+
+    ``progress(report)`` har bo'lakdan keyin chaqiriladi.
+    """
+    tests = MockTest.objects.order_by('pk')
+    if test_ids is not None:
+        tests = tests.filter(pk__in=list(test_ids))
+    report = LintReport()
+    stamps = {}
+    started = time.perf_counter()
+
+    def _consume(chunk, results):
+        for test_id, questions in chunk:
+            report.scanned_questions += len(questions)
+            report.issues.extend(results[test_id])
+        _store_health(results, stamps)
+        report.seconds = time.perf_counter() - started
+        if progress:
+            progress(report)
+
+    def _loaded_chunks():
+        for tests_chunk in chunked(tests.iterator(chunk_size=max(1, chunk_size)), max(1, chunk_size)):
+            for test in tests_chunk:
+                report.tests[test.pk] = test.title
+                stamps[test.pk] = health_stamp(test)
+            yield _load_chunk(tests_chunk)
+
+    if workers <= 1 or not can_fork():
+        for chunk in _loaded_chunks():
+            _consume(chunk, _lint_tests(chunk))
+    else:
+        with fork_pool(workers) as pool:
+            map_bounded(pool, _lint_tests, _loaded_chunks(), workers, _consume)
+
+    report.issues.sort(key=lambda item: (item['test_id'], item['order'], item['question_id'], item['code']))
+    return report
+
+
+def render_html_report(report):
+    return render_to_string(REPORT_TEMPLATE, {'report': report.as_dict()})
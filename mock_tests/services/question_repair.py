@@ -0,0 +1,148 @@
+"""Savol bankini ommaviy tuzatish — ko'rsatma joyi va ballni slotlarga tenglashtirish.
+
+Savollar test bo'yicha ``iterator(chunk_size=…)`` bilan o'qiladi, har
+partiyada ``fix_misplaced_instruction`` va ``sync_points_from_slots``
+qo'llanadi va faqat o'zgargan qatorlar ``bulk_update`` bilan yoziladi.
+Ixtiyoriy ravishda partiyalar fork process pool ga tarqatiladi (ishchilar
+meros DB ulanishlarini uzadi va bazaga tegmaydi — faqat hisoblaydi; o'qish
+va yozish asosiy jarayonda).
+
+Natija — ``RepairReport``: har o'zgargan savol uchun maydonlar "oldin/keyin"
+farqi; ``as_dict()`` JSON hisobot uchun. ``bulk_update`` signal yubormaydi,
+shuning uchun o'zgargan testlarning hisoblagichlari va render kesh versiyasi
+shu yerda yangilanadi; matn o'zgarsa variant indeksi ham qayta quriladi.
+"""
+import time
+from dataclasses import dataclass, field
+
+from mock_tests.models import MockQuestion, MockTest
+from mock_tests.question_admin_helpers import fix_misplaced_instruction, sync_points_from_slots
+
+from .render_cache import bump_content_version
+from .test_counters import refresh_test_counters
+from .variant_index import refresh_variant_index
+from .worker_pool import can_fork, chunked, fork_pool, map_bounded
+
+DEFAULT_CHUNK_SIZE = 500
+DIFF_FIELDS = ('instruction', 'question_text', 'points')
+UPDATE_FIELDS = DIFF_FIELDS + ('answer_variants_json',)
+
+
+@dataclass
+class RepairReport:
+    dry_run: bool = False
+    scanned: int = 0
+    changes: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def changed(self):
+        return len(self.changes)
+
+    def fixed(self, fix):
+        return sum(1 for item in self.changes if fix in item['fixes'])
+
+    def as_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'scanned': self.scanned,
+            'changed': self.changed,
+            'instruction_fixed': self.fixed('instruction'),
+            'points_fixed': self.fixed('points'),
+            'seconds': round(self.seconds, 3),
+            'changes': self.changes,
+        }
+
+
+def repair_question(question):
+    """Savolni joyida tuzatish. Qaytaradi: farq yozuvi yoki None (o'zgarmadi)."""
+    before = {name: getattr(question, name) for name in DIFF_FIELDS}
+    fixes = []
+    if fix_misplaced_instruction(question):
+        fixes.append('instruction')
+    if sync_points_from_slots(question):
+        fixes.append('points')
+    if not fixes:
+        return None
+    refresh_variant_index(question)
+    return {
+        'question_id': question.pk,
+        'test_id': question.test_id,
+        'order': question.order,
+        'fixes': fixes,
+        'changes': {
+            name: {'before': before[name], 'after': getattr(question, name)}
+            for name in DIFF_FIELDS
+            if before[name] != getattr(question, name)
+        },
+    }
+
+
+def _repair_chunk(questions):
+    """Savollar -> [(farq yozuvi, yangi maydon qiymatlari)] (faqat o'zgarganlar)."""
+    changed = []
+    for question in questions:
+        record = repair_question(question)
+        if record is not None:
+            changed.append((record, {name: getattr(question, name) for name in UPDATE_FIELDS}))
+    return changed
+
+
+def _test_chunks(tests, chunk_size):
+    for test in tests:
+        qs = MockQuestion.objects.filter(test=test).order_by('pk')
+        for chunk in chunked(qs.iterator(chunk_size=chunk_size), chunk_size):
+            for q in chunk:
+                q.test = test
+            yield chunk
+
+
+def _write_changed(changed, batch_size):
+    objs = []
+    for record, values in changed:
+        obj = MockQuestion(pk=record['question_id'])
+        for name, value in values.items():
+            setattr(obj, name, value)
+        objs.append(obj)
+    MockQuestion.objects.bulk_update(objs, UPDATE_FIELDS, batch_size=batch_size)
+
+
+def repair_questions(test_ids=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, dry_run=False, progress=None):
+    """Savollarni (``test_ids`` bo'lsa — faqat shu testlarda) tuzatish -> ``RepairReport``.
+
+    ``progress(report)`` har partiyadan keyin chaqiriladi.
+    """
+    chunk_size = max(1, chunk_size)
+    tests = MockTest.objects.order_by('pk')
+    if test_ids is not None:
+        tests = tests.filter(pk__in=list(test_ids))
+    tests = list(tests)
+    report = RepairReport(dry_run=dry_run)
+    touched = set()
+    started = time.perf_counter()
+
+    def _consume(questions, changed):
+        report.scanned += len(questions)
+        if changed and not dry_run:
+            _write_changed(changed, chunk_size)
+        for record, _values in changed:
+            report.changes.append(record)
+            touched.add(record['test_id'])
+        report.seconds = time.perf_counter() - started
+        if progress:
+            progress(report)
+
+    chunks = _test_chunks(tests, chunk_size)
+    if workers <= 1 or not can_fork():
+        for questions in chunks:
+            _consume(questions, _repair_chunk(questions))
+    else:
+        with fork_pool(workers) as pool:
+            map_bounded(pool, _repair_chunk, chunks, workers, _consume)
+
+    if not dry_run:
+        for test_id in sorted(touched):
+            refresh_test_counters(test_id)
+            bump_content_version(test_id)
+    report.changes.sort(key=lambda item: (item['test_id'], item['order'], item['question_id']))
+    return report
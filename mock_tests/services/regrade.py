@@ -0,0 +1,145 @@
+"""Tugallangan urinishlarni qayta baholash — javob kaliti tuzatilgandan keyin.
+
+Urinishlar ``iterator(chunk_size=…)`` bilan oqimda o'qiladi, ``score_attempt``
+orqali (ixtiyoriy process pool da) baholanadi va faqat natijasi o'zgarganlar
+``bulk_update`` bilan partiyalab yoziladi. Ixcham ``answers_json`` asosiy
+jarayonda ochiladi (layout ``MockAnswerLayout`` dan o'qiladi) — pool
+ishchilari bazaga tegmaydi.
+"""
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+from mock_tests.models import MockAttempt
+
+from .answer_codec import decode_answers
+from .rollups import rebuild_daily_stats
+from .scoring import score_attempt
+from .worker_pool import can_fork, chunked, fork_pool, map_bounded
+
+DEFAULT_CHUNK_SIZE = 500
+RESULT_FIELDS = ['correct_count', 'total_questions', 'score_percent', 'ielts_band']
+
+_worker_state = {}
+
+
+@dataclass
+class RegradeStats:
+    scanned: int = 0
+    changed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def per_second(self):
+        return self.scanned / self.seconds if self.seconds else 0.0
+
+
+def _band_decimal(band):
+    if band is None:
+        return None
+    return Decimal(str(band)).quantize(Decimal('0.1'))
+
+
+def apply_score_result(attempt, result):
+    """score_attempt natijasini urinish maydonlariga yozish (saqlamaydi)."""
+    attempt.correct_count = result['correct_count']
+    attempt.total_questions = result['total_questions']
+    attempt.score_percent = result['score_percent']
+    if result.get('ielts_band') is not None:
+        attempt.ielts_band = result['ielts_band']
+
+
+def _score_rows(test, questions, rows):
+    """[(pk, javoblar, *eski_natija)] -> o'zgargan natijalar [(pk, c, t, s, b)].
+
+    ``javoblar`` — ochilgan (oddiy) lug'at, ``_decoded_rows`` dan.
+    """
+    changed = []
+    for pk, answers, old_correct, old_total, old_score, old_band in rows:
+        attempt = MockAttempt(pk=pk, test=test, answers_json=answers or {})
+        result = score_attempt(attempt, questions)
+        new = (
+            result['correct_count'],
+            result['total_questions'],
+            result['score_percent'],
+            _band_decimal(result.get('ielts_band')),
+        )
+        old = (
+            old_correct,
+            old_total,
+            Decimal(old_score).quantize(Decimal('0.01')) if old_score is not None else None,
+            _band_decimal(old_band),
+        )
+        if new != old:
+            changed.append((pk, *new))
+    return changed
+
+
+def _init_worker(test, questions):
+    _worker_state['test'] = test
+    _worker_state['questions'] = questions
+
+
+def _score_rows_in_worker(rows):
+    return _score_rows(_worker_state['test'], _worker_state['questions'], rows)
+
+
+def _decoded_rows(rows):
+    """Ixcham javoblarni ochish — asosiy jarayonda (layout so'rovi shu yerda)."""
+    return [(pk, decode_answers(answers), *rest) for pk, answers, *rest in rows]
+
+
+def _write_changed(changed, batch_size):
+    if not changed:
+        return 0
+    objs = []
+    for pk, correct, total, score, band in changed:
+        obj = MockAttempt(pk=pk)
+        obj.correct_count = correct
+        obj.total_questions = total
+        obj.score_percent = score
+        obj.ielts_band = band
+        objs.append(obj)
+    MockAttempt.objects.bulk_update(objs, RESULT_FIELDS, batch_size=batch_size)
+    return len(objs)
+
+
+def regrade_test_attempts(test, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, dry_run=False, progress=None):
+    """Test bo'yicha barcha tugallangan urinishlarni qayta baholash.
+
+    ``progress(stats, total)`` har partiyadan keyin chaqiriladi.
+    """
+    chunk_size = max(1, chunk_size)
+    questions = list(test.questions.all())
+    for q in questions:
+        q.test = test
+    qs = (
+        MockAttempt.objects.filter(test=test, is_finished=True)
+        .order_by('pk')
+        .values_list('pk', 'answers_json', *RESULT_FIELDS)
+    )
+    total = qs.count()
+    stats = RegradeStats()
+    started = time.perf_counter()
+
+    def _consume(rows, changed):
+        stats.scanned += len(rows)
+        if not dry_run:
+            _write_changed(changed, chunk_size)
+        stats.changed += len(changed)
+        stats.seconds = time.perf_counter() - started
+        if progress:
+            progress(stats, total)
+
+    chunks = (_decoded_rows(rows) for rows in chunked(qs.iterator(chunk_size=chunk_size), chunk_size))
+    if workers <= 1 or total <= chunk_size or not can_fork():
+        for rows in chunks:
+            _consume(rows, _score_rows(test, questions, rows))
+    else:
+        with fork_pool(workers, initializer=_init_worker, initargs=(test, questions)) as pool:
+            map_bounded(pool, _score_rows_in_worker, chunks, workers, _consume)
+
+    if stats.changed and not dry_run:
+        # bulk_update save() ni chetlab o'tadi — kunlik yig'ma qayta quriladi.
+        rebuild_daily_stats(test_ids=[test.pk])
+    return stats
@@ -0,0 +1,65 @@
+"""test_take sahifasi uchun javobga bog'liq bo'lmagan render keshi.
+
+Savol/passage markupi (``_take_body.html``) barcha talabalar uchun bir xil —
+u test kontent versiyasi uchun bir marta render qilinib Django cache da
+saqlanadi. Saqlangan javoblar sahifaga faqat ``saved-answers-data`` JSON
+sifatida qo'shiladi va JS da tiklanadi.
+
+Kontent versiyasi — ``MockTest.content_updated_at`` (bazada, barcha
+jarayonlar uchun bitta). MockTest, MockPassage yoki MockQuestion
+saqlansa/o'chirilsa (``mock_tests.signals``) yoki import/nusxalash/tuzatish
+ommaviy yo'llari savollarni o'zgartirsa, ``bump_content_version`` uni
+``UPDATE`` bilan yangilaydi. Versiya render kaliti ichida — boshqa worker
+keshidagi eski markup yangi versiya bilan hech qachon o'qilmaydi.
+"""
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+# Shablon yoki kontekst shakli o'zgarsa oshiring.
+TAKE_RENDER_VERSION = 2
+TAKE_RENDER_TIMEOUT = 60 * 60 * 24
+TAKE_BODY_TEMPLATE = 'mock_tests/_take_body.html'
+
+
+def content_version(test):
+    """Test (obyekt yoki ID) kontentining joriy versiyasi — kesh kalitlari uchun."""
+    from mock_tests.models import MockTest
+
+    if isinstance(test, MockTest):
+        updated = test.content_updated_at
+    else:
+        updated = MockTest.objects.filter(pk=test).values_list('content_updated_at', flat=True).first()
+    if updated is None:
+        return '0'
+    return updated.strftime('%Y%m%d%H%M%S%f')
+
+
+def bump_content_version(test):
+    """Test (obyekt yoki ID) kontenti o'zgardi — versiyani bazada yangilash."""
+    from mock_tests.models import MockTest
+
+    test_id = getattr(test, 'pk', test)
+    if test_id is None:
+        return
+    now = timezone.now()
+    MockTest.objects.filter(pk=test_id).update(content_updated_at=now)
+    if isinstance(test, MockTest):
+        test.content_updated_at = now
+
+
+def take_body_key(test):
+    return f'mock_tests:take_body:v{TAKE_RENDER_VERSION}:{test.pk}:{content_version(test)}'
+
+
+def get_take_body(test, build_context):
+    """Keshdagi markup yoki ``build_context()`` bilan render qilib saqlash.
+
+    ``build_context`` faqat kesh bo'sh bo'lganda chaqiriladi.
+    """
+    key = take_body_key(test)
+    body = cache.get(key)
+    if body is None:
+        body = render_to_string(TAKE_BODY_TEMPLATE, build_context())
+        cache.set(key, body, TAKE_RENDER_TIMEOUT)
+    return body
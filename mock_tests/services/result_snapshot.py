@@ -0,0 +1,125 @@
+"""Natija sahifasi uchun saqlangan snapshot — har ko'rishda qayta baholamaslik.
+
+Tugatishda ``score_attempt`` natijasi ``MockAttempt.result_snapshot`` ga ixcham
+ko'rinishda yoziladi:
+
+    {"v": 1, "k": "<kalit versiyasi>", "t": {...jami...}, "r": [[...qator...], ...]}
+
+Qatorlarda izoh (explanation) matni takrorlanmaydi — u render paytida savoldan
+olinadi. Kalit versiyasi (``answer_key_version``) o'zgarsa snapshot eskirgan
+hisoblanadi va bir marta qayta quriladi.
+"""
+from decimal import Decimal
+
+from .grading_plan import answer_key_version
+from .regrade import apply_score_result
+from .scoring import score_attempt
+
+SNAPSHOT_VERSION = 1
+
+# "r" qatoridagi ustunlar tartibi
+ROW_FIELDS = (
+    'question_id',
+    'order',
+    'question_order',
+    'label',
+    'is_correct',
+    'earned_points',
+    'max_points',
+    'user_answer_display',
+    'correct_answer',
+    'is_essay',
+)
+
+
+def build_result_snapshot(result, key_version):
+    rows = [
+        [
+            item['question_id'],
+            item['order'],
+            item['question_order'],
+            item['label'],
+            1 if item['is_correct'] else 0,
+            item['earned_points'],
+            item['max_points'],
+            item['user_answer_display'],
+            item['correct_answer'],
+            1 if item.get('is_essay') else 0,
+        ]
+        for item in result['details']
+    ]
+    band = result.get('ielts_band')
+    return {
+        'v': SNAPSHOT_VERSION,
+        'k': key_version,
+        't': {
+            'correct_count': result['correct_count'],
+            'earned_points': result['earned_points'],
+            'total_points': result['total_points'],
+            'total_questions': result['total_questions'],
+            'score_percent': str(result['score_percent']),
+            'ielts_band': float(band) if band is not None else None,
+        },
+        'r': rows,
+    }
+
+
+def store_result_snapshot(attempt, result, questions):
+    """Snapshotni urinishga yozish (saqlamaydi)."""
+    attempt.result_snapshot = build_result_snapshot(
+        result, answer_key_version(attempt.test, questions),
+    )
+
+
+def result_from_snapshot(attempt, questions, key_version=None):
+    """Snapshot yaroqli bo'lsa — score_attempt bilan bir xil shakldagi dict, aks holda None."""
+    snap = attempt.result_snapshot
+    if not isinstance(snap, dict) or snap.get('v') != SNAPSHOT_VERSION:
+        return None
+    if key_version is None:
+        key_version = answer_key_version(attempt.test, questions)
+    if snap.get('k') != key_version:
+        return None
+
+    by_id = {q.id: q for q in questions}
+    details = []
+    for values in snap.get('r', []):
+        item = dict(zip(ROW_FIELDS, values))
+        question = by_id.get(item['question_id'])
+        if question is None:
+            return None
+        item['is_correct'] = bool(item['is_correct'])
+        item['is_essay'] = bool(item['is_essay'])
+        item['question_type'] = question.question_type
+        item['question_type_label'] = question.get_result_type_label()
+        item['explanation'] = question.explanation
+        details.append(item)
+
+    totals = snap['t']
+    score_percent = Decimal(totals['score_percent'])
+    return {
+        'correct_count': totals['correct_count'],
+        'earned_points': totals['earned_points'],
+        'total_points': totals['total_points'],
+        'ielts_band': totals['ielts_band'],
+        'total_questions': totals['total_questions'],
+        'score_percent': score_percent,
+        'passed': float(score_percent) >= attempt.test.passing_score,
+        'details': details,
+    }
+
+
+def get_attempt_result(attempt, questions):
+    """Natija sahifasi uchun: snapshotdan o'qish yoki (kalit o'zgargan bo'lsa) qayta qurish."""
+    key_version = answer_key_version(attempt.test, questions)
+    result = result_from_snapshot(attempt, questions, key_version=key_version)
+    if result is not None:
+        return result
+
+    result = score_attempt(attempt, questions)
+    apply_score_result(attempt, result)
+    attempt.result_snapshot = build_result_snapshot(result, key_version)
+    attempt.save(update_fields=[
+        'correct_count', 'total_questions', 'score_percent', 'ielts_band', 'result_snapshot',
+    ])
+    return result
@@ -0,0 +1,316 @@
+"""Test × kun yig'ma statistikasi (``MockTestDailyStat``) — inkremental yangilanadi.
+
+``MockAttempt.save`` har saqlashda eski va yangi holatni solishtiradi va farqni
+``F()`` ifodalari bilan tegishli kun qatoriga qo'shadi: yaratilganda
+``started_count``, tugaganda ``finished_count``, ball/band yig'indilari va
+davomiylik gistogrammasi. Ball keyinroq o'zgarsa (snapshot qayta qurilishi)
+eski hissa ayiriladi, yangisi qo'shiladi. Unikal sessiyalar yig'indi bilan
+qo'shilmaydi — ular uchun har qatorda HyperLogLog eskizlari saqlanadi
+(``services/hll.py``) va oraliq so'rovlari eskizlarni birlashtiradi.
+
+Eskiz yangilanishi urinish yaratish yo'lida kun qatorini qulflamaydi: registr
+yangilanishi ``MockSessionSketchDelta`` ga INSERT qilinadi, ``fold_session_sketches``
+(``fold_session_sketches`` buyrug'i yoki unikal sessiyalar o'qilishidan oldin)
+ularni partiyalab eskizlarga qo'shadi. Registrlar bo'yicha maksimum idempotent —
+takroriy qo'shish natijani o'zgartirmaydi.
+
+``bulk_update``/``QuerySet.update``/``delete`` ``save`` ni chetlab o'tadi — bunday
+joylar ``rebuild_daily_stats`` ni chaqiradi (yoki ``backfill_daily_stats``).
+"""
+from bisect import bisect_right
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .hll import estimate_cardinality, merge_sketches, sketch_add, sketch_position
+
+# Davomiylik chegaralari (daqiqa) va ularga mos ustunlar
+DURATION_BUCKETS = (10, 20, 30, 45, 60)
+BUCKET_FIELDS = ('dur_lt_10', 'dur_10_20', 'dur_20_30', 'dur_30_45', 'dur_45_60', 'dur_60_plus')
+BUCKET_LABELS = ('<10', '10–20', '20–30', '30–45', '45–60', '60+')
+
+SKETCH_FIELDS = {False: 'session_hll', True: 'finished_session_hll'}
+FOLD_BATCH_SIZE = 5000
+
+_TRACKED_FIELDS = ('test_id', 'is_finished', 'finished_at', 'started_at', 'score_percent', 'ielts_band')
+
+
+def local_day(value):
+    if value is None:
+        return None
+    if timezone.is_naive(value):
+        return value.date()
+    return timezone.localdate(value)
+
+
+def duration_bucket(started_at, finished_at):
+    if started_at is None or finished_at is None:
+        return None
+    minutes = max((finished_at - started_at).total_seconds(), 0) / 60
+    return bisect_right(DURATION_BUCKETS, minutes)
+
+
+def attempt_rollup_state(attempt):
+    """Yig'maga ta'sir qiluvchi holat; maydonlar deferred bo'lsa — None (kuzatilmaydi)."""
+    if attempt.get_deferred_fields().intersection(_TRACKED_FIELDS):
+        return None
+    finished = None
+    if attempt.is_finished and attempt.finished_at is not None:
+        finished = (
+            local_day(attempt.finished_at),
+            attempt.score_percent,
+            attempt.ielts_band,
+            duration_bucket(attempt.started_at, attempt.finished_at),
+        )
+    return (attempt.test_id, finished)
+
+
+def _finish_deltas(finished, sign):
+    _day, score, band, bucket = finished
+    deltas = {'finished_count': sign}
+    if score is not None:
+        deltas['score_sum'] = Decimal(score) * sign
+        deltas['score_count'] = sign
+    if band is not None:
+        deltas['band_sum'] = Decimal(str(band)) * sign
+        deltas['band_count'] = sign
+    if bucket is not None:
+        deltas[BUCKET_FIELDS[bucket]] = sign
+    return deltas
+
+
+def bump_daily_stat(test_id, day, deltas):
+    """Kun qatoriga deltalarni atomar qo'shish (qator bo'lmasa yaratiladi)."""
+    from mock_tests.models import MockTestDailyStat
+
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas or day is None:
+        return
+    qs = MockTestDailyStat.objects.filter(test_id=test_id, day=day)
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if qs.update(**updates):
+        return
+    if any(value < 0 for value in deltas.values()):
+        # Ayiriladigan hissaning qatori yo'q — yig'ma allaqachon qayta qurilgan.
+        return
+    try:
+        with transaction.atomic():
+            MockTestDailyStat.objects.create(test_id=test_id, day=day, **deltas)
+    except IntegrityError:
+        qs.update(**updates)
+
+
+def buffer_session_sketch(test_id, day, session_key, finished=False):
+    """Sessiyani kun eskiziga qo'shish uchun buferga yozish (qator qulflanmaydi)."""
+    from mock_tests.models import MockSessionSketchDelta
+
+    if not session_key or day is None:
+        return
+    register, rank = sketch_position(session_key)
+    MockSessionSketchDelta.objects.create(
+        test_id=test_id, day=day, finished=finished, register=register, rank=rank,
+    )
+
+
+def fold_session_sketches(batch_size=FOLD_BATCH_SIZE):
+    """Buferdagi registr yangilanishlarini kun qatorlari eskizlariga qo'shish.
+
+    Faqat chaqiruv boshidagi yozuvlar qayta ishlanadi (keyin kelganlari
+    keyingi safar). Kun qatori hali yo'q bo'lsa yangilanish tashlanadi —
+    ``rebuild_daily_stats`` eskizni urinishlardan to'liq quradi.
+    Qaytaradi: qayta ishlangan yozuvlar soni.
+    """
+    from mock_tests.models import MockSessionSketchDelta, MockTestDailyStat
+
+    last_pk = MockSessionSketchDelta.objects.order_by('-pk').values_list('pk', flat=True).first()
+    if last_pk is None:
+        return 0
+    folded = 0
+    while True:
+        rows = list(
+            MockSessionSketchDelta.objects.filter(pk__lte=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'test_id', 'day', 'finished', 'register', 'rank')[:max(1, batch_size)]
+        )
+        if not rows:
+            return folded
+        registers = {}
+        for _pk, test_id, day, finished, register, rank in rows:
+            target = registers.setdefault((test_id, day), {}).setdefault(SKETCH_FIELDS[finished], {})
+            if rank > target.get(register, 0):
+                target[register] = rank
+        with transaction.atomic():
+            stats = (
+                MockTestDailyStat.objects.select_for_update()
+                .filter(test_id__in={key[0] for key in registers}, day__in={key[1] for key in registers})
+                .order_by('pk')
+                .values_list('pk', 'test_id', 'day', *SKETCH_FIELDS.values())
+            )
+            for pk, test_id, day, *raws in stats:
+                fields = registers.get((test_id, day))
+                if not fields:
+                    continue
+                updates = {}
+                for field, raw in zip(SKETCH_FIELDS.values(), raws):
+                    if field not in fields:
+                        continue
+                    sketch = merge_sketches([raw])
+                    changed = False
+                    for register, rank in fields[field].items():
+                        if sketch[register] < rank:
+                            sketch[register] = rank
+                            changed = True
+                    if changed:
+                        updates[field] = bytes(sketch)
+                if updates:
+                    MockTestDailyStat.objects.filter(pk=pk).update(**updates)
+            MockSessionSketchDelta.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        folded += len(rows)
+
+
+def record_attempt_change(old_state, attempt, created=False):
+    """``MockAttempt.save`` dan keyin: eski/yangi holat farqini yig'maga yozish."""
+    new_state = attempt_rollup_state(attempt)
+    if new_state is None:
+        return
+    if created:
+        day = local_day(attempt.started_at)
+        bump_daily_stat(attempt.test_id, day, {'started_count': 1})
+        buffer_session_sketch(attempt.test_id, day, attempt.session_key)
+    elif old_state is None:
+        return
+    old_finished = old_state[1] if old_state else None
+    new_finished = new_state[1]
+    if old_state and old_state[0] == new_state[0] and old_finished == new_finished:
+        return
+    if old_finished is not None:
+        bump_daily_stat(old_state[0], old_finished[0], _finish_deltas(old_finished, -1))
+    if new_finished is not None:
+        bump_daily_stat(new_state[0], new_finished[0], _finish_deltas(new_finished, 1))
+        if old_finished is None or old_finished[0] != new_finished[0] or old_state[0] != new_state[0]:
+            buffer_session_sketch(new_state[0], new_finished[0], attempt.session_key, finished=True)
+
+
+def _duration_filters():
+    edges = (None,) + tuple(timedelta(minutes=m) for m in DURATION_BUCKETS) + (None,)
+    filters = {}
+    for i, field in enumerate(BUCKET_FIELDS):
+        lo, hi = edges[i], edges[i + 1]
+        cond = Q()
+        if lo is not None:
+            cond &= Q(duration__gte=lo)
+        if hi is not None:
+            cond &= Q(duration__lt=hi)
+        filters[field] = Count('id', filter=cond)
+    return filters
+
+
+def rebuild_daily_stats(test_ids=None, since=None):
+    """Yig'mani ``MockAttempt`` dan qayta hisoblash. Qaytaradi: yozilgan qatorlar soni.
+
+    Arxivlangan oylar (``attempt_archive``) uchun urinishlar bazada yo'q, shuning
+    uchun ularning yig'masi o'chirilmaydi va qayta hisoblanmaydi. Butun tarix
+    (``since`` yo'q) qayta qurilsa testlar ``daily_stats_complete`` deb belgilanadi.
+    """
+    from mock_tests.models import MockAttempt, MockTest, MockTestDailyStat
+
+    from .attempt_archive import archived_until
+
+    full_history = since is None
+    floor = archived_until()
+    if floor is not None and (since is None or since < floor):
+        since = floor
+    attempts = MockAttempt.objects.all()
+    stats = MockTestDailyStat.objects.all()
+    if test_ids is not None:
+        attempts = attempts.filter(test_id__in=list(test_ids))
+        stats = stats.filter(test_id__in=list(test_ids))
+
+    started = attempts.annotate(day=TruncDate('started_at'))
+    finished = attempts.filter(is_finished=True, finished_at__isnull=False).annotate(
+        day=TruncDate('finished_at'),
+        duration=ExpressionWrapper(F('finished_at') - F('started_at'), output_field=DurationField()),
+    )
+    if since is not None:
+        started = started.filter(day__gte=since)
+        finished = finished.filter(day__gte=since)
+        stats = stats.filter(day__gte=since)
+
+    rows = {}
+    for row in started.values('test_id', 'day').annotate(n=Count('id')).order_by():
+        rows.setdefault((row['test_id'], row['day']), {})['started_count'] = row['n']
+    for row in (
+        finished.values('test_id', 'day')
+        .annotate(
+            finished_count=Count('id'),
+            score_sum=Sum('score_percent'),
+            score_count=Count('score_percent'),
+            band_sum=Sum('ielts_band'),
+            band_count=Count('ielts_band'),
+            **_duration_filters(),
+        )
+        .order_by()
+    ):
+        key = (row.pop('test_id'), row.pop('day'))
+        target = rows.setdefault(key, {})
+        for field, value in row.items():
+            target[field] = value or 0
+
+    sketches = {}
+    for field, qs in (('session_hll', started), ('finished_session_hll', finished)):
+        for test_id, day, session_key in qs.values_list('test_id', 'day', 'session_key').iterator():
+            if session_key:
+                sketch = sketches.get((test_id, day, field))
+                if sketch is None:
+                    sketch = sketches[(test_id, day, field)] = merge_sketches([])
+                sketch_add(sketch, session_key)
+
+    objs = []
+    for (test_id, day), values in rows.items():
+        for field in ('session_hll', 'finished_session_hll'):
+            sketch = sketches.get((test_id, day, field))
+            values[field] = bytes(sketch) if sketch is not None else None
+        objs.append(MockTestDailyStat(test_id=test_id, day=day, **values))
+    with transaction.atomic():
+        stats.delete()
+        MockTestDailyStat.objects.bulk_create(objs, batch_size=1000)
+        if full_history:
+            tests = MockTest.objects.filter(daily_stats_complete=False)
+            if test_ids is not None:
+                tests = tests.filter(pk__in=list(test_ids))
+            tests.update(daily_stats_complete=True)
+    return len(objs)
+
+
+def unique_sessions_by(group_by=None, finished=False, since=None, until=None, **filters):
+    """Oraliq bo'yicha unikal sessiyalar (HLL taxmini) — kun eskizlari birlashtiriladi.
+
+    ``group_by`` — masalan ``'test_id'`` yoki ``'test__test_type'``; None bo'lsa
+    ``{None: son}``. ``filters`` ``MockTestDailyStat`` ga uzatiladi. Avval
+    buferdagi yangilanishlar eskizlarga qo'shiladi.
+    """
+    from mock_tests.models import MockTestDailyStat
+
+    fold_session_sketches()
+    field = 'finished_session_hll' if finished else 'session_hll'
+    qs = MockTestDailyStat.objects.filter(**{f'{field}__isnull': False}, **filters)
+    if since is not None:
+        qs = qs.filter(day__gte=since)
+    if until is not None:
+        qs = qs.filter(day__lte=until)
+    groups = {}
+    if group_by is None:
+        for raw in qs.values_list(field, flat=True).iterator():
+            groups.setdefault(None, []).append(raw)
+    else:
+        for key, raw in qs.values_list(group_by, field).iterator():
+            groups.setdefault(key, []).append(raw)
+    return {key: estimate_cardinality(merge_sketches(raws)) for key, raws in groups.items()}
+
+
+def unique_sessions(finished=False, since=None, until=None, **filters):
+    return unique_sessions_by(None, finished, since, until, **filters).get(None, 0)
@@ -17,9 +17,9 @@ from .answer_normalizer import (
     score_extended_text,
     split_slot_acceptable,
 )
+from .answer_codec import read_answers
 from .band_score import earned_ratio_to_band
-from .gradable import question_total_points, total_gradable_slots
-from .slots import list_gradable_slots, slot_correct_for_scoring
+from .grading_plan import get_question_plan, get_test_plan
 
 
 def _scores_as_blanks(question):
@@ -134,15 +134,32 @@ def format_summary_box_answer_display(question, ans):
     return ans_s
 
 
-def _match_summary_blank(question, user_val, correct_ans):
+def _match_summary_blank(question, user_val, correct_ans, variants=None, max_distance=1):
     user_word = _summary_letter_to_word(question, user_val)
-    acceptable = _summary_acceptable_variants(question, correct_ans)
-    return match_text_answer(user_word, acceptable) or match_text_answer(user_val, acceptable)
+    acceptable = _summary_acceptable_variants(question, correct_ans) if variants is None else ()
+    return (
+        match_text_answer(user_word, acceptable, acceptable_variants=variants, max_distance=max_distance)
+        or match_text_answer(user_val, acceptable, acceptable_variants=variants, max_distance=max_distance)
+    )
+
+
+def _match_blank_slot(question, plan, slot, user_val, raw_correct):
+    variants = plan.variants_for(slot.key)
+    tolerance = plan.fuzzy_tolerance
+    if question.question_type == 'summary_box':
+        return _match_summary_blank(question, user_val, raw_correct, variants, tolerance)
+    if variants is not None:
+        if not variants:
+            return False
+        return match_text_answer(user_val, (), acceptable_variants=variants, max_distance=tolerance)
+    acceptable = split_slot_acceptable(raw_correct)
+    return match_text_answer(user_val, acceptable, max_distance=tolerance) if acceptable else False
 
 
-def score_blanks(question, user_answer):
+def score_blanks(question, user_answer, plan=None):
     """notes_completion, table_completion, summary_box — har blank uchun 0..1."""
-    slots = [s for s in list_gradable_slots(question) if s.kind == 'blank']
+    plan = plan or get_question_plan(question)
+    slots = plan.indexed('blank')
     if not slots:
         return 0.0, 0, '', ''
 
@@ -150,16 +167,11 @@ def score_blanks(question, user_answer):
     got = 0
     user_parts = []
     correct_parts = []
-    for slot in slots:
+    for slot, raw_correct in slots:
         user_val = blanks.get(slot.key, blanks.get(int(slot.key) if slot.key.isdigit() else slot.key, ''))
         user_parts.append(str(user_val).strip() or '—')
-        raw_correct = slot_correct_for_scoring(question, slot)
         correct_parts.append(slot.correct)
-        if question.question_type == 'summary_box':
-            ok = _match_summary_blank(question, user_val, raw_correct)
-        else:
-            acceptable = split_slot_acceptable(raw_correct)
-            ok = match_text_answer(user_val, acceptable) if acceptable else False
+        ok = _match_blank_slot(question, plan, slot, user_val, raw_correct)
         if ok:
             got += 1
 
@@ -172,19 +184,11 @@ def score_blanks(question, user_answer):
 
 def _blank_slot_pairs(question):
     """(blank_num, display_correct) — list_gradable_slots ga mos."""
-    return [
-        (slot.key, slot.correct)
-        for slot in list_gradable_slots(question)
-        if slot.kind == 'blank'
-    ]
+    return [(slot.key, slot.correct) for slot, _ in get_question_plan(question).indexed('blank')]
 
 
 def _matching_slot_pairs(question):
-    return [
-        (slot.key, slot.correct)
-        for slot in list_gradable_slots(question)
-        if slot.kind == 'matching'
-    ]
+    return [(slot.key, slot.correct) for slot, _ in get_question_plan(question).indexed('matching')]
 
 
 def _question_detail_meta(question):
@@ -195,36 +199,23 @@ def _question_detail_meta(question):
 
 
 def _dock_buttons_by_question(questions):
-    from mock_tests.views import _build_test_dock_buttons
+    from .layout import get_test_layout
 
     if not questions:
         return {}
-    test = questions[0].test
-    buttons, _ = _build_test_dock_buttons(test, list(questions))
-    by_q = {}
-    for btn in buttons:
-        by_q.setdefault(btn['question_id'], []).append(btn)
-    return by_q
+    return get_test_layout(questions[0].test, questions).buttons_by_question()
 
 
 def _ielts_num_for_slot(question, slot, dock_by_question=None):
     """Dock bilan bir xil test raqami [N]."""
-    if dock_by_question and slot:
-        buttons = dock_by_question.get(question.id, [])
-        if slot.kind in ('blank', 'matching'):
-            for btn in buttons:
-                if btn['is_blank'] and str(btn['blank_key']) == str(slot.key):
-                    return btn['num']
-        non_blank = [b for b in buttons if not b['is_blank']]
-        if slot.kind == 'mcq_letter':
-            letter_slots = [s for s in list_gradable_slots(question) if s.kind == 'mcq_letter']
-            for idx, s in enumerate(letter_slots):
-                if s.key == slot.key and idx < len(non_blank):
-                    return non_blank[idx]['num']
-        elif slot.kind == 'single' and non_blank:
-            return non_blank[0]['num']
     if not slot:
         return None
+    plan = get_question_plan(question)
+    buttons = (dock_by_question or {}).get(question.id, [])
+    nums = plan.dock_nums(buttons)
+    for idx, candidate in enumerate(plan.slots):
+        if candidate == slot:
+            return nums[idx]
     num = slot.display_num
     return int(num) if str(num).isdigit() else num
 
@@ -242,32 +233,34 @@ def _detail_label(question, ielts_num):
     return f'Savol {question.order} — [{ielts_num}]'
 
 
-def expand_question_details(question, user_answer, dock_by_question=None):
-    """Har bir baholanadigan slot uchun alohida natija qatori."""
+def expand_question_details(question, user_answer, dock_by_question=None, plan=None, dock_nums=None):
+    """Har bir baholanadigan slot uchun alohida natija qatori.
+
+    ``dock_nums`` — reja slotlari tartibidagi dock raqamlari (score_attempt beradi).
+    """
     qtype = question.question_type
-    slot_pt = question_total_points(question) / max(question.gradable_slot_count(), 1)
+    plan = plan or get_question_plan(question)
+    if dock_nums is None:
+        dock_nums = plan.dock_nums((dock_by_question or {}).get(question.id, []))
+    slot_num = dict(zip(plan.slots, dock_nums))
+    slot_pt = plan.slot_points
     rows = []
 
-    blank_slots = [s for s in list_gradable_slots(question) if s.kind == 'blank']
+    blank_slots = plan.indexed('blank')
     if blank_slots:
         blanks = _blank_map_from_user(user_answer)
-        for slot in blank_slots:
+        for slot, raw_correct in blank_slots:
             user_val = blanks.get(slot.key, blanks.get(int(slot.key) if slot.key.isdigit() else slot.key, ''))
-            raw_correct = slot_correct_for_scoring(question, slot)
+            ielts_num = slot_num.get(slot)
+            ok = _match_blank_slot(question, plan, slot, user_val, raw_correct)
             if question.question_type == 'summary_box':
-                ok = _match_summary_blank(question, user_val, raw_correct)
                 user_display = format_summary_box_answer_display(question, user_val) if user_val else '—'
             else:
-                acceptable = split_slot_acceptable(raw_correct)
-                ok = match_text_answer(user_val, acceptable) if acceptable else False
                 user_display = str(user_val).strip() or '—'
             rows.append({
-                'order': _row_sort_order(
-                    _ielts_num_for_slot(question, slot, dock_by_question),
-                    slot.display_num,
-                ),
+                'order': _row_sort_order(ielts_num, slot.display_num),
                 'question_order': question.order,
-                'label': _detail_label(question, _ielts_num_for_slot(question, slot, dock_by_question)),
+                'label': _detail_label(question, ielts_num),
                 'is_correct': ok,
                 'earned_points': round(slot_pt if ok else 0.0, 2),
                 'max_points': round(slot_pt, 2),
@@ -282,7 +275,7 @@ def expand_question_details(question, user_answer, dock_by_question=None):
         from mock_tests.services.answer_normalizer import count_words, score_extended_text
 
         text = str(user_answer or '').strip()
-        earned = score_question_points(question, user_answer)
+        earned = score_question_points(question, user_answer, plan=plan)
         words = count_words(text)
         target = score_extended_text(text, min_words=50, target_words=250)
         rows.append({
@@ -291,7 +284,7 @@ def expand_question_details(question, user_answer, dock_by_question=None):
             'label': f'Task {question.order}',
             'is_correct': target >= 0.5,
             'earned_points': round(earned, 2),
-            'max_points': round(question_total_points(question), 2),
+            'max_points': round(plan.total_points, 2),
             'user_answer_display': text or '—',
             'correct_answer': f'Kamida 50 so\'z (yozilgan: {words})',
             'explanation': question.explanation,
@@ -303,18 +296,15 @@ def expand_question_details(question, user_answer, dock_by_question=None):
     if qtype in MATCHING_TYPES:
         from mock_tests.matching_utils import parse_user_matching_answer
         user_map = parse_user_matching_answer(user_answer)
-        matching_slots = [s for s in list_gradable_slots(question) if s.kind == 'matching']
-        for slot in matching_slots:
+        for slot, _ in plan.indexed('matching'):
             user_val = user_map.get(slot.key, '')
+            ielts_num = slot_num.get(slot)
             corr = slot.correct
             ok = normalize_choice(user_val) == normalize_choice(corr) if corr else False
             rows.append({
-                'order': _row_sort_order(
-                    _ielts_num_for_slot(question, slot, dock_by_question),
-                    slot.display_num,
-                ),
+                'order': _row_sort_order(ielts_num, slot.display_num),
                 'question_order': question.order,
-                'label': _detail_label(question, _ielts_num_for_slot(question, slot, dock_by_question)),
+                'label': _detail_label(question, ielts_num),
                 'is_correct': ok,
                 'earned_points': round(slot_pt if ok else 0.0, 2),
                 'max_points': round(slot_pt, 2),
@@ -325,21 +315,19 @@ def expand_question_details(question, user_answer, dock_by_question=None):
             })
         return rows
 
-    mcq_slots = [s for s in list_gradable_slots(question) if s.kind == 'mcq_letter']
+    mcq_slots = [slot for slot, _ in plan.indexed('mcq_letter')]
     if mcq_slots:
         user_letters = parse_mcq_letters(user_answer)
         wrong_picks = [letter for letter in user_letters if letter not in {s.correct for s in mcq_slots if s.correct}]
         wrong_iter = iter(wrong_picks)
         for slot in mcq_slots:
+            ielts_num = slot_num.get(slot)
             letter = slot.correct
             ok = bool(letter) and letter in user_letters
             rows.append({
-                'order': _row_sort_order(
-                    _ielts_num_for_slot(question, slot, dock_by_question),
-                    slot.display_num,
-                ),
+                'order': _row_sort_order(ielts_num, slot.display_num),
                 'question_order': question.order,
-                'label': _detail_label(question, _ielts_num_for_slot(question, slot, dock_by_question)),
+                'label': _detail_label(question, ielts_num),
                 'is_correct': ok,
                 'earned_points': round(slot_pt if ok else 0.0, 2),
                 'max_points': round(slot_pt, 2),
@@ -350,21 +338,16 @@ def expand_question_details(question, user_answer, dock_by_question=None):
             })
         return rows
 
-    earned = score_question_points(question, user_answer)
-    is_correct, user_norm, correct_norm = check_question_answer(question, user_answer)
+    earned = score_question_points(question, user_answer, plan=plan)
+    is_correct, user_norm, correct_norm = check_question_answer(question, user_answer, plan=plan)
     if not user_norm or user_norm == '—':
         user_display = format_answer_display(user_answer)
     else:
         user_display = user_norm
     if not correct_norm or correct_norm == '—':
         correct_norm = format_correct_display(question) or '—'
-    q_pt = question_total_points(question)
-    single_slots = list_gradable_slots(question)
-    single_slot = single_slots[0] if single_slots else None
-    ielts_num = (
-        _ielts_num_for_slot(question, single_slot, dock_by_question)
-        if single_slot else question.order
-    )
+    q_pt = plan.total_points
+    ielts_num = dock_nums[0] if plan.slots else question.order
     rows.append({
         'order': _row_sort_order(ielts_num, question.order),
         'question_order': question.order,
@@ -380,8 +363,9 @@ def expand_question_details(question, user_answer, dock_by_question=None):
     return rows
 
 
-def score_matching_partial(question, user_answer):
-    slots = [s for s in list_gradable_slots(question) if s.kind == 'matching']
+def score_matching_partial(question, user_answer, plan=None):
+    plan = plan or get_question_plan(question)
+    slots = [slot for slot, _ in plan.indexed('matching')]
     user_map = parse_user_matching_answer(user_answer)
     if not slots:
         return 0.0, 0, 0, format_answer_display(user_map), ''
@@ -399,7 +383,7 @@ def score_matching_partial(question, user_answer):
     return fraction, got, total, format_answer_display(user_map), display_correct
 
 
-def check_question_answer(question, user_answer):
+def check_question_answer(question, user_answer, plan=None):
     """Bitta savol: (to'liq to'g'rimi, user_display, correct_display)."""
     qtype = question.question_type
 
@@ -414,17 +398,25 @@ def check_question_answer(question, user_answer):
         return ok, user or '—', correct
 
     if qtype in MATCHING_TYPES:
-        frac, _, _, user_disp, correct_disp = score_matching_partial(question, user_answer)
+        frac, _, _, user_disp, correct_disp = score_matching_partial(question, user_answer, plan=plan)
         return frac >= 1.0, user_disp, correct_disp
 
     if qtype in ('fill_blank', 'sentence_completion', 'summary_completion') and not _scores_as_blanks(question):
         acceptable = collect_acceptable_answers(question)
+        plan = plan or get_question_plan(question)
         user = normalize_text(user_answer) if not isinstance(user_answer, dict) else format_answer_display(user_answer)
-        ok = match_text_answer(user_answer, acceptable) if not isinstance(user_answer, dict) else False
+        ok = (
+            match_text_answer(
+                user_answer, acceptable,
+                acceptable_variants=plan.variants_for(''),
+                max_distance=plan.fuzzy_tolerance,
+            )
+            if not isinstance(user_answer, dict) else False
+        )
         return ok, user or '—', ' / '.join(acceptable)
 
     if _scores_as_blanks(question):
-        frac, _, user_disp, correct_disp = score_blanks(question, user_answer)
+        frac, _, user_disp, correct_disp = score_blanks(question, user_answer, plan=plan)
         return frac >= 1.0, user_disp, correct_disp
 
     if qtype == 'essay':
@@ -436,18 +428,19 @@ def check_question_answer(question, user_answer):
     return False, normalize_text(user_answer), ''
 
 
-def score_question_points(question, user_answer):
+def score_question_points(question, user_answer, plan=None):
     """Savol uchun 0..question.points ball (qisman ball bilan)."""
     qtype = question.question_type
     points = float(question.points or 1)
+    plan = plan or get_question_plan(question)
 
     if qtype in MATCHING_TYPES:
-        frac, _, _, _, _ = score_matching_partial(question, user_answer)
-        return question_total_points(question) * frac
+        frac, _, _, _, _ = score_matching_partial(question, user_answer, plan=plan)
+        return plan.total_points * frac
 
     if _scores_as_blanks(question):
-        frac, _, _, _ = score_blanks(question, user_answer)
-        return question_total_points(question) * frac
+        frac, _, _, _ = score_blanks(question, user_answer, plan=plan)
+        return plan.total_points * frac
 
     if qtype == 'mcq':
         frac, _, _, _ = score_mcq(question, user_answer)
@@ -457,28 +450,31 @@ def score_question_points(question, user_answer):
         frac = score_extended_text(str(user_answer or ''), min_words=50, target_words=250)
         return points * frac
 
-    ok, _, _ = check_question_answer(question, user_answer)
+    ok, _, _ = check_question_answer(question, user_answer, plan=plan)
     return points if ok else 0.0
 
 
 def score_attempt(attempt, questions):
-    answers = attempt.answers_json or {}
+    answers = read_answers(attempt)
     total_points = 0.0
     earned_points = 0.0
     correct_slots = 0
     details = []
-    dock_by_question = _dock_buttons_by_question(questions)
+    test_plan = get_test_plan(questions)
 
     for question in questions:
         qid = str(question.id)
         user_answer = answers.get(qid, '')
-        q_total = question_total_points(question)
-        total_points += q_total
+        plan = test_plan.question_plans[question.id]
+        total_points += plan.total_points
 
-        earned = score_question_points(question, user_answer)
+        earned = score_question_points(question, user_answer, plan=plan)
         earned_points += earned
 
-        for row in expand_question_details(question, user_answer, dock_by_question):
+        rows = expand_question_details(
+            question, user_answer, plan=plan, dock_nums=test_plan.dock_nums[question.id],
+        )
+        for row in rows:
             if row['is_correct']:
                 correct_slots += 1
             details.append({
@@ -497,7 +493,7 @@ def score_attempt(attempt, questions):
                 'is_essay': row.get('is_essay', False),
             })
 
-    total_questions = total_gradable_slots(questions)
+    total_questions = test_plan.total_slots
     if total_points:
         score_percent = Decimal(earned_points * 100) / Decimal(total_points)
     elif total_questions:
@@ -0,0 +1,75 @@
+"""Muddati o'tgan sessiyalar va egasiz tugallanmagan urinishlarni partiyalab tozalash.
+
+Katalog va test sahifalari endi sessiya yaratmaydi (faqat mavjudini o'qiydi);
+sessiya urinish boshlanganda ochiladi. Shunga qaramay bazadagi sessiyalar
+jadvali va tashlab ketilgan urinishlar vaqt o'tishi bilan o'sadi — bu modul
+ularni kichik ``DELETE`` partiyalari bilan o'chiradi, shuning uchun jadval
+uzoq qulflanmaydi.
+
+Tugallanmagan urinish egasiz hisoblanadi, agar u ``grace`` dan eski bo'lsa va
+sessiyasi bazada tirik bo'lmasa (sessiyalar bazada saqlanmasa —
+``SESSION_COOKIE_AGE`` dan eski bo'lsa). Bunday urinishni hech kim davom
+ettira olmaydi.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_GRACE = timedelta(hours=24)
+_DB_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def sessions_in_db():
+    return settings.SESSION_ENGINE in _DB_SESSION_ENGINES
+
+
+def _delete_in_batches(qs, batch_size, dry_run=False):
+    model = qs.model
+    if dry_run:
+        return qs.count()
+    deleted = 0
+    while True:
+        pks = list(qs.order_by().values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        model.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+
+
+def expired_sessions(now=None):
+    from django.contrib.sessions.models import Session
+
+    return Session.objects.filter(expire_date__lt=now or timezone.now())
+
+
+def orphaned_attempts(grace=DEFAULT_GRACE, now=None):
+    from mock_tests.models import MockAttempt
+
+    now = now or timezone.now()
+    if sessions_in_db():
+        from django.contrib.sessions.models import Session
+
+        live = Session.objects.filter(session_key=OuterRef('session_key'), expire_date__gte=now)
+        return MockAttempt.objects.filter(
+            is_finished=False, started_at__lt=now - grace,
+        ).filter(~Exists(live))
+    age = max(grace, timedelta(seconds=settings.SESSION_COOKIE_AGE))
+    return MockAttempt.objects.filter(is_finished=False, started_at__lt=now - age)
+
+
+def purge_expired_sessions(batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Muddati o'tgan sessiyalarni o'chirish. Qaytaradi: o'chirilgan (dry-run: topilgan) soni."""
+    if not sessions_in_db():
+        return 0
+    return _delete_in_batches(expired_sessions(), batch_size, dry_run)
+
+
+def purge_orphaned_attempts(grace=DEFAULT_GRACE, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Egasiz tugallanmagan urinishlarni o'chirish. Qaytaradi: soni."""
+    return _delete_in_batches(orphaned_attempts(grace), batch_size, dry_run)
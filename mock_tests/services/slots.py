@@ -165,10 +165,15 @@ def gradable_slot_count(question) -> int:
     return max(1, len(slots))
 
 
-def slot_correct_for_scoring(question, slot: GradableSlot) -> str:
-    """Natija/scoring uchun xom to'g'ri javob (summary_box harfi emas)."""
-    answers = _answers_list(question)
-    nums = _bracket_nums(question)
+def slot_correct_for_scoring(question, slot: GradableSlot, answers=None, nums=None) -> str:
+    """Natija/scoring uchun xom to'g'ri javob (summary_box harfi emas).
+
+    ``answers``/``nums`` oldindan hisoblangan bo'lsa qayta parse qilinmaydi.
+    """
+    if answers is None:
+        answers = _answers_list(question)
+    if nums is None:
+        nums = _bracket_nums(question)
     if slot.kind == 'blank' and nums and slot.key in nums:
         idx = nums.index(slot.key)
         if idx < len(answers):
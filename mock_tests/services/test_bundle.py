@@ -0,0 +1,128 @@
+"""Testlarni ko'chma zip to'plamga eksport — ``import_mock_test`` qayta o'qiy oladi.
+
+To'plam tuzilishi::
+
+    tests.jsonl            har qatorda bitta test (import formati)
+    media/<storage nomi>   audio va savol rasmlari
+
+Testdagi ``audio_file`` va savoldagi ``image`` qiymati — to'plam ichidagi
+``media/...`` yo'li; bir xil fayl (masalan, nusxa testlarda) bir marta
+yoziladi. Zip seek qilinmaydigan oqimga yoziladi: media storage'dan
+``MEDIA_CHUNK_SIZE`` bo'laklarda ko'chiriladi va baytlar bo'lak-bo'lak
+``yield`` qilinadi — katta audio to'plamlari xotirada turmaydi. Buyruq ham,
+admin ``StreamingHttpResponse`` ham shu generatordan foydalanadi.
+"""
+import json
+import zipfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from mock_tests.models import MockQuestion
+
+from .test_import import BUNDLE_TESTS_NAME, MEDIA_PREFIX, OPTION_FIELDS
+
+MEDIA_CHUNK_SIZE = 1024 * 1024
+
+TEST_FIELDS = (
+    'title', 'test_type', 'difficulty', 'description', 'duration_minutes',
+    'passing_score', 'is_active', 'max_daily_attempts',
+)
+QUESTION_FIELDS = (
+    'order', 'part_number', 'question_type', 'instruction', 'question_text',
+    'mcq_select_count', 'correct_answer', 'correct_answers_json', 'options_json',
+    'explanation', 'points', 'audio_timestamp',
+) + OPTION_FIELDS
+
+
+class _ChunkSink:
+    """Zip yozuvchisi uchun ketma-ket oqim (``tell`` yo'q — zip data descriptor ishlatadi)."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _media_entry(fieldfile, missing):
+    """Fayl maydoni -> to'plamdagi nom; storage'da yo'q fayl tashlab ketiladi."""
+    if not fieldfile:
+        return None
+    if not fieldfile.storage.exists(fieldfile.name):
+        missing.append(fieldfile.name)
+        return None
+    return f'{MEDIA_PREFIX}{fieldfile.name}'
+
+
+def test_document(test, passages, questions, missing=None):
+    """Test -> import formatidagi lug'at."""
+    missing = [] if missing is None else missing
+    doc = {name: getattr(test, name) for name in TEST_FIELDS}
+    doc['audio_file'] = _media_entry(test.audio_file, missing)
+    doc['passages'] = [{'order': p.order, 'title': p.title, 'text': p.text} for p in passages]
+    doc['questions'] = []
+    for q in questions:
+        item = {name: getattr(q, name) for name in QUESTION_FIELDS}
+        item['image'] = _media_entry(q.image, missing)
+        doc['questions'].append(item)
+    return doc
+
+
+def _copy_media(zf, sink, fieldfile, entry):
+    fieldfile.open('rb')
+    try:
+        with zf.open(entry, 'w', force_zip64=True) as dst:
+            for chunk in fieldfile.chunks(MEDIA_CHUNK_SIZE):
+                dst.write(chunk)
+                data = sink.drain()
+                if data:
+                    yield data
+    finally:
+        fieldfile.close()
+
+
+def iter_bundle_chunks(tests, missing=None):
+    """Testlar -> zip baytlari bo'laklari. ``missing`` — topilmagan media nomlari ro'yxati."""
+    missing = [] if missing is None else missing
+    sink = _ChunkSink()
+    media = {}
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        with zf.open(BUNDLE_TESTS_NAME, 'w', force_zip64=True) as out:
+            for test in tests:
+                passages = list(test.passages.order_by('order', 'pk'))
+                questions = list(MockQuestion.objects.filter(test=test).order_by('order', 'pk'))
+                doc = test_document(test, passages, questions, missing)
+                out.write(json.dumps(doc, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8'))
+                out.write(b'\n')
+                if doc['audio_file']:
+                    media.setdefault(doc['audio_file'], test.audio_file)
+                for q, item in zip(questions, doc['questions']):
+                    if item['image']:
+                        media.setdefault(item['image'], q.image)
+                data = sink.drain()
+                if data:
+                    yield data
+        # Audio/rasm allaqachon siqilgan — qayta siqish faqat CPU sarfi
+        zf.compression = zipfile.ZIP_STORED
+        for entry, fieldfile in media.items():
+            yield from _copy_media(zf, sink, fieldfile, entry)
+    yield sink.drain()
+
+
+def write_bundle(tests, path, missing=None):
+    """To'plamni faylga yozish. Qaytaradi: bayt soni."""
+    size = 0
+    with open(path, 'wb') as fh:
+        for chunk in iter_bundle_chunks(tests, missing):
+            fh.write(chunk)
+            size += len(chunk)
+    return size
@@ -0,0 +1,112 @@
+"""Test va savollarni nusxalash — ``bulk_create`` va umumiy media fayllar bilan.
+
+Nusxa passage/savollari bitta tranzaksiyada test bo'yicha emas, barcha
+tanlangan testlar uchun bittadan ``bulk_create`` bilan yoziladi.
+``answer_variants_json`` va test hisoblagichlari manbadan ko'chiriladi
+(qayta hisoblanmaydi), ``bulk_create`` signal yubormagani uchun render
+kesh versiyasi va hisoblagichlar shu yerda yangilanadi.
+
+Media (savol rasmi, test audiosi) nusxalanmaydi: nusxa manba bilan bir xil
+storage nomiga ishora qiladi — fayl I/O yo'q. Bu copy-on-write kabi ishlaydi:
+admin nusxaga yangi rasm yuklasa Django uni yangi nom bilan saqlaydi
+(``get_available_name``), umumiy fayl o'zgarmaydi. Qator o'chirilganda fayl
+o'chirilmaydi, shuning uchun umumiy faylni bir nusxani o'chirish buzmaydi;
+kelajakda media tozalash qo'shilsa, u faylga ishora qiluvchi qatorlarni
+sanashi kerak.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Max
+
+from mock_tests.models import MockPassage, MockQuestion
+
+from .render_cache import bump_content_version
+from .test_counters import ensure_test_counters, question_contribution, shift_test_counters
+
+BULK_BATCH_SIZE = 500
+COPY_SUFFIX = ' (nusxa)'
+
+
+def part_for_order(test_type, order):
+    """Savol tartibidan IELTS part raqami (reading: 13/26, listening: har 10 ta)."""
+    if test_type == 'reading':
+        return 1 if order <= 13 else (2 if order <= 26 else 3)
+    if test_type == 'listening':
+        return min(4, (order - 1) // 10 + 1) if order > 0 else 1
+    return None
+
+
+def _copy(obj, **changes):
+    obj.pk = None
+    obj.id = None
+    obj._state.adding = True
+    for name, value in changes.items():
+        setattr(obj, name, value)
+    return obj
+
+
+def clone_tests(tests, suffix=COPY_SUFFIX):
+    """Testlarni passage va savollari bilan nusxalash. Qaytaradi: yangi testlar."""
+    tests = list(tests)
+    for test in tests:
+        ensure_test_counters(test)
+    source_ids = [t.pk for t in tests]
+    passages = defaultdict(list)
+    for p in MockPassage.objects.filter(test_id__in=source_ids).order_by('order', 'pk'):
+        passages[p.test_id].append(p)
+    questions = defaultdict(list)
+    for q in MockQuestion.objects.filter(test_id__in=source_ids).order_by('order', 'pk'):
+        questions[q.test_id].append(q)
+
+    clones = []
+    new_passages = []
+    new_questions = []
+    with transaction.atomic():
+        for test in tests:
+            source_id = test.pk
+            # Hisoblagichlar va audio nomi manbadan ko'chadi
+            clone = _copy(test, title=f'{test.title}{suffix}')
+            clone.save()
+            new_passages.extend(_copy(p, test=clone) for p in passages[source_id])
+            new_questions.extend(_copy(q, test=clone) for q in questions[source_id])
+            clones.append(clone)
+        MockPassage.objects.bulk_create(new_passages, batch_size=BULK_BATCH_SIZE)
+        MockQuestion.objects.bulk_create(new_questions, batch_size=BULK_BATCH_SIZE)
+        for clone in clones:
+            bump_content_version(clone)
+    return clones
+
+
+def clone_questions(questions):
+    """Savollarni o'z testining oxiriga (oxirgi order + 1) nusxalash. Qaytaradi: yangi savollar."""
+    questions = list(questions)
+    test_ids = {q.test_id for q in questions}
+    last_order = defaultdict(int, (
+        MockQuestion.objects.filter(test_id__in=test_ids).order_by()
+        .values('test_id').annotate(last=Max('order')).values_list('test_id', 'last')
+    ))
+
+    tests = {}
+    contributions = defaultdict(lambda: defaultdict(int))
+    clones = []
+    for q in sorted(questions, key=lambda q: (q.test_id, q.order, q.pk)):
+        if q.test_id not in tests:
+            tests[q.test_id] = q.test
+        test = tests[q.test_id]
+        last_order[q.test_id] += 1
+        order = last_order[q.test_id]
+        part = part_for_order(test.test_type, order)
+        clone = _copy(q, order=order)
+        if part is not None:
+            clone.part_number = part
+        for name, value in question_contribution(clone).items():
+            contributions[q.test_id][name] += value
+        clones.append(clone)
+
+    with transaction.atomic():
+        MockQuestion.objects.bulk_create(clones, batch_size=BULK_BATCH_SIZE)
+        for test_id, contribution in contributions.items():
+            shift_test_counters(tests[test_id], contribution, 1)
+            bump_content_version(tests[test_id])
+    return clones
@@ -0,0 +1,106 @@
+"""``MockTest`` dagi denormallashtirilgan hisoblagichlar.
+
+``gradable_slots``, ``total_points``, ``passage_count`` va ``question_count``
+katalog va admin ro'yxatida har test uchun savollarni yuklamaslik uchun
+saqlanadi. Savol/passage saqlanganda yoki o'chirilganda (signals.py) faqat
+o'sha obyekt hissasi ``F()`` deltasi bilan qo'shiladi/ayiriladi — butun test
+qayta hisoblanmaydi. ``bulk_create``/``QuerySet.update`` signal yubormaydi —
+bunday joylar ``refresh_test_counters`` ni o'zi chaqiradi; eskirgan
+qatorlarni ``repair_test_counters`` buyrug'i tuzatadi.
+"""
+from django.db.models import Case, F, Value, When
+
+from .grading_plan import get_question_plan
+
+COUNTER_FIELDS = ('gradable_slots', 'total_points', 'passage_count', 'question_count')
+
+
+def compute_test_counters(test_id):
+    from mock_tests.models import MockPassage, MockQuestion
+
+    questions = list(MockQuestion.objects.filter(test_id=test_id))
+    return {
+        'gradable_slots': sum(get_question_plan(q).slot_count for q in questions),
+        'total_points': sum(q.points for q in questions),
+        'passage_count': MockPassage.objects.filter(test_id=test_id).count(),
+        'question_count': len(questions),
+    }
+
+
+def question_contribution(question):
+    return {
+        'gradable_slots': get_question_plan(question).slot_count,
+        'total_points': question.points or 0,
+        'question_count': 1,
+    }
+
+
+def passage_contribution(passage):
+    return {'passage_count': 1}
+
+
+def _shifted(field, delta):
+    if delta >= 0:
+        return F(field) + delta
+    # Nomuvofiq qator manfiyga tushmasin; NULL (hisoblanmagan) NULL qoladi
+    return Case(
+        When(**{f'{field}__isnull': True}, then=Value(None)),
+        When(**{f'{field}__lt': -delta}, then=Value(0)),
+        default=F(field) + delta,
+    )
+
+
+def shift_test_counters(test, contribution, sign):
+    """Test hisoblagichlariga obyekt hissasini qo'shish (sign=1) yoki ayirish (-1)."""
+    from mock_tests.models import MockTest
+
+    deltas = {name: value * sign for name, value in contribution.items() if value}
+    test_id = getattr(test, 'pk', test)
+    if not deltas or test_id is None:
+        return
+    MockTest.objects.filter(pk=test_id).update(
+        **{name: _shifted(name, delta) for name, delta in deltas.items()}
+    )
+    if isinstance(test, MockTest):
+        for name, delta in deltas.items():
+            value = getattr(test, name)
+            if value is not None:
+                setattr(test, name, max(value + delta, 0))
+
+
+def refresh_test_counters(test):
+    """Test (obyekt yoki ID) hisoblagichlarini qayta hisoblab yozish."""
+    from mock_tests.models import MockTest
+
+    test_id = getattr(test, 'pk', test)
+    counters = compute_test_counters(test_id)
+    MockTest.objects.filter(pk=test_id).update(**counters)
+    if isinstance(test, MockTest):
+        for name, value in counters.items():
+            setattr(test, name, value)
+    return counters
+
+
+def ensure_test_counters(test):
+    """Migratsiyadan keyin hisoblanmagan (NULL) hisoblagichlarni bir marta to'ldirish."""
+    if test.pk and any(getattr(test, name) is None for name in COUNTER_FIELDS):
+        refresh_test_counters(test)
+
+
+def repair_test_counters(test_ids=None):
+    """Hisoblagichlarni tekshirish; mos kelmaganlarini tuzatish. Qaytaradi: (ko'rildi, tuzatildi)."""
+    from mock_tests.models import MockTest
+
+    tests = MockTest.objects.order_by('pk').values_list('pk', *COUNTER_FIELDS)
+    if test_ids is not None:
+        tests = tests.filter(pk__in=list(test_ids))
+    scanned = 0
+    fixed = 0
+    for pk, *stored in tests.iterator():
+        scanned += 1
+        counters = compute_test_counters(pk)
+        if [counters[name] for name in COUNTER_FIELDS] != stored:
+            MockTest.objects.filter(pk=pk).update(**counters)
+            fixed += 1
+    return scanned, fixed
+
@@ -0,0 +1,388 @@
+"""Mock test import — tahlil, tekshirish va ``bulk_create`` bilan bitta tranzaksiyada yozish.
+
+Manba shakllari:
+
+* bitta test — ``{"title": ..., "passages": [...], "questions": [...]}``;
+* to'plam — ``{"tests": [...]}`` yoki ``[...]``;
+* ``.jsonl`` — har qatorda bitta test (qatorma-qator oqim bilan o'qiladi);
+* ``.zip`` — ``export_mock_tests`` to'plami: ``tests.jsonl`` va ``media/``
+  (``audio_file``/``image`` qiymati ``media/...`` bo'lsa fayl to'plamdan
+  storage'ga bo'laklab yoziladi; boshqa qiymat — mavjud storage nomi);
+* papka — ichidagi ``*.json``/``*.jsonl`` fayllar, fork bo'lsa process pool
+  da parallel tekshiriladi.
+
+Avval barcha testlar tekshiriladi (admin formadagi ``validate_fill_type_fields``
+qoidalari bilan) va xatolar bitta ro'yxatda qaytadi — birorta xato bo'lsa
+bazaga hech narsa yozilmaydi. So'ng passage va savollar barcha testlar uchun
+bittadan ``bulk_create`` bilan yoziladi. ``bulk_create`` ``save()`` va
+signallarni chetlab o'tadi, shuning uchun variant indeksi, hisoblagichlar va
+render kesh versiyasi shu yerda yangilanadi.
+"""
+import json
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.core.files import File
+from django.db import transaction
+
+from mock_tests.models import MockPassage, MockQuestion, MockTest
+from mock_tests.question_admin_helpers import validate_fill_type_fields
+
+from .render_cache import bump_content_version
+from .test_counters import refresh_test_counters
+from .variant_index import refresh_variant_index
+from .worker_pool import can_fork, fork_pool
+
+BULK_BATCH_SIZE = 500
+SOURCE_SUFFIXES = ('.json', '.jsonl', '.zip')
+BUNDLE_TESTS_NAME = 'tests.jsonl'
+MEDIA_PREFIX = 'media/'
+
+TEST_TYPES = {value for value, _label in MockTest.TEST_TYPES}
+DIFFICULTY_LEVELS = {value for value, _label in MockTest.DIFFICULTY_LEVELS}
+QUESTION_TYPES = {value for value, _label in MockQuestion.QUESTION_TYPES}
+OPTION_FIELDS = tuple(f'option_{letter}' for letter in 'abcdefgh')
+
+CREATED = 'created'
+UPDATED = 'updated'
+SKIPPED = 'skipped'
+
+
+class ImportValidationError(ValueError):
+    """Import manbasidagi barcha xatolar (``errors`` — satrlar ro'yxati)."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__('\n'.join(self.errors))
+
+
+@dataclass
+class TestSpec:
+    source: str
+    title: str
+    test_fields: dict
+    passages: list = field(default_factory=list)
+    questions: list = field(default_factory=list)
+    # Media manbasi: to'plam yo'li yoki yuklangan fayl (``.zip`` uchun)
+    bundle: object = None
+
+
+@dataclass
+class ImportedTest:
+    title: str
+    status: str
+    test: MockTest = None
+    question_count: int = 0
+
+
+def _question_fields(q):
+    fields = {
+        'order': q.get('order', 0),
+        'part_number': q.get('part_number', 1),
+        'question_type': q.get('question_type', 'mcq'),
+        'instruction': q.get('instruction', ''),
+        'question_text': q.get('question_text', ''),
+        'mcq_select_count': q.get('mcq_select_count', 1),
+        'correct_answer': q.get('correct_answer', ''),
+        'correct_answers_json': q.get('correct_answers_json', q.get('correct_answer_json', [])),
+        'options_json': q.get('options_json', {}),
+        'explanation': q.get('explanation', ''),
+        'points': q.get('points', 1),
+        'audio_timestamp': q.get('audio_timestamp'),
+    }
+    for name in OPTION_FIELDS:
+        fields[name] = q.get(name, '')
+    if q.get('image'):
+        fields['image'] = q['image']
+    return fields
+
+
+def parse_test(data, source=''):
+    """Bitta test lug'ati -> (TestSpec | None, xatolar)."""
+    label = source or '?'
+    if not isinstance(data, dict):
+        return None, [f'{label}: test obyekt (dict) bo\'lishi kerak']
+    title = (data.get('title') or '').strip()
+    label = f'{label} "{title}"' if title else label
+    errors = []
+    if not title:
+        errors.append(f'{label}: "title" majburiy')
+    test_fields = {
+        'test_type': data.get('test_type', 'reading'),
+        'difficulty': data.get('difficulty', 'medium'),
+        'description': data.get('description', ''),
+        'duration_minutes': data.get('duration_minutes'),
+        'passing_score': data.get('passing_score', 60),
+        'is_active': data.get('is_active', True),
+        'max_daily_attempts': data.get('max_daily_attempts'),
+    }
+    if 'audio_file' in data:
+        test_fields['audio_file'] = data['audio_file'] or None
+    if test_fields['test_type'] not in TEST_TYPES:
+        errors.append(f"{label}: noma'lum test_type {test_fields['test_type']!r}")
+    if test_fields['difficulty'] not in DIFFICULTY_LEVELS:
+        errors.append(f"{label}: noma'lum difficulty {test_fields['difficulty']!r}")
+
+    passages = []
+    for i, p in enumerate(data.get('passages') or [], 1):
+        if not isinstance(p, dict):
+            errors.append(f'{label}: passage #{i} obyekt emas')
+            continue
+        passages.append({
+            'order': p.get('order', 1),
+            'title': p.get('title', ''),
+            'text': p.get('text', ''),
+        })
+
+    questions = []
+    for i, q in enumerate(data.get('questions') or [], 1):
+        if not isinstance(q, dict):
+            errors.append(f'{label}: savol #{i} obyekt emas')
+            continue
+        fields = _question_fields(q)
+        where = f"{label}: savol #{i} (order={fields['order']})"
+        if fields['question_type'] not in QUESTION_TYPES:
+            errors.append(f"{where}: noma'lum question_type {fields['question_type']!r}")
+            continue
+        answers = fields['correct_answers_json']
+        fill_answers = ', '.join(str(a) for a in answers) if isinstance(answers, list) else ''
+        for name, message in validate_fill_type_fields(
+            fields['question_type'], fields['question_text'], fill_answers,
+        ).items():
+            errors.append(f'{where}: {name} — {message}')
+        questions.append(fields)
+
+    if errors:
+        return None, errors
+    return TestSpec(source=source, title=title, test_fields=test_fields,
+                    passages=passages, questions=questions), []
+
+
+def _documents(data):
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and isinstance(data.get('tests'), list):
+        return data['tests']
+    return [data]
+
+
+def parse_documents(documents, source=''):
+    """Test lug'atlari (yoki ``iter_jsonl`` oqimi) -> (spec'lar, xatolar)."""
+    specs = []
+    errors = []
+    for i, doc in enumerate(documents, 1):
+        if isinstance(doc, ImportValidationError):
+            errors.extend(doc.errors)
+            continue
+        spec, doc_errors = parse_test(doc, f'{source}#{i}')
+        errors.extend(doc_errors)
+        if spec is not None:
+            specs.append(spec)
+    return specs, errors
+
+
+def iter_jsonl(lines, source=''):
+    """JSONL qatorlari -> test lug'atlari (oqim bilan)."""
+    for n, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield ImportValidationError([f'{source}:{n}: JSON xato — {exc.msg}'])
+
+
+def _media_values(spec):
+    values = [spec.test_fields.get('audio_file')] + [q.get('image') for q in spec.questions]
+    return [v for v in values if v]
+
+
+def load_bundle(fileobj, source, bundle):
+    """Zip to'plam -> (spec'lar, xatolar); ``media/...`` havolalari to'plamda borligi tekshiriladi."""
+    try:
+        zf = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as exc:
+        return [], [f'{source}: zip xato — {exc}']
+    with zf:
+        names = set(zf.namelist())
+        if BUNDLE_TESTS_NAME not in names:
+            return [], [f'{source}: {BUNDLE_TESTS_NAME} topilmadi']
+        with zf.open(BUNDLE_TESTS_NAME) as fh:
+            specs, errors = parse_documents(iter_jsonl(fh, source), source)
+    for spec in specs:
+        spec.bundle = bundle
+        for value in _media_values(spec):
+            if value.startswith(MEDIA_PREFIX) and value not in names:
+                errors.append(f'{spec.source} "{spec.title}": to\'plamda {value} yo\'q')
+    return specs, errors
+
+
+def load_file(path):
+    """Fayl -> (spec'lar, xatolar). Ishchi jarayonda ham chaqiriladi (bazaga tegmaydi)."""
+    path = Path(path)
+    source = path.name
+    try:
+        if path.suffix == '.zip':
+            return load_bundle(path, source, str(path))
+        if path.suffix == '.jsonl':
+            with open(path, encoding='utf-8') as fh:
+                return parse_documents(iter_jsonl(fh, source), source)
+        with open(path, encoding='utf-8') as fh:
+            data = json.load(fh)
+    except json.JSONDecodeError as exc:
+        return [], [f'{source}: JSON xato — {exc.msg} (qator {exc.lineno})']
+    except (OSError, UnicodeDecodeError) as exc:
+        return [], [f'{source}: o\'qib bo\'lmadi — {exc}']
+    return _parse_data(data, source)
+
+
+def _parse_data(data, source):
+    documents = _documents(data)
+    if len(documents) == 1:
+        spec, errors = parse_test(documents[0], source)
+        return ([spec] if spec else []), errors
+    return parse_documents(documents, source)
+
+
+def load_upload(upload):
+    """Admin yuklamasi (``UploadedFile``) — vaqtinchalik faylsiz."""
+    name = getattr(upload, 'name', '') or 'upload.json'
+    if name.endswith('.zip'):
+        return load_bundle(upload, name, upload)
+    if name.endswith('.jsonl'):
+        return parse_documents(iter_jsonl(upload, name), name)
+    try:
+        data = json.loads(upload.read().decode('utf-8'))
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+        return [], [f"{name}: JSON formati noto'g'ri — {exc}"]
+    return _parse_data(data, name)
+
+
+def collect_sources(path):
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.suffix in SOURCE_SUFFIXES and p.is_file())
+    return [path]
+
+
+def load_sources(paths, workers=1):
+    """Fayllarni (parallel) tahlil qilish -> (spec'lar, barcha xatolar)."""
+    paths = [str(p) for p in paths]
+    if workers > 1 and len(paths) > 1 and can_fork():
+        with fork_pool(min(workers, len(paths))) as pool:
+            results = list(pool.map(load_file, paths))
+    else:
+        results = [load_file(p) for p in paths]
+    specs = []
+    errors = []
+    for file_specs, file_errors in results:
+        specs.extend(file_specs)
+        errors.extend(file_errors)
+    titles = {}
+    for spec in specs:
+        if spec.title in titles:
+            errors.append(f'{spec.source}: "{spec.title}" sarlavhasi takrorlangan ({titles[spec.title]})')
+        titles.setdefault(spec.title, spec.source)
+    return specs, errors
+
+
+class _BundleMedia:
+    """To'plamdagi media fayllarini storage'ga (har birini bir marta) bo'laklab yozish.
+
+    Storage'da shu nom va hajmdagi fayl bo'lsa qayta yozilmaydi — shu serverdan
+    olingan to'plam qayta import qilinganda audio nusxalanmaydi.
+    """
+
+    def __init__(self):
+        self._zips = {}
+        self._stored = {}
+
+    def resolve(self, bundle, value, storage):
+        if bundle is None or not value or not value.startswith(MEDIA_PREFIX):
+            return value
+        key = (bundle, value)
+        if key not in self._stored:
+            zf = self._zips.get(bundle)
+            if zf is None:
+                zf = self._zips[bundle] = zipfile.ZipFile(bundle)
+            info = zf.getinfo(value)
+            name = value[len(MEDIA_PREFIX):]
+            if not (storage.exists(name) and storage.size(name) == info.file_size):
+                with zf.open(info) as src:
+                    name = storage.save(name, File(src, name=name))
+            self._stored[key] = name
+        return self._stored[key]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        for zf in self._zips.values():
+            zf.close()
+
+
+def _with_media(spec, media):
+    test_fields = dict(spec.test_fields)
+    if test_fields.get('audio_file'):
+        storage = MockTest._meta.get_field('audio_file').storage
+        test_fields['audio_file'] = media.resolve(spec.bundle, test_fields['audio_file'], storage)
+    questions = []
+    storage = MockQuestion._meta.get_field('image').storage
+    for fields in spec.questions:
+        if fields.get('image'):
+            fields = {**fields, 'image': media.resolve(spec.bundle, fields['image'], storage)}
+        questions.append(fields)
+    return test_fields, questions
+
+
+def import_specs(specs, update=False):
+    """Tekshirilgan spec'larni bitta tranzaksiyada yozish -> [ImportedTest]."""
+    results = []
+    passages = []
+    questions = []
+    touched = []
+    with _BundleMedia() as media, transaction.atomic():
+        existing = {t.title: t for t in MockTest.objects.filter(title__in=[s.title for s in specs])}
+        for spec in specs:
+            test = existing.get(spec.title)
+            if test is not None and not update:
+                results.append(ImportedTest(spec.title, SKIPPED, test, 0))
+                continue
+            test_fields, spec_questions = _with_media(spec, media)
+            if test is None:
+                test = MockTest.objects.create(title=spec.title, **test_fields)
+                status = CREATED
+            else:
+                for name, value in test_fields.items():
+                    setattr(test, name, value)
+                test.save()
+                test.passages.all().delete()
+                test.questions.all().delete()
+                status = UPDATED
+            for fields in spec.passages:
+                passages.append(MockPassage(test=test, **fields))
+            for fields in spec_questions:
+                question = MockQuestion(test=test, **fields)
+                refresh_variant_index(question)
+                questions.append(question)
+            touched.append(test)
+            results.append(ImportedTest(spec.title, status, test, len(spec.questions)))
+
+        MockPassage.objects.bulk_create(passages, batch_size=BULK_BATCH_SIZE)
+        MockQuestion.objects.bulk_create(questions, batch_size=BULK_BATCH_SIZE)
+        for test in touched:
+            refresh_test_counters(test)
+            bump_content_version(test)
+    return results
+
+
+def import_sources(paths, update=False, workers=1):
+    """Fayllar/papkadan import: avval hammasi tekshiriladi, xato bo'lsa hech narsa yozilmaydi."""
+    specs, errors = load_sources(paths, workers=workers)
+    if errors:
+        raise ImportValidationError(errors)
+    return import_specs(specs, update=update)
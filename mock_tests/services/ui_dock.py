@@ -31,15 +31,21 @@ def display_label_for_question(question, nums):
     return question.get_order_display_label()
 
 
-def attach_reading_ui_dock_labels(test, questions, part_groups):
-    """Reading take sahifasi: kartadagi raqamlar dock bilan bir xil ketma-ket bo'ladi."""
+def attach_reading_ui_dock_labels(test, questions, part_groups, layout=None):
+    """Reading take sahifasi: kartadagi raqamlar dock bilan bir xil ketma-ket bo'ladi.
+
+    ``layout`` (TestLayout) berilsa dock xaritasi va yorliqlar undan olinadi.
+    """
     if test.test_type != 'reading':
         return
-    dock = dock_map_from_part_groups(part_groups)
+    dock = layout.dock_map if layout is not None else dock_map_from_part_groups(part_groups)
     for q in questions:
         nums = dock.get(q.pk, {})
         q.ui_dock_nums = nums
-        q.ui_display_label = display_label_for_question(q, nums)
+        if layout is not None and q.pk in layout.dock_labels:
+            q.ui_display_label = layout.dock_labels[q.pk]
+        else:
+            q.ui_display_label = display_label_for_question(q, nums)
 
         for mf in getattr(q, 'ui_matching_fields', None) or []:
             key = str(mf['num'])
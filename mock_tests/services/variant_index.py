@@ -0,0 +1,104 @@
+"""Qabul qilinadigan javob variantlari indeksi — savol saqlanganda hisoblanadi.
+
+``expand_answer_variants`` har bir kalit javob uchun bir nechta regex
+o'tkazadi. Indeks har matnli slot uchun normallashtirilgan variantlar
+to'plamini ``MockQuestion.answer_variants_json`` da saqlaydi:
+
+    {"v": 2, "k": "<kalit digest>", "s": {"1": ["anna"], "": ["9", "nine"]}}
+
+``v`` — normalizator versiyasi, ``k`` — kalit maydonlari digesti. Ikkalasi
+mos kelmasa indeks eskirgan hisoblanadi va joyida qayta hisoblanadi.
+"""
+import hashlib
+import json
+
+from .answer_normalizer import (
+    collect_acceptable_answers,
+    expand_answer_variants,
+    split_slot_acceptable,
+)
+from .slots import FILL_SINGLE_BLANK_TYPES
+
+VARIANT_INDEX_VERSION = 2
+
+
+def answer_key_digest(question):
+    """Variantlarga ta'sir qiluvchi maydonlar digesti."""
+    opts = question.options_json if isinstance(question.options_json, dict) else {}
+    payload = json.dumps(
+        [
+            question.question_type,
+            question.question_text or '',
+            question.correct_answer or '',
+            question.correct_answers_json,
+            opts.get('word_list', []),
+        ],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _slot_acceptable(question, slot, raw):
+    if slot.kind == 'blank':
+        if question.question_type == 'summary_box':
+            from .scoring import _summary_acceptable_variants
+
+            return _summary_acceptable_variants(question, raw)
+        return split_slot_acceptable(raw)
+    if slot.kind == 'single' and question.question_type in FILL_SINGLE_BLANK_TYPES:
+        return collect_acceptable_answers(question)
+    return None
+
+
+def compute_slot_variants(question, slots, raw_correct):
+    """{slot_key: frozenset(variantlar)} — faqat matnli slotlar uchun."""
+    out = {}
+    for slot, raw in zip(slots, raw_correct):
+        acceptable = _slot_acceptable(question, slot, raw)
+        if acceptable is None:
+            continue
+        variants = set()
+        for item in acceptable:
+            if item is None or not str(item).strip():
+                continue
+            variants |= expand_answer_variants(item)
+        out[slot.key] = frozenset(variants)
+    return out
+
+
+def stored_slot_variants(question):
+    """Saqlangan indeks hali yaroqli bo'lsa — {slot_key: frozenset}, aks holda None."""
+    data = getattr(question, 'answer_variants_json', None)
+    if not isinstance(data, dict) or data.get('v') != VARIANT_INDEX_VERSION:
+        return None
+    if data.get('k') != answer_key_digest(question):
+        return None
+    slots = data.get('s')
+    if not isinstance(slots, dict):
+        return None
+    return {str(key): frozenset(values) for key, values in slots.items()}
+
+
+def build_variant_index(question):
+    from .grading_plan import compile_question_plan
+
+    plan = compile_question_plan(question, with_variants=False)
+    variants = compute_slot_variants(question, plan.slots, plan.raw_correct)
+    return {
+        'v': VARIANT_INDEX_VERSION,
+        'k': answer_key_digest(question),
+        's': {key: sorted(values) for key, values in variants.items()},
+    }
+
+
+def refresh_variant_index(question, force=False):
+    """Indeks eskirgan bo'lsa qayta hisoblaydi. True — maydon o'zgardi."""
+    if not force and stored_slot_variants(question) is not None:
+        return False
+    index = build_variant_index(question)
+    if index == question.answer_variants_json:
+        return False
+    question.answer_variants_json = index
+    return True
@@ -0,0 +1,85 @@
+"""Fork process pool — og'ir hisob-kitoblar uchun, ishchilar bazaga tegmaydi.
+
+Fork qilingan ishchi ota jarayonning ochiq DB ulanishlarini (socket bilan
+birga) meros oladi. Ishchida shu ulanishdan so'rov yuborilsa yoki u
+``close()`` qilinsa (PostgreSQL da Terminate xabari), ota jarayon ulanishi
+buziladi. Shuning uchun ishchi ishga tushishda meros ulanishlar wrapper'lardan
+uziladi (socket'ga tegmasdan), barcha ORM so'rovlari esa asosiy jarayonda
+qoladi — ishchiga faqat tayyor, bazasiz hisoblanadigan ma'lumot yuboriladi.
+"""
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.db import connections
+
+# Uzilgan meros ulanish obyektlari: GC ularni yopib (socket orqali) ota
+# jarayon ulanishini uzmasin. Ishchi os._exit bilan chiqadi — finalizer yo'q.
+_inherited = []
+
+
+def can_fork():
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def detach_inherited_connections():
+    """Ishchida: ota jarayondan qolgan ulanishlarni ishlatilmaydigan qilish."""
+    for conn in connections.all(initialized_only=True):
+        if conn.connection is not None:
+            _inherited.append(conn.connection)
+            conn.connection = None
+
+
+def _init_worker(initializer, initargs):
+    detach_inherited_connections()
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def fork_pool(workers, initializer=None, initargs=()):
+    """``ProcessPoolExecutor`` (fork) — ishchilar meros DB ulanishlarini ishlatmaydi."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=_init_worker,
+        initargs=(initializer, initargs),
+    )
+
+
+def chunked(iterable, size):
+    """Iterable -> ``size`` tadan ro'yxatlar (oxirgisi qisqaroq bo'lishi mumkin)."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def map_bounded(pool, fn, chunks, workers, consume):
+    """``fn(chunk)`` ni pool da bajarish, natijani ``consume(chunk, natija)`` ga berish.
+
+    Navbatda ko'pi bilan ``workers * 2`` ta vazifa turadi — ``chunks`` oqimi
+    (masalan ``iterator()``) xotiraga to'liq o'qilmaydi. ``consume`` asosiy
+    jarayonda, tugash tartibida chaqiriladi. Vazifa xato bersa, kutayotganlari
+    bekor qilinadi va xato qayta ko'tariladi.
+    """
+    pending = {}
+
+    def _drain(return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            consume(pending.pop(future), future.result())
+
+    try:
+        for chunk in chunks:
+            pending[pool.submit(fn, chunk)] = chunk
+            if len(pending) >= workers * 2:
+                _drain(FIRST_COMPLETED)
+        while pending:
+            _drain(FIRST_COMPLETED)
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import MockPassage, MockQuestion, MockTest
+from .services.render_cache import bump_content_version
+from .services.test_counters import passage_contribution, question_contribution, shift_test_counters
+
+
+@receiver([post_save, post_delete], sender=MockTest)
+def _test_content_changed(sender, instance, **kwargs):
+    bump_content_version(instance)
+
+
+def _cached_test(sender, instance):
+    # Xotiradagi test obyekti (masalan, inline formset) ham yangilansin
+    return instance.test if sender.test.is_cached(instance) else instance.test_id
+
+
+@receiver([post_save, post_delete], sender=MockPassage)
+@receiver([post_save, post_delete], sender=MockQuestion)
+def _child_content_changed(sender, instance, **kwargs):
+    bump_content_version(_cached_test(sender, instance))
+
+
+def _contribution(sender, instance):
+    if sender is MockQuestion:
+        return question_contribution(instance)
+    return passage_contribution(instance)
+
+
+@receiver(pre_save, sender=MockPassage)
+@receiver(pre_save, sender=MockQuestion)
+def _remember_counter_contribution(sender, instance, raw=False, **kwargs):
+    instance._counter_old = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    old = sender.objects.filter(pk=instance.pk).first()
+    if old is not None:
+        instance._counter_old = (old.test_id, _contribution(sender, old))
+
+
+@receiver(post_save, sender=MockPassage)
+@receiver(post_save, sender=MockQuestion)
+def _shift_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new = _contribution(sender, instance)
+    old = getattr(instance, '_counter_old', None)
+    instance._counter_old = None
+    if not created and old is None:
+        return
+    if old is not None:
+        if old == (instance.test_id, new):
+            return
+        shift_test_counters(old[0] if old[0] != instance.test_id else _cached_test(sender, instance), old[1], -1)
+    shift_test_counters(_cached_test(sender, instance), new, 1)
+
+
+@receiver(post_delete, sender=MockPassage)
+@receiver(post_delete, sender=MockQuestion)
+def _shift_counters_on_delete(sender, instance, **kwargs):
+    shift_test_counters(_cached_test(sender, instance), _contribution(sender, instance), -1)
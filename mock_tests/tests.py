@@ -1,7 +1,7 @@
 import json
 
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
@@ -1834,3 +1834,1938 @@ class ReadingParserBlankLineTests(TestCase):
         html = self.client.get(reverse('mock_tests:test_take', kwargs={'pk': test.pk})).content.decode()
         self.assertIn('Background context', html)
         self.assertIn('digest the', html)
+
+
+class GradingPlanTests(MockTestFixturesMixin, TestCase):
+    def setUp(self):
+        from mock_tests.services.grading_plan import clear_plan_cache
+
+        clear_plan_cache()
+
+    def test_plan_cached_per_question_version(self):
+        from mock_tests.services.grading_plan import get_question_plan
+
+        test = self._create_listening_test()
+        q = test.questions.get(question_type='notes_completion')
+        plan = get_question_plan(q)
+        self.assertEqual([s.key for s in plan.slots], ['1', '2'])
+        self.assertEqual(plan.raw_correct, ('anna/Anna', 'london/London'))
+        same = get_question_plan(test.questions.get(pk=q.pk))
+        self.assertIs(plan, same)
+
+        q.question_text = 'Name [1], City [2], Street [3]'
+        q.correct_answers_json = ['anna', 'london', 'baker']
+        changed = get_question_plan(q)
+        self.assertIsNot(plan, changed)
+        self.assertEqual(changed.slot_count, 3)
+        self.assertEqual(q.gradable_slot_count(), 3)
+
+    def test_score_attempt_compiles_each_question_once(self):
+        from unittest import mock
+
+        from mock_tests.services import grading_plan
+
+        test = MockTest.objects.create(title='Plan 40', test_type='listening', is_active=True)
+        text = ' '.join(f'Word [{i}]' for i in range(1, 41))
+        q = MockQuestion.objects.create(
+            test=test, order=1, part_number=1, question_type='notes_completion',
+            question_text=text, correct_answers_json=[f'w{i}' for i in range(1, 41)], points=40,
+        )
+        attempt = MockAttempt.objects.create(
+            test=test, session_key='plan-40',
+            answers_json={str(q.pk): {str(i): f'w{i}' for i in range(1, 41)}},
+        )
+        # saqlashda hisoblagichlar rejani oldindan qurgan
+        grading_plan.clear_plan_cache()
+        q.__dict__.pop('_grading_plan', None)
+        with mock.patch.object(
+            grading_plan, 'list_gradable_slots', wraps=grading_plan.list_gradable_slots,
+        ) as spy:
+            result = score_attempt(attempt, [q])
+            score_attempt(attempt, [q])
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(result['correct_count'], 40)
+        self.assertEqual(result['total_questions'], 40)
+
+
+class AnswerVariantIndexTests(MockTestFixturesMixin, TestCase):
+    def test_index_stored_on_save_and_used_for_grading(self):
+        from unittest import mock
+
+        from mock_tests.services import answer_normalizer
+        from mock_tests.services.grading_plan import clear_plan_cache
+        from mock_tests.services.variant_index import VARIANT_INDEX_VERSION
+
+        test = self._create_listening_test()
+        q = test.questions.get(question_type='notes_completion')
+        index = q.answer_variants_json
+        self.assertEqual(index['v'], VARIANT_INDEX_VERSION)
+        self.assertEqual(set(index['s']), {'1', '2'})
+        self.assertIn('anna', index['s']['1'])
+
+        clear_plan_cache()
+        q = test.questions.get(pk=q.pk)
+        with mock.patch.object(
+            answer_normalizer, 'expand_answer_variants', wraps=answer_normalizer.expand_answer_variants,
+        ) as spy:
+            frac, got, _, _ = score_blanks(q, {'1': 'Anna', '2': 'london'})
+        self.assertEqual((frac, got), (1.0, 2))
+        # faqat foydalanuvchi javoblari kengaytiriladi — kalitlar indeksdan
+        self.assertEqual(spy.call_count, 2)
+
+    def test_stale_index_is_ignored_and_backfilled(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        test = self._create_listening_test()
+        q = test.questions.get(question_type='notes_completion')
+        MockQuestion.objects.filter(pk=q.pk).update(correct_answers_json=['maria', 'paris'])
+        q = test.questions.get(pk=q.pk)
+        ok, _, _ = check_question_answer(q, {'1': 'maria', '2': 'paris'})
+        self.assertTrue(ok)
+
+        out = StringIO()
+        call_command('build_answer_variants', stdout=out)
+        q.refresh_from_db()
+        self.assertIn('maria', q.answer_variants_json['s']['1'])
+        self.assertIn("1 ta yangilandi", out.getvalue())
+
+    def test_single_fill_and_summary_box_variants(self):
+        test = MockTest.objects.create(title='Variants', test_type='reading', is_active=True)
+        fill = MockQuestion.objects.create(
+            test=test, order=1, question_type='fill_blank',
+            question_text='Starts at ______', correct_answers_json=['9', 'nine'],
+        )
+        self.assertIn('nine', fill.answer_variants_json['s'][''])
+        self.assertTrue(check_question_answer(fill, 'Nine')[0])
+
+        box = MockQuestion.objects.create(
+            test=test, order=2, question_type='summary_box',
+            question_text='It was [2].', correct_answers_json=['cheap'],
+            options_json={'word_list': ['expensive', 'cheap']},
+        )
+        self.assertIn('b', box.answer_variants_json['s']['2'])
+        self.assertEqual(score_blanks(box, {'2': 'b'})[1], 1)
+
+
+class BoundedFuzzyMatcherTests(TestCase):
+    def test_within_edit_distance_agrees_with_levenshtein(self):
+        import random
+
+        from mock_tests.services.answer_normalizer import levenshtein, within_edit_distance
+
+        rng = random.Random(3)
+        alphabet = 'abc '
+        for _ in range(400):
+            a = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 9)))
+            b = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 9)))
+            for k in (0, 1, 2, 3):
+                self.assertEqual(
+                    within_edit_distance(a, b, k), levenshtein(a, b) <= k, (a, b, k),
+                )
+
+    def test_fuzzy_match_any_batch(self):
+        from mock_tests.services.answer_normalizer import fuzzy_match_any
+
+        variants = {'library', 'the library', 'museum'}
+        self.assertTrue(fuzzy_match_any({'librray'}, variants, 2))
+        self.assertTrue(fuzzy_match_any({'museun'}, variants, 1))
+        self.assertFalse(fuzzy_match_any({'libr'}, variants, 1))
+        self.assertFalse(fuzzy_match_any({'museun'}, variants, 0))
+
+    def test_question_fuzzy_tolerance_from_options(self):
+        test = MockTest.objects.create(title='Tolerance', test_type='listening', is_active=True)
+        strict = MockQuestion.objects.create(
+            test=test, order=1, question_type='notes_completion',
+            question_text='City [1]', correct_answers_json=['london'],
+            options_json={'fuzzy_tolerance': 0},
+        )
+        lenient = MockQuestion.objects.create(
+            test=test, order=2, question_type='notes_completion',
+            question_text='Street [2]', correct_answers_json=['kensington'],
+            options_json={'fuzzy_tolerance': 2},
+        )
+        self.assertEqual(score_blanks(strict, {'1': 'londn'})[1], 0)
+        self.assertEqual(score_blanks(lenient, {'2': 'kensingtno'})[1], 1)
+
+
+class CompiledNormalizerTests(TestCase):
+    def test_unicode_quotes_and_dashes_fold(self):
+        self.assertTrue(match_text_answer('it’s “fine”', ["it's fine"]))
+        self.assertTrue(match_text_answer('north–east', ['north-east']))
+        self.assertTrue(match_text_answer('１５ km', ['15 km']))
+
+    def test_compound_numbers_and_grouping(self):
+        self.assertTrue(match_text_answer('twenty-five', ['25']))
+        self.assertTrue(match_text_answer('twenty five', ['25']))
+        self.assertTrue(match_text_answer('1,000', ['one thousand']))
+        self.assertTrue(match_text_answer('one hundred and five', ['105']))
+        self.assertFalse(match_text_answer('3.5', ['35']))
+
+    def test_ordinals(self):
+        self.assertTrue(match_text_answer('15 October', ['15th October']))
+        self.assertTrue(match_text_answer('fifteenth October', ['15 October']))
+        self.assertTrue(match_text_answer('the 21st century', ['twenty-first century']))
+
+    def test_expand_variants_single_call_forms(self):
+        from mock_tests.services.answer_normalizer import expand_answer_variants
+
+        self.assertEqual(
+            expand_answer_variants('The 2nd floor'),
+            {'the 2nd floor', '2nd floor', 'the 2 floor', '2 floor'},
+        )
+        self.assertEqual(expand_answer_variants('  '), set())
+
+
+class RegradeAttemptsTests(MockTestFixturesMixin, TestCase):
+    def _finished(self, test, answers):
+        from mock_tests.services.regrade import apply_score_result
+
+        attempt = MockAttempt(test=test, session_key='s', answers_json=answers, is_finished=True)
+        apply_score_result(attempt, score_attempt(attempt, list(test.questions.all())))
+        attempt.save()
+        return attempt
+
+    def test_command_updates_only_changed_attempts(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        test = self._create_listening_test()
+        q = test.questions.get(question_type='notes_completion')
+        a_old = self._finished(test, {str(q.pk): {'1': 'anna', '2': 'london'}})
+        a_new = self._finished(test, {str(q.pk): {'1': 'maria', '2': 'london'}})
+        self.assertEqual((a_old.correct_count, a_new.correct_count), (2, 1))
+
+        q.correct_answers_json = ['maria', 'london']
+        q.save()
+
+        out = StringIO()
+        call_command('regrade_attempts', '--test-id', str(test.pk), '--dry-run', stdout=out)
+        a_new.refresh_from_db()
+        self.assertEqual(a_new.correct_count, 1)
+        self.assertIn('2 ta o\'zgaradi', out.getvalue())
+
+        call_command('regrade_attempts', '--chunk-size', '1', stdout=StringIO())
+        a_old.refresh_from_db()
+        a_new.refresh_from_db()
+        self.assertEqual((a_old.correct_count, a_new.correct_count), (1, 2))
+        self.assertEqual(a_new.total_questions, 3)
+        self.assertGreater(a_new.score_percent, a_old.score_percent)
+
+        out = StringIO()
+        call_command('regrade_attempts', stdout=out)
+        self.assertIn('0 ta yangilandi', out.getvalue())
+
+    def test_worker_pool_scores_compact_answers_decoded_in_parent(self):
+        from mock_tests.services.answer_codec import clear_layout_cache, encode_answers
+        from mock_tests.services.regrade import regrade_test_attempts
+
+        test = self._create_listening_test()
+        questions = list(test.questions.all())
+        q = test.questions.get(question_type='notes_completion')
+        attempts = []
+        for first in ('anna', 'maria', 'maria'):
+            answers = {str(q.pk): {'1': first, '2': 'london'}}
+            attempt = self._finished(test, answers)
+            attempt.answers_json = encode_answers(test, questions, answers)
+            attempt.save(update_fields=['answers_json'])
+            attempts.append(attempt)
+
+        q.correct_answers_json = ['maria', 'london']
+        q.save()
+        # Sovuq layout keshi: ishchilarda u bazadan o'qilishi kerak bo'lardi.
+        clear_layout_cache()
+
+        stats = regrade_test_attempts(test, chunk_size=1, workers=2)
+        self.assertEqual((stats.scanned, stats.changed), (3, 3))
+        counts = [MockAttempt.objects.get(pk=a.pk).correct_count for a in attempts]
+        self.assertEqual(counts, [1, 2, 2])
+
+    def test_admin_action_queues_regrade_for_the_job_runner(self):
+        from io import StringIO
+        from unittest import mock
+
+        from django.contrib.auth import get_user_model
+        from django.core.management import call_command
+
+        from mock_tests.services import regrade
+        from mock_tests.services.jobs import REGRADE, job_status
+
+        test = self._create_listening_test()
+        q = test.questions.get(question_type='notes_completion')
+        attempt = self._finished(test, {str(q.pk): {'1': 'maria', '2': 'london'}})
+        q.correct_answers_json = ['maria', 'london']
+        q.save()
+
+        admin_user = get_user_model().objects.create_superuser('root', 'r@example.com', 'pw')
+        self.client.force_login(admin_user)
+        changelist = reverse('admin:mock_tests_mocktest_changelist')
+        with mock.patch.object(regrade, 'score_attempt', side_effect=AssertionError('request worker')):
+            for _ in range(2):
+                self.client.post(changelist, {'action': 'regrade_attempts', '_selected_action': [test.pk]})
+        self.assertEqual(job_status(REGRADE, test.pk)['state'], 'pending')
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.correct_count, 1)
+
+        out = StringIO()
+        call_command('run_test_jobs', stdout=out)
+        self.assertEqual(out.getvalue().count(f'regrade #{test.pk}: done'), 1)
+        self.assertEqual(job_status(REGRADE, test.pk), {'state': 'done', 'done': 1, 'total': 1})
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.correct_count, 2)
+
+
+class ResultSnapshotTests(MockTestFixturesMixin, TestCase):
+    def _finish(self, test, answers):
+        url = reverse('mock_tests:test_take', kwargs={'pk': test.pk})
+        self.client.get(url)
+        data = self.client.post(
+            url,
+            data=json.dumps({'action': 'finish', 'answers': answers}),
+            content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        ).json()
+        attempt = MockAttempt.objects.get(test=test, is_finished=True)
+        return attempt, data['redirect_url']
+
+    def test_result_renders_from_snapshot_without_scoring(self):
+        from unittest import mock
+
+        from mock_tests.services import result_snapshot
+
+        test = self._create_listening_test()
+        q = test.questions.get(question_type='notes_completion')
+        q.explanation = 'Anna London'
+        q.save()
+        attempt, url = self._finish(test, {str(q.pk): {'1': 'anna', '2': 'paris'}})
+        snap = attempt.result_snapshot
+        self.assertEqual(snap['v'], result_snapshot.SNAPSHOT_VERSION)
+        self.assertEqual(len(snap['r']), 3)
+        self.assertNotIn('Anna London', json.dumps(snap['r']))
+
+        with mock.patch.object(result_snapshot, 'score_attempt') as scorer:
+            html = self.client.get(url).content.decode()
+        scorer.assert_not_called()
+        self.assertIn('Anna London', html)
+        self.assertIn('1 / 3', html)
+
+    def test_snapshot_rebuilt_when_answer_key_changes(self):
+        test = self._create_listening_test()
+        q = test.questions.get(question_type='notes_completion')
+        attempt, url = self._finish(test, {str(q.pk): {'1': 'anna', '2': 'paris'}})
+        old_key = attempt.result_snapshot['k']
+
+        q.correct_answers_json = ['anna', 'paris']
+        q.save()
+        html = self.client.get(url).content.decode()
+        self.assertIn('2 / 3', html)
+        attempt.refresh_from_db()
+        self.assertNotEqual(attempt.result_snapshot['k'], old_key)
+        self.assertEqual(attempt.correct_count, 2)
+
+
+class TestLayoutCacheTests(MockTestFixturesMixin, TestCase):
+    def test_layout_built_once_for_take_and_scoring(self):
+        from unittest import mock
+
+        from django.core.cache import cache
+
+        from mock_tests.services import layout as layout_mod
+        from mock_tests.services.grading_plan import clear_plan_cache
+
+        test = self._create_listening_test()
+        q = test.questions.get(question_type='notes_completion')
+        cache.clear()
+        clear_plan_cache()
+        layout_mod.clear_layout_cache()
+        url = reverse('mock_tests:test_take', kwargs={'pk': test.pk})
+        with mock.patch.object(
+            layout_mod, 'build_test_layout', wraps=layout_mod.build_test_layout,
+        ) as spy:
+            self.client.get(url)
+            self.client.get(url)
+            self.client.post(
+                url,
+                data=json.dumps({'action': 'finish', 'answers': {str(q.pk): {'1': 'anna'}}}),
+                content_type='application/json',
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+        self.assertEqual(spy.call_count, 1)
+
+        layout_mod.clear_layout_cache()
+        layout = layout_mod.get_test_layout(test, list(test.questions.all()))
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(layout.range_display, '1-3')
+        self.assertEqual(layout.total_slots, 3)
+
+    def test_linear_numbering_keeps_large_part_sequential(self):
+        from mock_tests.services.layout import build_blank_buttons
+
+        test = MockTest.objects.create(title='Big', test_type='listening', is_active=True)
+        questions = [
+            MockQuestion.objects.create(
+                test=test, order=i, part_number=1, question_type='mcq',
+                question_text=f'Q{i}', option_a='A', option_b='B', correct_answer='a',
+            )
+            for i in range(1, 301)
+        ]
+        questions.append(MockQuestion.objects.create(
+            test=test, order=5, part_number=1, question_type='fill_blank',
+            question_text='Dup order', correct_answer='x',
+        ))
+        buttons, last = build_blank_buttons(questions)
+        nums = [b['num'] for b in buttons]
+        self.assertEqual(len(set(nums)), len(nums))
+        self.assertEqual(last, 301)
+
+
+class TakeRenderCacheTests(MockTestFixturesMixin, TestCase):
+    def test_body_rendered_once_and_answers_only_in_json(self):
+        from unittest import mock
+
+        from django.core.cache import cache
+
+        from mock_tests import views
+
+        cache.clear()
+        test = self._create_reading_matching_test()
+        url = reverse('mock_tests:test_take', kwargs={'pk': test.pk})
+        with mock.patch.object(views, '_take_body_context', wraps=views._take_body_context) as spy:
+            first = self.client.get(url).content.decode()
+            q = next(q for q in test.questions.all() if q.is_multi_matching())
+            attempt = MockAttempt.objects.get(test=test, is_finished=False)
+            attempt.answers_json = {str(q.pk): dict(q.correct_answers_json)}
+            attempt.save()
+            second = self.client.get(url).content.decode()
+        self.assertEqual(spy.call_count, 1)
+        self.assertIn('mock-matching-select', second)
+        self.assertNotIn(' selected', second)
+        self.assertIn('id="mock-take-csrf"', second)
+        self.assertIn(f'"{q.pk}"', second.split('id="saved-answers-data"')[1])
+        self.assertNotIn(f'"{q.pk}"', first.split('id="saved-answers-data"')[1])
+
+    def test_question_edit_invalidates_rendered_body(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        test = self._create_listening_test()
+        url = reverse('mock_tests:test_take', kwargs={'pk': test.pk})
+        self.assertIn('Pick one', self.client.get(url).content.decode())
+        q = test.questions.get(question_type='mcq')
+        q.question_text = 'Choose wisely'
+        q.save()
+        html = self.client.get(url).content.decode()
+        self.assertIn('Choose wisely', html)
+        self.assertNotIn('Pick one', html)
+
+    def test_version_lives_in_database_not_in_process_cache(self):
+        from unittest import mock
+
+        from django.core.cache import cache
+
+        from mock_tests.services.render_cache import take_body_key
+
+        cache.clear()
+        test = self._create_listening_test()
+        url = reverse('mock_tests:test_take', kwargs={'pk': test.pk})
+        self.client.get(url)
+        old_key = take_body_key(MockTest.objects.get(pk=test.pk))
+        self.assertIsNotNone(cache.get(old_key))
+
+        # Boshqa worker: uning keshida hech narsa o'chirilmaydi.
+        q = MockQuestion.objects.get(test=test, question_type='mcq')
+        q.question_text = 'Choose wisely'
+        with mock.patch.object(cache, 'delete') as delete, mock.patch.object(cache, 'delete_many') as delete_many:
+            q.save()
+        delete.assert_not_called()
+        delete_many.assert_not_called()
+
+        self.assertNotEqual(take_body_key(MockTest.objects.get(pk=test.pk)), old_key)
+        self.assertIn('Choose wisely', self.client.get(url).content.decode())
+
+
+class BatchGradingTests(MockTestFixturesMixin, TestCase):
+    def _mixed_test(self):
+        test = self._create_listening_test()
+        MockQuestion.objects.create(
+            test=test, order=3, part_number=1, question_type='mcq', mcq_select_count=2,
+            question_text='Which TWO?', option_a='A', option_b='B', option_c='C', option_d='D',
+            correct_answer='a,c',
+        )
+        MockQuestion.objects.create(
+            test=test, order=6, part_number=2, question_type='true_false_not_given',
+            question_text='Statement', option_a='True', option_b='False', option_c='Not Given',
+            correct_answer='c', points=2,
+        )
+        MockQuestion.objects.create(
+            test=test, order=7, part_number=2, question_type='fill_blank',
+            question_text='Starts at ______', correct_answers_json=['9', 'nine'],
+        )
+        MockQuestion.objects.create(
+            test=test, order=8, part_number=2, question_type='matching_features',
+            question_text='Match', correct_answers_json={'8': 'a', '9': 'b'},
+            options_json={
+                'items': [{'num': 8, 'label': 'X'}, {'num': 9, 'label': 'Y'}],
+                'features': [{'letter': 'a', 'text': 'F1'}, {'letter': 'b', 'text': 'F2'}],
+            },
+        )
+        return test
+
+    def _random_case(self, rng, questions, test_plan):
+        pool = ['a', 'b', 'c', 'd', 'A', 'anna', 'Ana', 'london', 'nine', '9', 'x', '']
+        answers = {}
+        sheet = {}
+        for q in questions:
+            plan = test_plan.question_plans[q.id]
+            nums = test_plan.dock_nums[q.id]
+            values = [rng.choice(pool) for _ in plan.slots]
+            for num, value in zip(nums, values):
+                sheet[str(num)] = value
+            kinds = {s.kind for s in plan.slots}
+            if kinds == {'single'}:
+                answers[str(q.id)] = values[0]
+            elif kinds == {'mcq_letter'}:
+                answers[str(q.id)] = ','.join(v for v in values if v)
+            else:
+                answers[str(q.id)] = {s.key: v for s, v in zip(plan.slots, values)}
+        return answers, sheet
+
+    def test_batch_matches_score_attempt(self):
+        import random
+
+        from mock_tests.services.batch_grading import compile_batch_key, grade_sheets
+        from mock_tests.services.grading_plan import get_test_plan
+
+        test = self._mixed_test()
+        questions = list(test.questions.all())
+        test_plan = get_test_plan(questions)
+        key = compile_batch_key(test, questions)
+        self.assertFalse(key.fallback)
+
+        rng = random.Random(3)
+        cases = [self._random_case(rng, questions, test_plan) for _ in range(150)]
+        for use_numpy in (False, True):
+            results = grade_sheets(key, [(i, sheet) for i, (_, sheet) in enumerate(cases)], use_numpy=use_numpy)
+            for (answers, sheet), res in zip(cases, results):
+                expected = score_attempt(MockAttempt(test=test, answers_json=answers), questions)
+                self.assertEqual(res.correct_count, expected['correct_count'], sheet)
+                self.assertEqual(res.score_percent, expected['score_percent'], sheet)
+                self.assertEqual(res.ielts_band, expected['ielts_band'])
+
+    def test_tfng_sheet_accepts_words_and_initials(self):
+        from mock_tests.services.batch_grading import compile_batch_key, grade_sheets
+
+        test = self._mixed_test()
+        key = compile_batch_key(test, test.questions.all())
+        num = next(n for n, k in zip(key.numbers, key.column_kinds) if k == 'choice')
+        results = grade_sheets(key, [('a', {num: 'Not Given'}), ('b', {num: 'ng'}), ('c', {num: 'T'})])
+        self.assertEqual([r.correct_count for r in results], [1, 1, 0])
+
+    def test_command_grades_csv(self):
+        import tempfile
+        from io import StringIO
+        from pathlib import Path
+
+        from django.core.management import call_command
+
+        test = self._create_listening_test()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'sheets.csv'
+            path.write_text('student,1,2,3,99\nali,Anna,london,b,x\nvali,anna,paris,c,\n', encoding='utf-8')
+            out = StringIO()
+            call_command('grade_answer_sheets', str(test.pk), str(path), stdout=out, stderr=StringIO())
+        lines = out.getvalue().strip().splitlines()
+        self.assertEqual(lines[0].split(','), [
+            'student', 'correct_count', 'total_questions', 'earned_points',
+            'total_points', 'score_percent', 'ielts_band',
+        ])
+        self.assertTrue(lines[1].startswith('ali,3,3,'))
+        self.assertTrue(lines[2].startswith('vali,1,3,'))
+
+
+class DailyRollupTests(MockTestFixturesMixin, TestCase):
+    def _rows(self, test):
+        from mock_tests.models import MockTestDailyStat
+
+        return list(
+            MockTestDailyStat.objects.filter(test=test)
+            .order_by('day')
+            .values_list('day', 'started_count', 'finished_count', 'score_sum', 'score_count',
+                         'band_sum', 'band_count', 'dur_lt_10', 'dur_10_20', 'dur_60_plus')
+        )
+
+    def _attempt(self, test, minutes=None, score=None, band=None, **kwargs):
+        attempt = MockAttempt.objects.create(test=test, session_key=kwargs.pop('session_key', 's'))
+        if minutes is not None:
+            attempt.is_finished = True
+            attempt.finished_at = attempt.started_at + timezone.timedelta(minutes=minutes)
+            attempt.score_percent = score
+            attempt.ielts_band = band
+            attempt.save()
+        return attempt
+
+    def test_save_updates_rollup_incrementally(self):
+        from decimal import Decimal
+
+        test = self._create_listening_test()
+        self._attempt(test)
+        a = self._attempt(test, minutes=5, score=Decimal('80'), band=Decimal('7.0'))
+        self._attempt(test, minutes=90, score=Decimal('40'), band=Decimal('5.0'))
+        def totals():
+            # Yarim tundan o'tib tugagan urinish keyingi kunga tushadi — ustunlar yig'indisi
+            return [sum(col) for col in list(zip(*self._rows(test)))[1:]]
+
+        started, finished, score_sum, score_count, band_sum, band_count, lt10, _m, plus60 = totals()
+        self.assertEqual((started, finished, score_count, band_count), (3, 2, 2, 2))
+        self.assertEqual((score_sum, band_sum), (Decimal('120'), Decimal('12.0')))
+        self.assertEqual((lt10, plus60), (1, 1))
+
+        a.score_percent = Decimal('100')
+        a.ielts_band = Decimal('9.0')
+        a.save(update_fields=['score_percent', 'ielts_band'])
+        row = totals()
+        self.assertEqual((row[1], row[2], row[4]), (2, Decimal('140'), Decimal('14.0')))
+
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['total_attempts'], 3)
+        self.assertEqual(stats['in_progress'], 1)
+        self.assertAlmostEqual(float(stats['avg_score']), 70.0)
+        self.assertAlmostEqual(float(stats['avg_band']), 7.0)
+        self.assertEqual([r['count'] for r in stats['duration_histogram']], [1, 0, 0, 0, 0, 1])
+
+    def test_backfill_matches_incremental(self):
+        from decimal import Decimal
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from mock_tests.models import MockTestDailyStat
+
+        test = self._create_listening_test()
+        self._attempt(test)
+        self._attempt(test, minutes=15, score=Decimal('62.50'), band=Decimal('6.5'))
+        self._attempt(test, minutes=50, score=Decimal('30'), band=None)
+        incremental = self._rows(test)
+
+        MockTestDailyStat.objects.all().delete()
+        out = StringIO()
+        call_command('backfill_daily_stats', '--test-id', str(test.pk), stdout=out)
+        self.assertIn(f'{len(incremental)} ta qator', out.getvalue())
+        self.assertEqual(self._rows(test), incremental)
+
+    def test_finish_view_records_rollup(self):
+        test = self._create_listening_test()
+        url = reverse('mock_tests:test_take', kwargs={'pk': test.pk})
+        self.client.get(url)
+        self.client.post(
+            url,
+            data=json.dumps({'action': 'finish', 'answers': {}}),
+            content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        row = self._rows(test)[0]
+        self.assertEqual((row[1], row[2], row[4]), (1, 1, 1))
+
+
+class SessionSketchTests(MockTestFixturesMixin, TestCase):
+    def test_sketch_estimate_within_error_bound(self):
+        from mock_tests.services.hll import (
+            HLL_STANDARD_ERROR,
+            empty_sketch,
+            estimate_cardinality,
+            merge_sketches,
+            sketch_add,
+        )
+
+        self.assertEqual(estimate_cardinality(empty_sketch()), 0)
+        small = empty_sketch()
+        for key in ('a', 'b', 'c', 'a'):
+            sketch_add(small, key)
+        self.assertEqual(estimate_cardinality(small), 3)
+
+        parts = [empty_sketch() for _ in range(5)]
+        for i in range(20000):
+            sketch_add(parts[i % 5], f'sess-{i % 15000}')
+        estimate = estimate_cardinality(merge_sketches(parts))
+        self.assertLess(abs(estimate - 15000) / 15000, 4 * HLL_STANDARD_ERROR)
+
+    def test_dashboard_sessions_from_sketches(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from mock_tests.models import MockTestDailyStat
+        from mock_tests.services.rollups import unique_sessions, unique_sessions_by
+
+        test = self._create_listening_test()
+        other = MockTest.objects.create(title='Other', test_type='reading', is_active=True)
+        for key, t, finished in (('a', test, True), ('a', test, False), ('b', test, False), ('a', other, True)):
+            MockAttempt.objects.create(
+                test=t, session_key=key, is_finished=finished,
+                finished_at=timezone.now() if finished else None,
+            )
+        self.assertEqual(unique_sessions(), 2)
+        self.assertEqual(unique_sessions(finished=True), 1)
+        self.assertEqual(unique_sessions_by('test_id'), {test.pk: 2, other.pk: 1})
+
+        before = list(MockTestDailyStat.objects.order_by('pk').values_list(
+            'test_id', 'session_hll', 'finished_session_hll'))
+        call_command('backfill_daily_stats', stdout=StringIO())
+        after = list(MockTestDailyStat.objects.order_by('test_id').values_list(
+            'test_id', 'session_hll', 'finished_session_hll'))
+        self.assertEqual(
+            sorted((t, bytes(s), bytes(f)) for t, s, f in before),
+            [(t, bytes(s), bytes(f)) for t, s, f in after],
+        )
+
+        stats = get_dashboard_stats()
+        self.assertEqual((stats['unique_sessions'], stats['unique_sessions_with_finish']), (2, 1))
+        by_type = {row['test__test_type']: row['unique_sessions'] for row in stats['by_type']}
+        self.assertEqual(by_type, {'listening': 1, 'reading': 1})
+
+    def test_attempt_start_buffers_sketch_without_row_lock(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from mock_tests.models import MockSessionSketchDelta, MockTestDailyStat
+        from mock_tests.services.hll import estimate_cardinality, merge_sketches
+        from mock_tests.services.rollups import unique_sessions
+
+        test = self._create_listening_test()
+        with CaptureQueriesContext(connection) as ctx:
+            for key in ('a', 'b', 'a'):
+                MockAttempt.objects.create(test=test, session_key=key)
+        sketch_writes = [
+            q['sql'] for q in ctx.captured_queries
+            if 'FOR UPDATE' in q['sql'] or (q['sql'].startswith('UPDATE') and 'session_hll' in q['sql'])
+        ]
+        self.assertEqual(sketch_writes, [])
+        self.assertEqual(MockSessionSketchDelta.objects.count(), 3)
+        self.assertIsNone(MockTestDailyStat.objects.get(test=test).session_hll)
+
+        out = StringIO()
+        call_command('fold_session_sketches', stdout=out)
+        self.assertIn('3 ta', out.getvalue())
+        self.assertFalse(MockSessionSketchDelta.objects.exists())
+        row = MockTestDailyStat.objects.get(test=test)
+        self.assertEqual(estimate_cardinality(merge_sketches([row.session_hll])), 2)
+
+        # O'qishdan oldin bufer o'zi qo'shiladi; takroriy qo'shish idempotent.
+        MockAttempt.objects.create(test=test, session_key='c')
+        MockAttempt.objects.create(test=test, session_key='a')
+        self.assertEqual(unique_sessions(), 3)
+        self.assertEqual(unique_sessions(), 3)
+
+
+@override_settings(MOCK_AUTOSAVE_BUFFER_SECONDS=0)
+class DeltaAutosaveTests(MockTestFixturesMixin, TestCase):
+    def setUp(self):
+        self.test = self._create_listening_test()
+        self.take_url = reverse('mock_tests:test_take', kwargs={'pk': self.test.pk})
+        self.url = reverse('mock_tests:test_autosave', kwargs={'pk': self.test.pk})
+        self.client.get(self.take_url)
+        self.attempt = MockAttempt.objects.get(test=self.test)
+
+    def _post(self, version, answers=None, removed=None):
+        return self.client.post(
+            self.url,
+            data=json.dumps({
+                'attempt': self.attempt.pk, 'version': version,
+                'answers': answers or {}, 'removed': removed or [],
+            }),
+            content_type='application/json',
+        )
+
+    def test_delta_merges_and_rejects_stale_versions(self):
+        res = self._post(1, {'10': 'a', '11': {'1': 'anna'}})
+        self.assertEqual(res.json(), {'success': True, 'version': 1})
+        self.assertEqual(self._post(2, {'11': {'1': 'anna', '2': 'london'}}, ['10']).status_code, 200)
+
+        stale = self._post(2, {'12': 'late'})
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.json()['version'], 2)
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.answers_json, {'11': {'1': 'anna', '2': 'london'}})
+        self.assertEqual(self.attempt.answers_version, 2)
+
+    def test_beacon_form_payload_and_foreign_session(self):
+        payload = json.dumps({'attempt': self.attempt.pk, 'version': 3, 'answers': {'5': 'b'}})
+        res = self.client.post(self.url, data={'payload': payload})
+        self.assertEqual(res.status_code, 200)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.answers_json, {'5': 'b'})
+
+        other = Client()
+        other.get(self.take_url)
+        self.assertEqual(other.post(self.url, data={'payload': payload}).status_code, 404)
+        self.assertEqual(self._post(0).status_code, 400)
+
+    def test_take_page_exposes_autosave_version(self):
+        self._post(4, {'1': 'x'})
+        res = self.client.get(self.take_url)
+        self.assertContains(res, f'data-attempt="{self.attempt.pk}" data-version="4"')
+
+    def test_autosave_does_not_load_questions(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            self._post(1, {'1': 'x'})
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('mock_tests_mockquestion', sql)
+        self.assertNotIn('mock_tests_mockpassage', sql)
+
+
+@override_settings(MOCK_AUTOSAVE_BUFFER_SECONDS=30)
+class AutosaveBufferTests(MockTestFixturesMixin, TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        from django.core.cache import cache
+
+        from mock_tests.services.autosave_buffer import FLUSH_LOCK_KEY
+
+        # Bufer faqat jarayonlararo umumiy cache bilan yoqiladi
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': cache_dir,
+        }})
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+        cache.set(FLUSH_LOCK_KEY, 1, 30)  # oyna hali tugamagan
+        self.test = self._create_listening_test()
+        self.take_url = reverse('mock_tests:test_take', kwargs={'pk': self.test.pk})
+        self.url = reverse('mock_tests:test_autosave', kwargs={'pk': self.test.pk})
+        self.client.get(self.take_url)
+        self.attempt = MockAttempt.objects.get(test=self.test)
+
+    def _post(self, version, answers, removed=None):
+        return self.client.post(
+            self.url,
+            data=json.dumps({
+                'attempt': self.attempt.pk, 'version': version,
+                'answers': answers, 'removed': removed or [],
+            }),
+            content_type='application/json',
+        )
+
+    def _db_answers(self):
+        self.attempt.refresh_from_db()
+        return self.attempt.answers_json
+
+    def test_saves_are_coalesced_until_flush(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        for version in range(1, 11):
+            self.assertEqual(self._post(version, {'1': f'v{version}', str(version): 'x'}).status_code, 200)
+        self.assertEqual(self._post(10, {'1': 'old'}).status_code, 409)
+        self._post(11, {}, removed=['2'])
+        self.assertEqual(self._db_answers(), {})
+
+        out = StringIO()
+        call_command('flush_autosave_buffer', stdout=out)
+        self.assertIn('1 ta urinish', out.getvalue())
+        expected = {'1': 'v10', **{str(v): 'x' for v in range(3, 11)}}
+        self.assertEqual(self._db_answers(), expected)
+        self.assertEqual(self.attempt.answers_version, 11)
+
+        call_command('flush_autosave_buffer', stdout=StringIO())
+        self._post(12, {'3': 'y'})
+        self.assertEqual(self._db_answers()['3'], 'x')
+
+    def test_take_page_and_finish_flush_first(self):
+        q = self.test.questions.get(question_type='notes_completion')
+        self._post(1, {str(q.pk): {'1': 'anna', '2': 'london'}})
+        res = self.client.get(self.take_url)
+        self.assertContains(res, 'london')
+        self.assertContains(res, 'data-version="1"')
+
+        self._post(2, {str(q.pk): {'1': 'anna', '2': 'paris'}})
+        res = self.client.post(
+            self.take_url,
+            data=json.dumps({'action': 'finish', 'answers': {str(q.pk): {'1': 'anna', '2': 'london'}}}),
+            content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertTrue(res.json()['success'])
+        from mock_tests.services.autosave_buffer import flush_attempt
+
+        self.assertEqual(flush_attempt(self.attempt.pk), 0)
+        self.attempt.refresh_from_db()
+        self.assertTrue(self.attempt.is_finished)
+        from mock_tests.services.answer_codec import read_answers
+
+        self.assertEqual(read_answers(self.attempt)[str(q.pk)]['2'], 'london')
+
+    def test_legacy_full_save_is_buffered(self):
+        from mock_tests.services.autosave_buffer import flush_autosave_buffer
+
+        self.client.post(
+            self.take_url,
+            data=json.dumps({'action': 'save', 'answers': {'7': 'b'}}),
+            content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(self._db_answers(), {})
+        self.assertEqual(flush_autosave_buffer(), 1)
+        self.assertEqual(self._db_answers(), {'7': 'b'})
+
+    def test_delta_landing_during_flush_is_not_deleted(self):
+        from unittest import mock
+
+        from mock_tests.services import autosave_buffer
+
+        self._post(1, {'1': 'a'})
+        real_write = autosave_buffer._write_entry
+
+        def write_then_race(attempt_id, entry):
+            real_write(attempt_id, entry)
+            # Parallel so'rov (masalan, sendBeacon) — flush o'qigandan keyin
+            self.assertEqual(self._post(2, {'2': 'b'}).status_code, 200)
+
+        with mock.patch.object(autosave_buffer, '_write_entry', side_effect=write_then_race):
+            self.assertEqual(autosave_buffer.flush_attempt(self.attempt.pk), 1)
+        self.assertEqual(self._db_answers(), {'1': 'a'})
+        self.assertEqual(autosave_buffer.flush_autosave_buffer(), 1)
+        self.assertEqual(self._db_answers(), {'1': 'a', '2': 'b'})
+
+    def test_locked_entry_is_not_acknowledged(self):
+        from unittest import mock
+
+        from django.core.cache import cache
+
+        from mock_tests.services import autosave_buffer
+
+        cache.add(autosave_buffer.LOCK_KEY.format(self.attempt.pk), 'other', 30)
+        with mock.patch.object(autosave_buffer, 'LOCK_WAIT', 0.05):
+            res = self._post(1, {'1': 'a'})
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()['error'], 'busy')
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_writes_through(self):
+        from mock_tests.services.autosave_buffer import buffer_seconds
+
+        self.assertEqual(buffer_seconds(), 0)
+        self.assertEqual(self._post(1, {'1': 'a'}).status_code, 200)
+        self.assertEqual(self._db_answers(), {'1': 'a'})
+
+class CompactAnswersTests(MockTestFixturesMixin, TestCase):
+    def _answers(self, test):
+        answers = {}
+        for q in test.questions.all():
+            slots = q.gradable_slot_count()
+            if q.question_type == 'notes_completion':
+                answers[str(q.pk)] = {'1': 'anna', '2': 'london', '99': 'stray'}
+            elif slots:
+                answers[str(q.pk)] = 'b'
+        answers['999999'] = 'deleted question'
+        return answers
+
+    def test_round_trip_and_essay_compression(self):
+        from mock_tests.services.answer_codec import clear_layout_cache, decode_answers, encode_answers
+
+        test = self._create_listening_test()
+        essay = MockQuestion.objects.create(
+            test=test, order=20, part_number=1, question_type='essay', question_text='Write',
+        )
+        questions = list(test.questions.all())
+        answers = self._answers(test)
+        answers[str(essay.pk)] = 'The museum was rebuilt after the fire. ' * 40
+        encoded = encode_answers(test, questions, answers)
+        self.assertIn('z', encoded['s'][-1])
+        self.assertLess(len(json.dumps(encoded)), len(json.dumps(answers)) / 2)
+
+        clear_layout_cache()
+        self.assertEqual(decode_answers(encoded), answers)
+        self.assertEqual(decode_answers(answers), answers)
+
+    def test_finish_stores_compact_and_scoring_reads_it(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from mock_tests.services.answer_codec import is_compact
+        from mock_tests.services.gradable import count_filled_slots_for_test
+
+        test = self._create_listening_test()
+        url = reverse('mock_tests:test_take', kwargs={'pk': test.pk})
+        self.client.get(url)
+        answers = self._answers(test)
+        data = self.client.post(
+            url, data=json.dumps({'action': 'finish', 'answers': answers}),
+            content_type='application/json', HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        ).json()
+        attempt = MockAttempt.objects.get(test=test)
+        self.assertTrue(is_compact(attempt.answers_json))
+        questions = list(test.questions.all())
+        expected = score_attempt(MockAttempt(test=test, answers_json=answers), questions)
+        self.assertEqual(score_attempt(attempt, questions)['correct_count'], expected['correct_count'])
+        self.assertEqual(
+            count_filled_slots_for_test(questions, attempt.answers_json),
+            count_filled_slots_for_test(questions, answers),
+        )
+        self.assertEqual(self.client.get(data['redirect_url']).status_code, 200)
+
+        legacy = MockAttempt.objects.create(
+            test=test, session_key='old', answers_json=answers, is_finished=True,
+        )
+        out = StringIO()
+        call_command('compact_attempt_answers', '--batch-size', '1', stdout=out)
+        self.assertIn('1 ta qator qayta yozildi', out.getvalue())
+        legacy.refresh_from_db()
+        self.assertTrue(is_compact(legacy.answers_json))
+
+        call_command('compact_attempt_answers', '--expand', stdout=StringIO())
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.answers_json, answers)
+
+
+class TestCountersTests(MockTestFixturesMixin, TestCase):
+    def test_counters_follow_question_and_passage_changes(self):
+        from mock_tests.services.test_counters import COUNTER_FIELDS, compute_test_counters
+
+        test = self._create_listening_test()
+        test.refresh_from_db()
+        questions = list(test.questions.all())
+        self.assertEqual(test.gradable_slots, sum(q.gradable_slot_count() for q in questions))
+        self.assertEqual(test.question_count, len(questions))
+        self.assertEqual(test.total_points, sum(q.points for q in questions))
+
+        passage = MockPassage.objects.create(test=test, order=1, title='P', text='T')
+        test.refresh_from_db()
+        self.assertEqual(test.passage_count, 1)
+        passage.delete()
+        questions[0].delete()
+        test.refresh_from_db()
+        self.assertEqual((test.passage_count, test.question_count), (0, len(questions) - 1))
+
+        other = MockTest.objects.create(title='Boshqa', test_type='listening')
+        moved = questions[1]
+        moved.points += 2
+        moved.test = other
+        moved.save()
+        test.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(other.question_count, 1)
+        self.assertEqual(other.total_points, moved.points)
+        self.assertEqual(test.question_count, len(questions) - 2)
+        self.assertEqual(
+            [getattr(test, name) for name in COUNTER_FIELDS],
+            [compute_test_counters(test.pk)[name] for name in COUNTER_FIELDS],
+        )
+
+    def test_repair_command_and_lazy_fill(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        test = self._create_listening_test()
+        expected = MockTest.objects.get(pk=test.pk).gradable_slots
+        MockTest.objects.filter(pk=test.pk).update(gradable_slots=None, passage_count=None)
+        self.assertEqual(MockTest.objects.get(pk=test.pk).total_questions, expected)
+
+        MockTest.objects.filter(pk=test.pk).update(question_count=0)
+        out = StringIO()
+        call_command('repair_test_counters', stdout=out)
+        self.assertIn("1 ta tuzatildi", out.getvalue())
+
+    def test_catalog_and_admin_list_query_count_is_constant(self):
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for _ in range(2):
+            self._create_listening_test()
+        admin_user = get_user_model().objects.create_superuser('root', 'r@example.com', 'pw')
+        self.client.force_login(admin_user)
+
+        def count(url):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            return len(ctx.captured_queries)
+
+        urls = (reverse('mock_tests:test_list'), reverse('admin:mock_tests_mocktest_changelist'))
+        before = [count(url) for url in urls]
+        for _ in range(3):
+            self._create_listening_test()
+        self.assertEqual([count(url) for url in urls], before)
+
+    def test_admin_attempts_column_uses_live_count_until_backfilled(self):
+        from io import StringIO
+
+        from django.contrib.admin.sites import site
+        from django.core.management import call_command
+        from django.test import RequestFactory
+
+        from mock_tests.models import MockTestDailyStat
+
+        rolled = self._create_listening_test()
+        legacy = self._create_listening_test()
+        for test, n in ((rolled, 2), (legacy, 3)):
+            for i in range(n):
+                MockAttempt.objects.create(test=test, session_key=f's{i}')
+        # Yig'madan oldingi tarix: legacy test uchun kun qatorlari yo'q,
+        # keyin bitta yangi urinish birinchi (qisman) qatorni yaratadi.
+        MockTestDailyStat.objects.filter(test=legacy).delete()
+        MockTest.objects.filter(pk=legacy.pk).update(daily_stats_complete=False)
+        MockAttempt.objects.create(test=legacy, session_key='new')
+        self.assertEqual(MockTestDailyStat.objects.get(test=legacy).started_count, 1)
+        MockTestDailyStat.objects.filter(test=rolled).update(started_count=5)
+
+        model_admin = site._registry[MockTest]
+        request = RequestFactory().get('/')
+
+        def totals():
+            rows = dict(model_admin.get_queryset(request).values_list('pk', 'attempts_total'))
+            return rows[rolled.pk], rows[legacy.pk]
+
+        self.assertEqual(totals(), (5, 4))
+        call_command('backfill_daily_stats', '--test-id', str(legacy.pk), stdout=StringIO())
+        self.assertTrue(MockTest.objects.get(pk=legacy.pk).daily_stats_complete)
+        self.assertEqual(totals(), (5, 4))
+        MockTestDailyStat.objects.filter(test=legacy).update(started_count=7)
+        self.assertEqual(totals(), (5, 7))
+
+        # Qisman (--days) qayta qurish belgini qo'ymaydi
+        MockTest.objects.filter(pk=legacy.pk).update(daily_stats_complete=False)
+        call_command('backfill_daily_stats', '--days', '3', stdout=StringIO())
+        self.assertFalse(MockTest.objects.get(pk=legacy.pk).daily_stats_complete)
+
+
+class DailyAttemptLimiterTests(MockTestFixturesMixin, TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.test = self._create_listening_test()
+        session = self.client.session
+        session.save()
+        self.session_key = session.session_key
+
+    def _finish(self):
+        url = reverse('mock_tests:test_take', kwargs={'pk': self.test.pk})
+        return self.client.post(
+            url,
+            data=json.dumps({'action': 'finish', 'answers': {}}),
+            content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+
+    def test_limit_check_is_served_from_cache_after_first_count(self):
+        from mock_tests.services.attempt_limiter import attempts_today
+
+        MockAttempt.objects.create(
+            test=self.test, session_key=self.session_key, is_finished=True, finished_at=timezone.now(),
+        )
+        self.assertEqual(attempts_today(self.session_key, self.test.pk), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(attempts_today(self.session_key, self.test.pk), 1)
+
+        self.assertEqual(self._finish().status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(attempts_today(self.session_key, self.test.pk), 2)
+
+    def test_per_test_limit_and_unlimited(self):
+        from mock_tests.services.attempt_limiter import remaining_attempts
+
+        self.test.max_daily_attempts = 1
+        self.test.save()
+        detail = reverse('mock_tests:test_detail', kwargs={'pk': self.test.pk})
+        self.assertEqual(self.client.get(detail).context['attempts_remaining'], 1)
+        self._finish()
+        self.assertEqual(self.client.get(detail).context['attempts_remaining'], 0)
+        response = self.client.get(reverse('mock_tests:test_take', kwargs={'pk': self.test.pk}))
+        self.assertTemplateUsed(response, 'mock_tests/limit_reached.html')
+
+        self.test.max_daily_attempts = 0
+        self.test.save()
+        self.assertIsNone(remaining_attempts(self.session_key, self.test))
+        self.assertEqual(self._finish().status_code, 200)
+
+    def test_unfinishing_attempt_invalidates_counter(self):
+        from mock_tests.services.attempt_limiter import attempts_today
+
+        attempt = MockAttempt.objects.create(
+            test=self.test, session_key=self.session_key, is_finished=True, finished_at=timezone.now(),
+        )
+        self.assertEqual(attempts_today(self.session_key, self.test.pk), 1)
+        attempt.is_finished = False
+        attempt.finished_at = None
+        attempt.save()
+        self.assertEqual(attempts_today(self.session_key, self.test.pk), 0)
+
+    def test_unlimited_test_detail_shows_start_button(self):
+        self.test.max_daily_attempts = 0
+        self.test.save()
+        response = self.client.get(reverse('mock_tests:test_detail', kwargs={'pk': self.test.pk}))
+        self.assertIsNone(response.context['attempts_remaining'])
+        self.assertContains(response, reverse('mock_tests:test_take', args=[self.test.pk]))
+        self.assertNotContains(response, 'Kunlik limit tugadi')
+
+
+class SessionLightBrowsingTests(MockTestFixturesMixin, TestCase):
+    def test_read_only_pages_do_not_create_sessions(self):
+        from django.contrib.sessions.models import Session
+
+        test = self._create_listening_test()
+        self.assertEqual(self.client.get(reverse('mock_tests:test_list')).status_code, 200)
+        response = self.client.get(reverse('mock_tests:test_detail', kwargs={'pk': test.pk}))
+        self.assertEqual(response.context['attempts_remaining'], 5)
+        self.assertEqual(Session.objects.count(), 0)
+
+        self.client.get(reverse('mock_tests:test_take', kwargs={'pk': test.pk}))
+        self.assertEqual(Session.objects.count(), 1)
+        self.assertEqual(MockAttempt.objects.filter(test=test).count(), 1)
+
+    def test_cleanup_command_purges_expired_sessions_and_orphaned_attempts(self):
+        from datetime import timedelta
+        from io import StringIO
+
+        from django.contrib.sessions.backends.db import SessionStore
+        from django.contrib.sessions.models import Session
+        from django.core.management import call_command
+
+        test = self._create_listening_test()
+        live = SessionStore()
+        live.create()
+        expired = SessionStore()
+        expired.create()
+        Session.objects.filter(pk=expired.session_key).update(
+            expire_date=timezone.now() - timedelta(days=1),
+        )
+        old = timezone.now() - timedelta(days=3)
+        kept_live = MockAttempt.objects.create(test=test, session_key=live.session_key)
+        orphan = MockAttempt.objects.create(test=test, session_key=expired.session_key)
+        fresh = MockAttempt.objects.create(test=test, session_key='gone-but-fresh')
+        finished = MockAttempt.objects.create(
+            test=test, session_key='gone', is_finished=True, finished_at=timezone.now(),
+        )
+        MockAttempt.objects.filter(pk__in=[kept_live.pk, orphan.pk, finished.pk]).update(started_at=old)
+
+        out = StringIO()
+        call_command('cleanup_mock_sessions', '--batch-size', '1', '--dry-run', stdout=out)
+        self.assertIn('Sessiyalar: 1 ta, tugallanmagan urinishlar: 1 ta', out.getvalue())
+        call_command('cleanup_mock_sessions', '--batch-size', '1', stdout=StringIO())
+        self.assertEqual(
+            set(MockAttempt.objects.values_list('pk', flat=True)),
+            {kept_live.pk, fresh.pk, finished.pk},
+        )
+        self.assertEqual(list(Session.objects.values_list('pk', flat=True)), [live.session_key])
+
+
+class AttemptArchiveTests(MockTestFixturesMixin, TestCase):
+    def test_archive_command_streams_old_months_and_keeps_rollups(self):
+        import os
+        import tempfile
+        from datetime import timedelta
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from mock_tests.models import MockAttemptArchive, MockTestDailyStat
+        from mock_tests.services.attempt_archive import read_archive
+        from mock_tests.services.rollups import rebuild_daily_stats
+
+        test = self._create_listening_test()
+        old_at = timezone.now() - timedelta(days=500)
+        old = MockAttempt.objects.create(
+            test=test, session_key='old', answers_json={'1': 'a'},
+            is_finished=True, finished_at=old_at, score_percent=40,
+        )
+        MockAttempt.objects.filter(pk=old.pk).update(started_at=old_at - timedelta(minutes=20))
+        recent = MockAttempt.objects.create(test=test, session_key='new')
+        rebuild_daily_stats()
+        stats_before = MockTestDailyStat.objects.count()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = StringIO()
+            call_command('archive_attempts', tmp, '--months', '6', '--dry-run', stdout=out)
+            self.assertIn('1 ta arxivlanadi (dry-run)', out.getvalue())
+            self.assertTrue(MockAttempt.objects.filter(pk=old.pk).exists())
+
+            call_command('archive_attempts', tmp, '--months', '6', stdout=StringIO())
+            archive = MockAttemptArchive.objects.get()
+            self.assertEqual(archive.row_count, 1)
+            self.assertTrue(os.path.exists(archive.file_path))
+            rows = list(read_archive(archive.file_path))
+
+        self.assertEqual([r['id'] for r in rows], [old.pk])
+        self.assertEqual(rows[0]['answers'], {'1': 'a'})
+        self.assertEqual(list(MockAttempt.objects.values_list('pk', flat=True)), [recent.pk])
+
+        rebuild_daily_stats()
+        self.assertEqual(MockTestDailyStat.objects.count(), stats_before)
+
+    def test_partition_command_requires_postgres(self):
+        from django.core.management import CommandError, call_command
+        from django.db import connection
+
+        if connection.vendor == 'postgresql':
+            self.skipTest('PostgreSQL da haqiqiy bo\'laklash ishlaydi')
+        with self.assertRaises(CommandError):
+            call_command('attempt_partitions')
+
+
+class AttemptExportTests(MockTestFixturesMixin, TestCase):
+    def setUp(self):
+        self.test = self._create_listening_test()
+        session = self.client.session
+        session.save()
+        self.client.post(
+            reverse('mock_tests:test_take', kwargs={'pk': self.test.pk}),
+            data=json.dumps({'action': 'finish', 'answers': {}}),
+            content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.attempt = MockAttempt.objects.get(test=self.test, is_finished=True)
+        MockAttempt.objects.create(test=self.test, session_key='in-progress')
+
+    def test_admin_export_streams_csv_rows_per_slot(self):
+        import csv
+        import io
+
+        from django.contrib.auth import get_user_model
+
+        admin_user = get_user_model().objects.create_superuser('root', 'r@example.com', 'pw')
+        self.client.force_login(admin_user)
+        url = reverse('admin:mock_tests_mockattempt_export')
+        response = self.client.get(url, {'format': 'csv', 'test__test_type__exact': 'listening'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual(len(rows), self.attempt.total_questions)
+        self.assertEqual({r['attempt_id'] for r in rows}, {str(self.attempt.pk)})
+
+        response = self.client.get(url, {'format': 'csv', 'test__test_type__exact': 'reading'})
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8').count('\n'), 1)
+        self.assertEqual(self.client.get(url, {'format': 'xml'}).status_code, 400)
+
+    def test_command_writes_jsonl_and_parquet(self):
+        import os
+        import tempfile
+        from io import StringIO
+
+        from django.core.management import CommandError, call_command
+
+        from mock_tests.services.attempt_export import PYARROW_AVAILABLE
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'out.jsonl')
+            call_command(
+                'export_attempts', '--format', 'jsonl', '-o', path, '--chunk-size', '1',
+                stderr=StringIO(),
+            )
+            with open(path, encoding='utf-8') as fh:
+                rows = [json.loads(line) for line in fh]
+            self.assertEqual(len(rows), self.attempt.total_questions)
+            self.assertTrue(all(r['test_id'] == self.test.pk for r in rows))
+
+            path = os.path.join(tmp, 'out.parquet')
+            if not PYARROW_AVAILABLE:
+                with self.assertRaises(CommandError):
+                    call_command('export_attempts', '--format', 'parquet', '-o', path)
+                return
+            call_command('export_attempts', '--format', 'parquet', '-o', path, stderr=StringIO())
+            import pyarrow.parquet as pq
+
+            self.assertEqual(pq.read_table(path).num_rows, self.attempt.total_questions)
+
+    def test_arrow_row_tolerates_non_numeric_slot_order(self):
+        from mock_tests.services.attempt_export import _arrow_row
+
+        base = {'label': 'Savol', 'user_answer': 'a', 'correct_answer': ['a', 'b']}
+        rows = [
+            _arrow_row({**base, 'slot_order': 3}),
+            _arrow_row({**base, 'slot_order': '7'}),
+            _arrow_row({**base, 'slot_order': '14-15', 'label': 'Questions 14-15'}),
+            _arrow_row({**base, 'slot_order': None, 'user_answer': None}),
+        ]
+        self.assertEqual([r['slot_order'] for r in rows], [3.0, 7.0, None, None])
+        self.assertEqual(rows[2]['label'], 'Questions 14-15')
+        self.assertEqual(rows[0]['correct_answer'], "['a', 'b']")
+        self.assertIsNone(rows[3]['user_answer'])
+
+
+class PurgeTestTests(MockTestFixturesMixin, TestCase):
+    def _test_with_attempts(self, n=5):
+        test = self._create_listening_test()
+        for i in range(n):
+            MockAttempt.objects.create(
+                test=test, session_key=f'purge-{i}', is_finished=True, finished_at=timezone.now(),
+            )
+        return test
+
+    def test_command_deletes_attempts_in_batches(self):
+        from io import StringIO
+        from unittest import mock
+
+        from django.core.management import call_command
+
+        from mock_tests.models import MockTestDailyStat
+
+        test = self._test_with_attempts()
+        other = self._test_with_attempts(2)
+        self.assertTrue(MockTestDailyStat.objects.filter(test=test).exists())
+
+        out = StringIO()
+        call_command('purge_test', str(test.pk), '--batch-size', '2', '--keep-test', stdout=out)
+        self.assertIn("5 ta urinish", out.getvalue())
+        self.assertTrue(MockTest.objects.filter(pk=test.pk).exists())
+        self.assertFalse(MockAttempt.objects.filter(test=test).exists())
+        self.assertFalse(MockTestDailyStat.objects.filter(test=test).exists())
+
+        kept = self._test_with_attempts(3)
+        # Urinishlar modelga yuklanmaydi
+        with mock.patch.object(MockAttempt, 'from_db', side_effect=AssertionError('loaded')):
+            call_command('purge_test', str(other.pk), stdout=StringIO())
+        self.assertFalse(MockTest.objects.filter(pk=other.pk).exists())
+        self.assertEqual(MockAttempt.objects.filter(test_id=other.pk).count(), 0)
+        self.assertEqual(MockAttempt.objects.filter(test=kept).count(), 3)
+
+    def test_admin_delete_and_background_action(self):
+        from io import StringIO
+        from unittest import mock
+
+        from django.contrib.auth import get_user_model
+        from django.core.management import call_command
+
+        from mock_tests.services import purge
+
+        admin_user = get_user_model().objects.create_superuser('root', 'r@example.com', 'pw')
+        self.client.force_login(admin_user)
+        test = self._test_with_attempts()
+        url = reverse('admin:mock_tests_mocktest_delete', args=[test.pk])
+        response = self.client.get(url)
+        self.assertContains(response, 'Test urinishlari: 5')
+        self.client.post(url, {'post': 'yes'})
+        self.assertFalse(MockTest.objects.filter(pk=test.pk).exists())
+        self.assertFalse(MockAttempt.objects.exists())
+
+        test = self._test_with_attempts()
+        status_url = reverse('admin:mock_tests_mocktest_purge_status')
+        with mock.patch.object(purge, 'purge_test', side_effect=AssertionError('request worker')):
+            self.client.post(reverse('admin:mock_tests_mocktest_changelist'), {
+                'action': 'purge_tests_in_background', '_selected_action': [test.pk],
+            })
+        # So'rov faqat navbatga qo'yadi: test nofaol, urinishlar joyida
+        test.refresh_from_db()
+        self.assertFalse(test.is_active)
+        self.assertEqual(MockAttempt.objects.filter(test=test).count(), 5)
+        status = self.client.get(status_url, {'ids': str(test.pk)}).json()
+        self.assertEqual(status[str(test.pk)]['state'], 'pending')
+
+        out = StringIO()
+        call_command('run_test_jobs', '--kind', 'purge', stdout=out)
+        self.assertIn(f'purge #{test.pk}: done', out.getvalue())
+        self.assertFalse(MockTest.objects.filter(pk=test.pk).exists())
+        status = self.client.get(status_url, {'ids': str(test.pk)}).json()
+        self.assertEqual(status[str(test.pk)]['state'], 'done')
+        self.assertEqual(status[str(test.pk)]['deleted'], 5)
+
+    def test_stale_running_job_is_picked_up_again(self):
+        from datetime import timedelta
+
+        from mock_tests.models import MockTestJob
+        from mock_tests.services.jobs import STALE_AFTER, run_pending_jobs
+        from mock_tests.services.purge import purge_status, queue_purge
+
+        test = self._test_with_attempts(3)
+        fresh = self._test_with_attempts(2)
+        stale_job, fresh_job = queue_purge([test.pk, fresh.pk], batch_size=2)
+        # Bajaruvchi jarayon o'ldi: biri eskirgan, biri hali "tirik"
+        MockTestJob.objects.filter(pk=stale_job.pk).update(
+            state=MockTestJob.RUNNING, heartbeat_at=timezone.now() - STALE_AFTER - timedelta(minutes=1),
+        )
+        MockTestJob.objects.filter(pk=fresh_job.pk).update(state=MockTestJob.RUNNING, heartbeat_at=timezone.now())
+        self.assertEqual(queue_purge([test.pk]), [])
+
+        finished = run_pending_jobs()
+        self.assertEqual([job.pk for job in finished], [stale_job.pk])
+        self.assertEqual(purge_status(test.pk)['state'], 'done')
+        self.assertFalse(MockTest.objects.filter(pk=test.pk).exists())
+        self.assertEqual(purge_status(fresh.pk)['state'], 'running')
+
+
+class BulkImportTests(TestCase):
+    def _spec(self, title, **extra):
+        return {
+            'title': title,
+            'test_type': 'listening',
+            'questions': [
+                {
+                    'order': 1, 'question_type': 'notes_completion',
+                    'question_text': 'Name [1] and [2]', 'correct_answers_json': ['a', 'b'], 'points': 2,
+                },
+                {
+                    'order': 2, 'question_type': 'mcq', 'question_text': 'Pick',
+                    'option_a': 'x', 'option_b': 'y', 'correct_answer': 'a',
+                },
+            ],
+            **extra,
+        }
+
+    def test_directory_import_reports_all_errors_and_writes_nothing(self):
+        import os
+        import tempfile
+
+        from django.core.management import CommandError, call_command
+
+        bad = self._spec('Bad')
+        bad['questions'][0]['correct_answers_json'] = ['only-one']
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'a.json'), 'w', encoding='utf-8') as fh:
+                json.dump({'tests': [self._spec('A1'), bad]}, fh)
+            with open(os.path.join(tmp, 'b.jsonl'), 'w', encoding='utf-8') as fh:
+                fh.write(json.dumps(self._spec('B1')) + '\n{not json\n')
+            with self.assertRaises(CommandError) as ctx:
+                call_command('import_mock_test', tmp, '--workers', '2')
+        message = str(ctx.exception)
+        self.assertIn('2 ta xato', message)
+        self.assertIn('a.json#2 "Bad"', message)
+        self.assertIn('b.jsonl:2', message)
+        self.assertFalse(MockTest.objects.exists())
+
+    def test_directory_import_with_workers_writes_through_parent_connection(self):
+        import os
+        import tempfile
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('a', 'b', 'c'):
+                with open(os.path.join(tmp, f'{name}.json'), 'w', encoding='utf-8') as fh:
+                    json.dump(self._spec(name.upper()), fh)
+            call_command('import_mock_test', tmp, '--workers', '2', stdout=StringIO())
+        self.assertEqual(sorted(MockTest.objects.values_list('title', flat=True)), ['A', 'B', 'C'])
+        self.assertEqual(MockQuestion.objects.count(), 6)
+
+    def test_bundle_import_uses_bulk_create_and_fills_derived_fields(self):
+        import os
+        import tempfile
+        from io import StringIO
+
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        specs = [self._spec(f'T{i}') for i in range(5)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bundle.jsonl')
+            with open(path, 'w', encoding='utf-8') as fh:
+                fh.write('\n'.join(json.dumps(s) for s in specs))
+            out = StringIO()
+            with CaptureQueriesContext(connection) as ctx:
+                call_command('import_mock_test', path, stdout=out)
+            inserts = [q['sql'] for q in ctx.captured_queries if 'INSERT INTO "mock_tests_mockquestion"' in q['sql']]
+            self.assertEqual(len(inserts), 1)
+
+            call_command('import_mock_test', path, stdout=out)
+        self.assertIn('allaqachon mavjud', out.getvalue())
+        self.assertEqual(MockTest.objects.count(), 5)
+        test = MockTest.objects.get(title='T3')
+        self.assertEqual(test.question_count, 2)
+        self.assertEqual(test.gradable_slots, 3)
+        self.assertTrue(test.questions.get(order=1).answer_variants_json)
+
+    def test_admin_upload_parses_without_temp_file_and_updates(self):
+        from django.contrib.auth import get_user_model
+
+        admin_user = get_user_model().objects.create_superuser('root', 'r@example.com', 'pw')
+        self.client.force_login(admin_user)
+        url = reverse('admin:mock_tests_mocktest_import_json')
+        upload = SimpleUploadedFile('one.json', json.dumps(self._spec('Admin')).encode('utf-8'))
+        response = self.client.post(url, {'json_file': upload})
+        test = MockTest.objects.get(title='Admin')
+        self.assertRedirects(response, reverse('admin:mock_tests_mocktest_change', args=[test.pk]))
+
+        spec = self._spec('Admin')
+        spec['questions'] = spec['questions'][:1]
+        upload = SimpleUploadedFile('one.json', json.dumps(spec).encode('utf-8'))
+        self.client.post(url, {'json_file': upload, 'update': 'on'})
+        test.refresh_from_db()
+        self.assertEqual((test.question_count, test.questions.count()), (1, 1))
+
+
+class TestBundleTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _make_test(self):
+        test = MockTest.objects.create(title='Bundle L', test_type='listening', max_daily_attempts=2)
+        test.audio_file.save('part1.mp3', SimpleUploadedFile('part1.mp3', b'ID3' + b'\x00' * 5000))
+        MockPassage.objects.create(test=test, order=1, title='P', text='Text')
+        q = MockQuestion.objects.create(
+            test=test, order=1, question_type='notes_completion', question_text='Name [1]',
+            correct_answers_json=['bob'], options_json={'k': 'v'},
+        )
+        q.image.save('map.png', SimpleUploadedFile('map.png', b'\x89PNG' + b'\x01' * 300))
+        MockQuestion.objects.create(
+            test=test, order=2, question_type='mcq', question_text='Pick',
+            option_a='x', option_b='y', correct_answer='b',
+        )
+        return test
+
+    def test_bundle_round_trips_through_import_command(self):
+        import os
+        import tempfile
+        import zipfile
+        from io import StringIO
+        from unittest import mock
+
+        from django.core.management import call_command
+
+        from mock_tests.services import test_bundle
+
+        test = self._make_test()
+        audio_name, image_name = test.audio_file.name, test.questions.get(order=1).image.name
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bank.zip')
+            with mock.patch.object(test_bundle, 'MEDIA_CHUNK_SIZE', 1024):
+                chunks = list(test_bundle.iter_bundle_chunks(MockTest.objects.filter(pk=test.pk)))
+            # Audio bo'laklab o'qiladi — yozuvchi ham bo'lak-bo'lak beradi
+            self.assertGreater(len(chunks), 5)
+            with open(path, 'wb') as fh:
+                fh.write(b''.join(chunks))
+            with zipfile.ZipFile(path) as zf:
+                self.assertEqual(
+                    sorted(zf.namelist()),
+                    sorted(['tests.jsonl', f'media/{audio_name}', f'media/{image_name}']),
+                )
+
+            test.delete()
+            for name in os.listdir(os.path.join(self.media_root, 'mock_tests', 'audio')):
+                os.remove(os.path.join(self.media_root, 'mock_tests', 'audio', name))
+            out = StringIO()
+            call_command('import_mock_test', path, stdout=out)
+
+        self.assertIn('Import tayyor: "Bundle L" — 2 savol', out.getvalue())
+        imported = MockTest.objects.get(title='Bundle L')
+        self.assertEqual(imported.max_daily_attempts, 2)
+        self.assertEqual(imported.passages.count(), 1)
+        with imported.audio_file.open('rb') as fh:
+            self.assertEqual(fh.read(), b'ID3' + b'\x00' * 5000)
+        q1, q2 = imported.questions.order_by('order')
+        self.assertEqual(q1.correct_answers_json, ['bob'])
+        self.assertEqual(q1.options_json, {'k': 'v'})
+        # Storage'da bir xil fayl bor — qayta yozilmaydi
+        self.assertEqual(q1.image.name, image_name)
+        self.assertFalse(q2.image)
+        self.assertEqual(q2.correct_answer, 'b')
+        self.assertEqual(imported.question_count, 2)
+
+    def test_missing_bundle_media_is_a_validation_error(self):
+        import io
+        import zipfile
+
+        from mock_tests.services.test_import import load_upload
+
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as zf:
+            zf.writestr('tests.jsonl', json.dumps({
+                'title': 'Z', 'test_type': 'listening', 'audio_file': 'media/mock_tests/audio/x.mp3',
+            }) + '\n')
+        specs, errors = load_upload(SimpleUploadedFile('bank.zip', buf.getvalue()))
+        self.assertEqual(len(errors), 1)
+        self.assertIn('media/mock_tests/audio/x.mp3', errors[0])
+
+    def test_admin_action_streams_zip(self):
+        import io
+        import zipfile
+
+        from django.contrib.auth import get_user_model
+
+        test = self._make_test()
+        admin_user = get_user_model().objects.create_superuser('bundler', 'b@example.com', 'pw')
+        self.client.force_login(admin_user)
+        response = self.client.post(
+            reverse('admin:mock_tests_mocktest_changelist'),
+            {'action': 'export_bundle', '_selected_action': [test.pk]},
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as zf:
+            doc = json.loads(zf.read('tests.jsonl').decode('utf-8'))
+        self.assertEqual(doc['title'], 'Bundle L')
+        self.assertEqual(len(doc['questions']), 2)
+        self.assertEqual(doc['audio_file'], f'media/{test.audio_file.name}')
+
+
+class BulkCloneTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.test = MockTest.objects.create(title='Clone L', test_type='listening')
+        self.test.audio_file.save('l.mp3', SimpleUploadedFile('l.mp3', b'ID3audio'))
+        MockPassage.objects.create(test=self.test, order=1, text='Passage')
+        for order in range(1, 41):
+            q = MockQuestion.objects.create(
+                test=self.test, order=order, question_type='notes_completion',
+                question_text='Fill [1]', correct_answers_json=[f'a{order}'],
+            )
+            if order % 10 == 1:
+                q.image.save('map.png', SimpleUploadedFile('map.png', b'\x89PNG'))
+        self.test.refresh_from_db()
+
+    def test_clone_test_shares_media_and_bulk_creates(self):
+        from unittest import mock
+
+        from django.core.files.storage import FileSystemStorage
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from mock_tests.services.test_clone import clone_tests
+
+        with mock.patch.object(FileSystemStorage, '_save') as save, \
+                mock.patch.object(FileSystemStorage, 'open') as open_, \
+                CaptureQueriesContext(connection) as ctx:
+            (clone,) = clone_tests(MockTest.objects.filter(pk=self.test.pk))
+        save.assert_not_called()
+        open_.assert_not_called()
+        # Savol/passage soni so'rovlar soniga ta'sir qilmaydi
+        self.assertLess(len(ctx.captured_queries), 15)
+
+        self.assertEqual(clone.title, 'Clone L (nusxa)')
+        self.assertEqual(clone.audio_file.name, self.test.audio_file.name)
+        clone.refresh_from_db()
+        self.assertEqual(clone.question_count, 40)
+        self.assertEqual(clone.gradable_slots, self.test.gradable_slots)
+        src = list(self.test.questions.order_by('order').values_list('order', 'image', 'answer_variants_json'))
+        dst = list(clone.questions.order_by('order').values_list('order', 'image', 'answer_variants_json'))
+        self.assertEqual(src, dst)
+        self.assertEqual(clone.passages.count(), 1)
+
+    def test_clone_questions_appends_with_parts_and_counters(self):
+        from mock_tests.services.test_clone import clone_questions
+
+        picked = MockQuestion.objects.filter(test=self.test, order__in=[1, 2]).select_related('test')
+        clones = clone_questions(picked)
+        self.assertEqual([(q.order, q.part_number) for q in clones], [(41, 4), (42, 4)])
+        self.assertEqual(clones[0].image.name, self.test.questions.get(order=1).image.name)
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.question_count, 42)
+        self.assertEqual(self.test.gradable_slots, 42)
+
+
+class QuestionRepairTests(TestCase):
+    def setUp(self):
+        self.test = MockTest.objects.create(title='Repair', test_type='reading')
+        self.summary = MockQuestion.objects.create(
+            test=self.test, order=1, question_type='summary_completion',
+            question_text='One [1]. Two [2]. Three [3].', correct_answers_json=['a', 'b', 'c'], points=1,
+        )
+        self.misplaced = MockQuestion.objects.create(
+            test=self.test, order=4, question_type='sentence_completion',
+            instruction='The river [4] floods every spring.', question_text='', correct_answers_json=['nile'],
+        )
+        self.ok = MockQuestion.objects.create(
+            test=self.test, order=5, question_type='mcq', question_text='Pick',
+            option_a='x', option_b='y', correct_answer='a',
+        )
+
+    def test_only_changed_rows_are_written_and_reported(self):
+        from unittest import mock
+
+        from mock_tests.services.question_repair import repair_questions
+
+        with mock.patch.object(MockQuestion, 'save') as save, \
+                mock.patch.object(MockQuestion.objects, 'bulk_update',
+                                  wraps=MockQuestion.objects.bulk_update) as bulk_update:
+            report = repair_questions(chunk_size=2)
+        save.assert_not_called()
+        written = [obj.pk for call in bulk_update.call_args_list for obj in call.args[0]]
+        self.assertEqual(sorted(written), [self.summary.pk, self.misplaced.pk])
+
+        data = report.as_dict()
+        self.assertEqual((data['scanned'], data['changed']), (3, 2))
+        self.assertEqual(data['points_fixed'], 1)
+        self.assertEqual(data['instruction_fixed'], 1)
+        summary = next(c for c in data['changes'] if c['question_id'] == self.summary.pk)
+        self.assertEqual(summary['changes'], {'points': {'before': 1, 'after': 3}})
+
+        self.misplaced.refresh_from_db()
+        self.assertEqual(self.misplaced.question_text, 'The river [4] floods every spring.')
+        self.assertEqual(self.misplaced.instruction, '')
+        self.assertIn('v', self.misplaced.answer_variants_json)
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.total_points, 3 + 1 + 1)
+
+    def test_dry_run_json_report_with_workers(self):
+        import os
+        import tempfile
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'repair.json')
+            call_command('fix_mock_questions', '--dry-run', '--workers', '2', '--chunk-size', '1',
+                         '--report', path, stdout=StringIO())
+            with open(path, encoding='utf-8') as fh:
+                data = json.load(fh)
+        self.assertTrue(data['dry_run'])
+        self.assertEqual(data['changed'], 2)
+        self.summary.refresh_from_db()
+        self.assertEqual(self.summary.points, 1)
+
+    def test_workers_write_through_parent_connection(self):
+        from mock_tests.services.question_repair import repair_questions
+
+        report = repair_questions(chunk_size=1, workers=2)
+        self.assertEqual((report.scanned, report.changed), (3, 2))
+        # Ishchilardan keyin ham asosiy jarayon ulanishi ishlaydi.
+        self.summary.refresh_from_db()
+        self.misplaced.refresh_from_db()
+        self.assertEqual(self.summary.points, 3)
+        self.assertEqual(self.misplaced.instruction, '')
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.total_points, 3 + 1 + 1)
+
+
+class WorkerPoolHelperTests(TestCase):
+    def test_map_bounded_limits_in_flight_chunks_and_propagates_errors(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from mock_tests.services.worker_pool import chunked, map_bounded
+
+        self.assertEqual(list(chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+        pulled = []
+        consumed = []
+
+        def source():
+            for chunk in chunked(range(20), 2):
+                # Oqim iste'moldan ko'pi bilan workers * 2 bo'lak oldinda
+                self.assertLessEqual(len(pulled) - len(consumed), 4)
+                pulled.append(chunk)
+                yield chunk
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            map_bounded(pool, sum, source(), 2, lambda chunk, total: consumed.append((chunk, total)))
+        self.assertEqual(sorted(total for _chunk, total in consumed), sorted(a + b for a, b in chunked(range(20), 2)))
+
+        def boom(chunk):
+            raise ValueError(chunk)
+
+        with ThreadPoolExecutor(max_workers=2) as pool, self.assertRaises(ValueError):
+            map_bounded(pool, boom, chunked(range(6), 2), 2, lambda chunk, result: None)
+
+
+class QuestionLintTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.test = MockTest.objects.create(title='Lint', test_type='reading')
+        self.bad_blanks = MockQuestion.objects.create(
+            test=self.test, order=1, question_type='notes_completion',
+            question_text='One [1]. Two [2]. Three [3].', correct_answers_json=['a', 'b'], points=3,
+        )
+        self.bad_matching = MockQuestion.objects.create(
+            test=self.test, order=4, question_type='matching_features',
+            question_text='Match',
+            options_json={
+                'options': [{'letter': 'a', 'text': 'A'}, {'letter': 'b', 'text': 'B'}],
+                'items': [{'num': 4, 'label': 'x'}, {'num': 5, 'label': 'y'}],
+            },
+            correct_answers_json={'4': 'a', '5': 'z'}, points=2,
+        )
+        self.bad_mcq = MockQuestion.objects.create(
+            test=self.test, order=6, question_type='mcq', question_text='Pick two',
+            option_a='x', option_b='y', option_c='z', correct_answer='a', mcq_select_count=2,
+        )
+        self.ok = MockQuestion.objects.create(
+            test=self.test, order=8, question_type='mcq', question_text='Pick',
+            option_a='x', option_b='y', correct_answer='b',
+        )
+
+    def _codes(self, question):
+        from mock_tests.services.question_lint import lint_question
+
+        return sorted(code for _severity, code, _message in lint_question(question))
+
+    def test_rules_catch_broken_keys(self):
+        self.assertEqual(self._codes(self.bad_blanks), ['bracket_count'])
+        self.assertEqual(self._codes(self.bad_matching), ['matching_unknown_letter'])
+        self.assertEqual(self._codes(self.bad_mcq), ['mcq_select_count'])
+        self.assertEqual(self._codes(self.ok), [])
+
+    def test_command_with_workers_writes_reports_and_stores_health(self):
+        import os
+        import tempfile
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from mock_tests.services.question_lint import health_for_tests, stored_health
+
+        clean = MockTest.objects.create(title='Clean', test_type='reading')
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, 'lint.json')
+            html_path = os.path.join(tmp, 'lint.html')
+            call_command('lint_question_bank', '--workers', '2', '--chunk-size', '1',
+                         '-o', json_path, stdout=StringIO())
+            call_command('lint_question_bank', '--format', 'html', '-o', html_path, stdout=StringIO())
+            with open(json_path, encoding='utf-8') as fh:
+                data = json.load(fh)
+            with open(html_path, encoding='utf-8') as fh:
+                html = fh.read()
+        self.assertEqual((data['scanned_tests'], data['errors']), (2, 3))
+        self.assertEqual([t['test_id'] for t in data['tests']], [self.test.pk])
+        self.assertIn('matching_unknown_letter', html)
+        # Xulosa bazada — boshqa worker'lar uni qayta hisoblamasdan o'qiydi
+        tests = list(MockTest.objects.order_by('pk'))
+        self.assertEqual(
+            [stored_health(test) for test in tests],
+            [{'errors': 3, 'warnings': 0}, {'errors': 0, 'warnings': 0}],
+        )
+        with self.assertNumQueries(0):
+            health_for_tests(tests)
+
+    def test_worker_pool_matches_serial_report(self):
+        from mock_tests.services.question_lint import lint_question_bank
+
+        MockTest.objects.create(title='Clean', test_type='reading')
+        serial = lint_question_bank(chunk_size=1, workers=1).as_dict()
+        pooled = lint_question_bank(chunk_size=1, workers=2).as_dict()
+        for data in (serial, pooled):
+            data.pop('seconds')
+        self.assertEqual(pooled, serial)
+        # Ishchilardan keyin ham asosiy jarayon ulanishi ishlaydi.
+        self.assertEqual(MockTest.objects.count(), 2)
+
+    def test_health_badge_is_invalidated_by_edits(self):
+        from mock_tests.services.question_lint import test_health
+
+        self.assertEqual(test_health(self.test)['errors'], 3)
+        self.bad_blanks.correct_answers_json = ['a', 'b', 'c']
+        self.bad_blanks.save()
+        self.assertEqual(test_health(self.test)['errors'], 2)
+        # Yangi versiya uchun xulosa bazaga yozildi
+        self.assertEqual(MockTest.objects.get(pk=self.test.pk).lint_errors, 2)
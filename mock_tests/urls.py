@@ -7,5 +7,6 @@ urlpatterns = [
     path('', views.test_list, name='test_list'),
     path('tests/<int:pk>/', views.test_detail, name='test_detail'),
     path('tests/<int:pk>/take/', views.test_take, name='test_take'),
+    path('tests/<int:pk>/autosave/', views.test_autosave, name='test_autosave'),
     path('tests/<int:pk>/result/<int:attempt_id>/', views.test_result, name='test_result'),
 ]
@@ -6,12 +6,20 @@
     const testId = exam.dataset.testId;
     const totalQuestions = parseInt(exam.dataset.totalQuestions || '0', 10);
     const durationMinutes = parseInt(exam.dataset.duration || '60', 10);
-    const csrfToken = exam.dataset.csrf || (document.cookie.match(/csrftoken=([^;]+)/) || [])[1];
+    const csrfEl = document.getElementById('mock-take-csrf');
+    const csrfToken = exam.dataset.csrf || (csrfEl && csrfEl.dataset.csrf)
+        || (document.cookie.match(/csrftoken=([^;]+)/) || [])[1];
     const savedDataEl = document.getElementById('saved-answers-data');
     let savedAnswers = {};
     if (savedDataEl) {
         try { savedAnswers = JSON.parse(savedDataEl.textContent); } catch (e) {}
     }
+    const autosaveEl = document.getElementById('mock-take-autosave');
+    const autosaveUrl = autosaveEl ? autosaveEl.dataset.url : '';
+    const attemptId = autosaveEl ? autosaveEl.dataset.attempt : '';
+    let answersVersion = parseInt((autosaveEl && autosaveEl.dataset.version) || '0', 10);
+    let ackedVersion = answersVersion;
+    let lastSavedAnswers = Object.assign({}, savedAnswers);
 
     let highlightMode = false;
     let isPaused = false;
@@ -270,7 +278,7 @@
                     const matchSel = exam.querySelector(
                         `.mock-matching-select[data-question-id="${qid}"][data-match-num="${blankNum}"]`
                     );
-                    if (matchSel) { matchSel.value = blankVal; return; }
+                    if (matchSel) { matchSel.value = String(blankVal || '').toLowerCase(); return; }
                     const summarySel = exam.querySelector(
                         `.mock-summary-select[data-question-id="${qid}"][data-blank="${blankNum}"]`
                     );
@@ -307,7 +315,80 @@
         if (counter) counter.textContent = countWords(textarea.value);
     }
 
+    function answersDelta(current) {
+        const answers = {};
+        const removed = [];
+        Object.keys(current).forEach((qid) => {
+            if (JSON.stringify(current[qid]) !== JSON.stringify(lastSavedAnswers[qid])) answers[qid] = current[qid];
+        });
+        Object.keys(lastSavedAnswers).forEach((qid) => {
+            if (!(qid in current)) removed.push(qid);
+        });
+        return { answers, removed, count: Object.keys(answers).length + removed.length };
+    }
+
+    function deltaPayload(current) {
+        const delta = answersDelta(current);
+        if (!delta.count) return null;
+        answersVersion += 1;
+        return { attempt: attemptId, version: answersVersion, answers: delta.answers, removed: delta.removed };
+    }
+
+    function markSaved(current, version) {
+        if (version > ackedVersion) {
+            ackedVersion = version;
+            lastSavedAnswers = current;
+        }
+    }
+
+    async function saveDelta(manual) {
+        const current = collectAnswers();
+        const payload = deltaPayload(current);
+        if (!payload) {
+            setAutosaveStatus(manual ? 'Saqlangan' : 'Avtomatik saqlandi', true);
+            if (manual) toast('Javoblaringiz saqlandi', 'success');
+            return;
+        }
+        setAutosaveStatus('Saqlanmoqda...', false);
+        try {
+            const res = await fetch(autosaveUrl, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', 'X-Requested-With': 'XMLHttpRequest', 'X-CSRFToken': csrfToken },
+                body: JSON.stringify(payload),
+            });
+            const data = await res.json();
+            if (data.success) {
+                markSaved(current, data.version);
+                setAutosaveStatus(manual ? 'Saqlangan' : 'Avtomatik saqlandi', true);
+                if (manual) toast('Javoblaringiz saqlandi', 'success');
+            } else if (data.error === 'stale_version') {
+                // Boshqa oyna yangiroq versiya yozgan — keyingi saqlash to'liq holatni yuboradi
+                answersVersion = Math.max(answersVersion, data.version || 0);
+                ackedVersion = answersVersion;
+                lastSavedAnswers = {};
+                saveDelta(manual);
+            } else {
+                setAutosaveStatus('Saqlash xatosi', false);
+            }
+        } catch (e) {
+            setAutosaveStatus('Saqlash xatosi', false);
+            if (manual) toast('Saqlab bo\'lmadi. Internetni tekshiring.', 'error', 'Xatolik');
+        }
+    }
+
+    function flushWithBeacon() {
+        if (!autosaveUrl || !navigator.sendBeacon || submitting) return;
+        const current = collectAnswers();
+        const payload = deltaPayload(current);
+        if (!payload) return;
+        const body = new URLSearchParams();
+        body.append('csrfmiddlewaretoken', csrfToken || '');
+        body.append('payload', JSON.stringify(payload));
+        if (navigator.sendBeacon(autosaveUrl, body)) markSaved(current, payload.version);
+    }
+
     async function saveProgress(manual) {
+        if (autosaveUrl && attemptId) return saveDelta(manual);
         setAutosaveStatus('Saqlanmoqda...', false);
         try {
             const res = await fetch(takeUrl, {
@@ -856,6 +937,11 @@
         window._mockSaveTimer = setTimeout(() => saveProgress(false), 2000);
     });
 
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') flushWithBeacon();
+    });
+    window.addEventListener('pagehide', flushWithBeacon);
+
     document.getElementById('finish-test-btn')?.addEventListener('click', openSubmitModal);
     document.getElementById('confirm-submit-btn')?.addEventListener('click', finishTest);
     document.querySelectorAll('[data-close-submit]').forEach(el => {